@@ -27,21 +27,237 @@ import google.generativeai as genai
 import json
 import os
 import time
-import requests
+import httpx
+import asyncio
 import logging
 import shutil
 import sys
 import atexit
 import subprocess
+import hashlib
+import hmac
+import ipaddress
+import math
+import random
+import threading
+import multiprocessing
+import heapq
+import zipfile
+import io
+import uuid
+import difflib
+import zlib
+import re
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import Counter, OrderedDict, deque
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 LOCAL_APPDATA = os.getenv('LOCALAPPDATA')
 DATA_DIR = os.path.join(LOCAL_APPDATA, 'Scripz', 'data')
 ENV_FILE = os.path.join(DATA_DIR, 'profile.env')
 LOG_FILE = os.path.join(DATA_DIR, 'scripz.log')
 SCRIPTS_FILE = os.path.join(DATA_DIR, 'scripts.json')
+SCRIPTS_LOCK_FILE = os.path.join(DATA_DIR, 'scripts.json.lock')
+RELEASE_CACHE_FILE = os.path.join(DATA_DIR, 'release_cache.json')
+USAGE_FILE = os.path.join(DATA_DIR, 'usage.jsonl')
+BLOB_DIR = os.path.join(DATA_DIR, 'blobs')
+HISTORY_DIR = os.path.join(DATA_DIR, 'history')
+SYNC_LOG_FILE = os.path.join(DATA_DIR, 'sync_ops.jsonl')
+SMART_CATEGORIES_FILE = os.path.join(DATA_DIR, 'smart_categories.json')
+SEMANTIC_VECTORS_FILE = os.path.join(DATA_DIR, 'semantic_vectors.f32')
+SEMANTIC_INDEX_FILE = os.path.join(DATA_DIR, 'semantic_index.json')
 GITHUB_API = f"https://api.github.com/repos/Christian-Boettcher/Scripz/releases/latest"
+UPDATE_TIMEOUT = 15  # Seconds to wait on the update server before giving up
+HTTP_MAX_CONNECTIONS = 4  # Connections the shared HTTP client keeps open for reuse
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+RELEASE_CACHE_TTL = 60 * 60  # Seconds a cached release check is reused without asking GitHub
+# Content defined chunking used for delta updates (average chunk is ~8 KiB)
+CHUNK_MIN_SIZE = 2 * 1024
+CHUNK_MAX_SIZE = 64 * 1024
+CHUNK_MASK = ((1 << 13) - 1) << (64 - 13)
+CHUNK_GEAR = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "little") for i in range(256)]
+DELTA_MAX_RATIO = 0.6  # Fall back to the full download if more than this share of the file has changed
+SEARCH_PAGE_SIZE = 50  # Results rendered per page in the global search view
+CATEGORY_PAGE_SIZE = 50  # Scripts rendered per page when scrolling through a category
+CATEGORY_MAX_PAGES = 4  # Pages kept rendered per category, pages scrolled further out of view are released
+SCROLL_LOAD_THRESHOLD = 200  # Pixels from the end of the script list at which the next page is loaded
+PALETTE_RESULTS = 10  # Results shown in the command palette
+PALETTE_SCAN_LIMIT = 1000  # Candidates ranked per palette query
+USAGE_HALF_LIFE = 7 * 24 * 60 * 60  # Seconds after which a copy counts half as much when ranking
+MARKDOWN_DEBOUNCE = 0.3  # Seconds of typing inactivity before the script preview re-renders
+MARKDOWN_PREVIEW_MAX_LINES = 500  # Preview size cap, overridable with PREVIEW_MAX_LINES in profile.env
+MARKDOWN_PREVIEW_MAX_CHARS = 50000
+MARKDOWN_CACHE_SIZE = 32
+TOOLTIP_PREVIEW_LINES = 15  # Lines of the script shown when hovering a script name
+TOOLTIP_PREVIEW_CHARS = 1000
+IMPORT_MAX_FILE_SIZE = 1024 * 1024  # Larger files are skipped by the importer
+# Near duplicate detection: one permutation MinHash over 3-word shingles, bucketed with LSH bands
+MINHASH_BINS = 32
+LSH_BANDS = 8
+NEAR_DUPLICATE_THRESHOLD = 0.8  # Estimated Jaccard similarity above which two scripts are "similar"
+NEAR_DUPLICATE_MIN_WORDS = 8  # Shorter scripts are only checked for exact duplicates
+DUPLICATE_GROUPS_SHOWN = 50
+BLOB_MIN_SIZE = 1024  # Script bodies of at least this many characters are kept in the blob store
+HISTORY_SNAPSHOT_INTERVAL = 10  # Every Nth saved version of a script is stored in full instead of as a delta
+HISTORY_MAX_VERSIONS = 50  # Older versions are dropped from a script's history
+STORAGE_POLL_INTERVAL = 1  # Seconds between checks of scripts.json when file system events aren't available
+STORAGE_SETTLE_DELAY = 0.2  # Seconds to let a burst of file system events settle before re-reading scripts.json
+SYNC_PORT = 8765  # Default port of the sync server, overridable with SYNC_PORT in profile.env
+SYNC_INTERVAL = 2  # Seconds between sync requests of a client when nothing changed locally
+SYNC_TIMEOUT = 10
+SYNC_MAX_REQUEST_SIZE = 64 * 1024 * 1024  # Larger sync requests are refused by the server
+LIBRARY_CHANGE_LOG_SIZE = 1000  # Changes kept for incremental indexes, one that falls further behind rebuilds
+IMPORT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+# Fields a smart category query can test and the script attribute they read, None for the category
+SMART_QUERY_FIELDS = {
+    "type": "script_type",
+    "name": "script_name",
+    "body": "script_value",
+    "value": "script_value",
+    "description": "script_description",
+    "tag": "script_tags",
+    "tags": "script_tags",
+    "category": None,
+}
+REGEX_SEARCH_WORKERS = min(8, os.cpu_count() or 1)  # Processes the library is sharded across for regex search
+REGEX_SEARCH_TIMEOUT = 3  # Seconds a regex query may run before its workers are stopped
+REGEX_WORKER_START_TIMEOUT = 60  # Seconds a freshly started worker process gets to import the app
+REGEX_CACHE_SIZE = 64  # Compiled patterns kept per process
+REGEX_MAX_SPANS = 20  # Match offsets returned per script
+REGEX_PREVIEW_CONTEXT = 40  # Characters shown before a match in its preview line
+SEMANTIC_DIMENSIONS = 1024  # Hashed feature buckets per script vector
+SEMANTIC_FORMAT = 2  # Changes when vectors are computed differently, an index of another format is rebuilt
+SEMANTIC_MIN_ROWS = 1024  # Initial capacity of the vector file, it doubles when full
+SEMANTIC_MAX_CHARS = 20000  # Characters of a script body used for its vector
+SEMANTIC_TOP_K = 50  # Results shown by a semantic search
+SEMANTIC_MIN_SCORE = 0.1  # Cosine similarity below which a script isn't shown as a result
+SEMANTIC_NORM_CHUNK = 8192  # Rows whose weighted norms are computed at once
+SEMANTIC_FIELD_WEIGHTS = (("script_name", 2.0), ("script_description", 1.5), ("script_value", 1.0))
+SEMANTIC_STOP_WORDS = frozenset(("a", "an", "and", "the", "of", "to", "in", "on", "for", "is", "it", "or", "with"))
+SEMANTIC_TOKEN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+")
+CLASSIFIER_MAX_CHARS = 4000  # Characters of a script the language classifier looks at
+CLASSIFIER_MIN_TOKENS = 3  # Shorter input isn't classified
+CLASSIFIER_MIN_MARGIN = 0.15  # Lead per token the best type needs over the next one to count as a guess
+CLASSIFIER_HINT_WEIGHT = 3  # How much a LANGUAGE_HINTS snippet counts compared to a script in the library
+CLASSIFIER_SMOOTHING = 0.1
+CLASSIFIER_MIN_COLUMNS = 4096  # Initial feature columns of the classifier's count matrix, doubled when full
+CODE_TOKEN = re.compile(r"[A-Za-z_][\w]*(?:-[A-Za-z_]\w*)*|[^\w\s]{1,3}")
+SMART_QUERY_OPERATORS = ("=", "!=", "contains", "startswith", "endswith")
+SMART_QUERY_TOKEN = re.compile(r"""\s*(?:"([^"]*)"|'([^']*)'|(!=|=|\(|\))|([^\s=()"']+?)(?=\s|!=|=|\(|\)|$))""")
+# File extensions recognised by the importer and the DEFAULT_TYPES entry they map to
+IMPORT_EXTENSIONS = {
+    ".bash": "Bash",
+    ".bat": "Cmd",
+    ".c": "C",
+    ".cmd": "Cmd",
+    ".cpp": "C++",
+    ".cs": "C#",
+    ".css": "CSS",
+    ".dart": "Dart",
+    ".go": "Go",
+    ".h": "C",
+    ".html": "HTML",
+    ".java": "Java",
+    ".js": "Javascript",
+    ".json": "JSON",
+    ".jsp": "JSP",
+    ".jsx": "JSX",
+    ".lua": "Lua",
+    ".php": "PHP",
+    ".pl": "Perl",
+    ".ps1": "Powershell",
+    ".psm1": "Powershell",
+    ".py": "Python",
+    ".rb": "Ruby",
+    ".sh": "Bash",
+    ".sql": "SQL",
+    ".swift": "Swift",
+    ".ts": "Typescript",
+    ".txt": "Text",
+    ".vb": "VB",
+    ".vbs": "VBScript",
+    ".xml": "XML",
+    ".yaml": "YAML",
+    ".yml": "YAML",
+}
+# File extension used when exporting each DEFAULT_TYPES entry as a source file
+EXPORT_EXTENSIONS = {
+    "ASP.NET": ".aspx",
+    "Bash": ".sh",
+    "C": ".c",
+    "C#": ".cs",
+    "C++": ".cpp",
+    "CSS": ".css",
+    "Cmd": ".bat",
+    "Dart": ".dart",
+    "Django": ".html",
+    "Docker File": ".dockerfile",
+    "Go": ".go",
+    "HTML": ".html",
+    "HTTP": ".http",
+    "JSON": ".json",
+    "JSP": ".jsp",
+    "JSX": ".jsx",
+    "Java": ".java",
+    "Javascript": ".js",
+    "Lua": ".lua",
+    "Other": ".txt",
+    "PHP": ".php",
+    "Perl": ".pl",
+    "Powershell": ".ps1",
+    "Python": ".py",
+    "Ruby": ".rb",
+    "SQL": ".sql",
+    "Swift": ".swift",
+    "Text": ".txt",
+    "Typescript": ".ts",
+    "VB": ".vb",
+    "VBScript": ".vbs",
+    "XML": ".xml",
+    "YAML": ".yml",
+}
 SETTINGS = {}
 SCRIPT_OBJECTS = {}
+SCRIPT_USAGE = {}  # script_id -> [copy count, last copied timestamp]
+LIBRARY_VERSION = 0  # Bumped on every change to SCRIPT_OBJECTS so derived indexes know when to rebuild
+LIBRARY_CHANGES = deque(maxlen=LIBRARY_CHANGE_LOG_SIZE)  # (version, {script_id: (category, script) or None})
+MARKDOWN_CACHE = OrderedDict()  # (script_type, sha1 of script_value) -> rendered markdown
+REGEX_CACHE = OrderedDict()  # pattern -> compiled pattern
+REGEX_SHARD = {}  # script_id -> script_value, the part of the library held by a regex search worker process
+SEMANTIC_BUCKETS = {}  # feature -> (word bucket, [trigram buckets]), so hashing a word is done once
+BLOB_REFCOUNTS = Counter()  # blob hash -> number of scripts referencing it in scripts.json
+BLOB_HASHES = {}  # script body -> blob hash, so unchanged bodies aren't re-hashed on every save
+SCRIPT_BASE = {}  # script_id -> (category, script) as last read from or written to scripts.json
+SCRIPT_BASE_CATEGORIES = set()
+SCRIPTS_FILE_STAMP = None  # (mtime, size, inode) of scripts.json as last read or written by this instance
+STORAGE_LISTENERS = []  # Called with the changed categories when changes made elsewhere are merged in
+STORAGE_CHANGED = threading.Event()  # Wakes the scripts.json watcher
+PENDING_CATEGORIES = set()  # Categories changed by merges whose listeners haven't been notified yet
+SYNC_ENABLED = False
+SYNC_NODE_ID = ""  # Identifies this library in sync operations, kept in profile.env
+SYNC_CLOCK = {}  # Vector clock: node id -> highest operation counter applied from that node
+SYNC_VERSIONS = {}  # script_id -> the operation that set the script's current state (deletes are kept as tombstones)
+SYNC_OPS = []  # Operations kept in SYNC_LOG_FILE, served to peers that haven't seen them
+SYNC_PEER_CLOCK = {}  # The server's vector clock as of the last sync, so clients only send what it lacks
+SYNC_PUSH = threading.Event()  # Wakes the sync client after a local change
+HTTP_CLIENT = None  # Shared async HTTP client, created on first use (see http_client)
 DEFAULT_TYPES = [
     "ASP.NET",
     "Bash",
@@ -76,10 +292,289 @@ DEFAULT_TYPES = [
     "VBScript",
     "XML",
     "YAML"]
+# Small made-up snippets per type the language classifier starts from, the library's own scripts are added to them
+LANGUAGE_HINTS = {
+    "ASP.NET": '''<%@ Page Language="C#" AutoEventWireup="true" CodeBehind="Default.aspx.cs" %>
+<asp:Label ID="Label1" runat="server" Text="Hello"></asp:Label>
+<asp:Button ID="Submit" runat="server" OnClick="Submit_Click" />
+@model IndexViewModel
+@Html.ActionLink("Home", "Index") @using (Html.BeginForm()) { }''',
+    "Bash": '''#!/bin/bash
+for f in *.log; do
+  if [ -f "$f" ]; then echo "$f"; fi
+done
+export PATH="$HOME/bin:$PATH"; grep -r "$1" . | awk '{print $1}' | sed 's/a/b/g'
+sudo apt-get install -y curl && chmod +x run.sh; [[ -z "$VAR" ]] || exit 1; local x=$(pwd)''',
+    "C": '''#include <stdio.h>
+#include <stdlib.h>
+int main(int argc, char *argv[]) {
+    char *buf = malloc(sizeof(char) * 64);
+    printf("%s\\n", argv[0]); free(buf); return 0;
+}
+static void copy(struct node *n, size_t len) { memcpy(n->data, src, len); }''',
+    "C#": '''using System;
+using System.Linq;
+namespace App {
+    public class Program {
+        public static async Task Main(string[] args) {
+            var items = new List<string>(); Console.WriteLine($"{items.Count}");
+            foreach (var item in items.Where(x => x != null)) { }
+        }
+        public string Name { get; set; }
+    }
+}''',
+    "C++": '''#include <iostream>
+#include <vector>
+int main() {
+    std::vector<int> v{1, 2, 3};
+    for (auto &x : v) std::cout << x << std::endl;
+    template <typename T> class Box { public: T value; };
+    std::unique_ptr<Box<int>> box = std::make_unique<Box<int>>(); namespace fs = std::filesystem;
+}''',
+    "CSS": '''body { margin: 0; padding: 0; font-family: Arial, sans-serif; }
+.container > .item:hover { color: #333; background-color: rgba(0, 0, 0, 0.5); }
+@media (max-width: 600px) { .nav { display: none; } }
+#header { border: 1px solid #ccc; width: 100%; height: 40px; }''',
+    "Cmd": '''@echo off
+setlocal enabledelayedexpansion
+set NAME=%1
+if "%NAME%"=="" goto :usage
+for %%f in (*.txt) do echo %%f
+xcopy /s /y C:\\src D:\\dst
+ipconfig /flushdns & net user %USERNAME% /domain
+:usage
+echo Usage: %~nx0 name & exit /b 1''',
+    "Dart": '''import 'package:flutter/material.dart';
+void main() => runApp(const MyApp());
+class MyApp extends StatelessWidget {
+  const MyApp({super.key});
+  @override
+  Widget build(BuildContext context) { return MaterialApp(home: Scaffold()); }
+  final String? name; late int count; Future<void> load() async { await fetch(); }
+}''',
+    "Django": '''{% extends "base.html" %}
+{% load static %}
+{% block content %}
+{% for item in items %}<li>{{ item.name|title }}</li>{% endfor %}
+{% if user.is_authenticated %}{% url 'home' %}{% endif %}
+{% endblock %}''',
+    "Docker File": '''FROM python:3.11-slim
+WORKDIR /app
+COPY requirements.txt .
+RUN pip install --no-cache-dir -r requirements.txt
+ENV PORT=8000
+EXPOSE 8000
+ENTRYPOINT ["python"]
+CMD ["app.py"]''',
+    "Go": '''package main
+import (
+    "fmt"
+    "net/http"
+)
+func main() {
+    x := 10
+    if err != nil { return err }
+    go func() { ch <- x }()
+    fmt.Println(x); defer resp.Body.Close()
+}
+type Server struct { Name string `json:"name"` }''',
+    "HTML": '''<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Page</title><link rel="stylesheet" href="style.css"></head>
+<body>
+<div class="container"><p>Hello</p><a href="/home">Home</a><img src="a.png" alt=""></div>
+<script src="app.js"></script>
+</body>
+</html>''',
+    "HTTP": '''GET /api/users?id=1 HTTP/1.1
+Host: example.com
+Accept: application/json
+Authorization: Bearer token
+Content-Type: application/json
+POST /login HTTP/1.1
+HTTP/1.1 200 OK
+Content-Length: 42''',
+    "JSON": '''{
+    "name": "app",
+    "version": "1.0.0",
+    "enabled": true,
+    "items": [1, 2, 3],
+    "config": {"port": 8080, "host": null}
+}''',
+    "JSP": '''<%@ page contentType="text/html;charset=UTF-8" language="java" %>
+<%@ taglib prefix="c" uri="http://java.sun.com/jsp/jstl/core" %>
+<c:forEach var="item" items="${items}"><p>${item.name}</p></c:forEach>
+<% String name = request.getParameter("name"); %>
+<%= name %>''',
+    "JSX": '''import React, { useState } from 'react';
+export default function App({ items }) {
+  const [count, setCount] = useState(0);
+  return (
+    <div className="app" onClick={() => setCount(count + 1)}>
+      {items.map(item => <Item key={item.id} {...item} />)}
+    </div>
+  );
+}''',
+    "Java": '''package com.example;
+import java.util.List;
+public class Main {
+    private final List<String> names = new ArrayList<>();
+    public static void main(String[] args) {
+        System.out.println("Hello");
+    }
+    @Override
+    public String toString() { return name; }
+    throws IOException { try { } catch (Exception e) { e.printStackTrace(); } }
+}''',
+    "Javascript": '''const express = require('express');
+function handler(req, res) {
+  let items = [];
+  document.getElementById('app').addEventListener('click', () => console.log(items));
+  fetch(url).then(res => res.json()).catch(err => console.error(err));
+  var self = this; module.exports = { handler };
+}
+async function load() { const data = await fetch('/api'); return data === null ? undefined : data; }''',
+    "Lua": '''local function greet(name)
+  if name == nil then return end
+  for i, v in ipairs(items) do print(i, v) end
+  local t = { key = "value" }
+  return "Hello " .. name
+end
+-- comment
+while x ~= 0 do x = x - 1 end''',
+    "PHP": '''<?php
+namespace App;
+$name = $_GET['name'] ?? 'World';
+function greet($name) { echo "Hello, " . $name; }
+foreach ($items as $key => $value) { $result[] = $value; }
+class User extends Model { public function __construct() { $this->id = 1; } }
+?>''',
+    "Perl": '''#!/usr/bin/perl
+use strict;
+use warnings;
+my @items = (1, 2, 3);
+my %hash = (key => 'value');
+foreach my $item (@items) { print "$item\\n"; }
+sub greet { my ($name) = @_; return "Hello $name"; }
+if ($line =~ m/^foo/) { $line =~ s/foo/bar/g; }
+package My::Module;
+sub new { my $class = shift; my $self = { @_ }; return bless $self, $class; }
+my @list = qw(a b c); print scalar(@list), $#list; die "failed: $!" unless open(my $fh, '<', $file);
+1;''',
+    "Powershell": '''Get-ADUser -Filter * -Properties Name | Where-Object { $_.Enabled -eq $true }
+Import-Module ActiveDirectory
+$users = Get-Content -Path C:\\users.txt
+foreach ($user in $users) { Write-Host "User: $user" }
+param([string]$Name, [switch]$Force)
+Set-ItemProperty -Path HKLM:\\Software -Name Value -Value 1 -ErrorAction Stop
+New-Item -ItemType Directory; Remove-Item $path -Recurse; [CmdletBinding()]
+if (Test-Path (Join-Path $PSScriptRoot "config.json") -and $PSVersionTable.PSVersion.Major -lt 6) { }
+$ret = $LASTEXITCODE; $null = $MyInvocation.MyCommand | Out-Null''',
+    "Python": '''import os
+from pathlib import Path
+def main(args):
+    for name in os.listdir("."):
+        if name.endswith(".py"):
+            print(name)
+class Item(object):
+    def __init__(self, value=None):
+        self.value = value
+if __name__ == "__main__":
+    main(sys.argv[1:])
+elif x is None: pass
+with open(path) as f: data = [line.strip() for line in f]''',
+    "Ruby": '''require 'json'
+class User < ApplicationRecord
+  attr_accessor :name
+  def initialize(name)
+    @name = name
+  end
+  def greet
+    puts "Hello #{@name}"
+  end
+end
+items.each do |item| puts item end
+has_many :posts; unless valid? then nil end''',
+    "SQL": '''SELECT u.id, u.name, COUNT(o.id) AS orders
+FROM users u
+LEFT JOIN orders o ON o.user_id = u.id
+WHERE u.active = 1 AND u.created_at > '2020-01-01'
+GROUP BY u.id, u.name
+ORDER BY orders DESC;
+INSERT INTO logs (message) VALUES ('done');
+UPDATE users SET name = 'x' WHERE id = 1;
+CREATE TABLE items (id INT PRIMARY KEY, name VARCHAR(50) NOT NULL);''',
+    "Swift": '''import UIKit
+struct User: Codable {
+    let name: String
+    var age: Int?
+}
+func greet(_ user: User) -> String {
+    guard let age = user.age else { return "" }
+    return "Hello \\(user.name)"
+}
+class ViewController: UIViewController { override func viewDidLoad() { super.viewDidLoad() } }''',
+    "Text": '''Please remember to send the report to the team before the meeting on Friday.
+This is a note about the project and what we need to do next week.
+Thank you for your help, I will call you when I get back to the office.
+The password for the guest network is on the sheet in the kitchen.
+We should ask them if they can move the deadline, it would give us more time to test.''',
+    "Typescript": '''import { Injectable } from '@angular/core';
+interface User { id: number; name: string; email?: string; }
+export class UserService {
+  private users: User[] = [];
+  constructor(private http: HttpClient) {}
+  getUser(id: number): Observable<User> { return this.http.get<User>(`/api/${id}`); }
+}
+type Result<T> = { data: T } | null; const x: string = 'a' as const; enum Color { Red, Green }''',
+    "VB": '''Imports System
+Module Program
+    Sub Main(args As String())
+        Dim name As String = "World"
+        If name <> "" Then
+            Console.WriteLine("Hello " & name)
+        End If
+    End Sub
+    Public Function Add(a As Integer, b As Integer) As Integer
+        Return a + b
+    End Function
+End Module''',
+    "VBScript": '''Option Explicit
+Dim objShell, objFSO, strPath
+Set objShell = CreateObject("WScript.Shell")
+Set objFSO = CreateObject("Scripting.FileSystemObject")
+strPath = objShell.ExpandEnvironmentStrings("%TEMP%")
+If objFSO.FolderExists(strPath) Then WScript.Echo strPath
+On Error Resume Next
+MsgBox "Done", vbOKOnly''',
+    "XML": '''<?xml version="1.0" encoding="UTF-8"?>
+<configuration>
+  <appSettings>
+    <add key="Port" value="8080" />
+  </appSettings>
+  <project xmlns="http://maven.apache.org/POM/4.0.0"><dependency><groupId>org</groupId></dependency></project>
+</configuration>''',
+    "YAML": '''version: "3.8"
+services:
+  web:
+    image: nginx:latest
+    ports:
+      - "80:80"
+    environment:
+      - DEBUG=false
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - name: Install
+        run: npm ci''',
+}
 SCRIPT_TYPE_OPTIONS = []
 GEMINI_API_KEY = ""
 FIRST_START = True
 GEMINI_ENABLED = False
+COMPACT_ROWS = False  # Render scripts as single text rows sharing one toolbar, set with COMPACT_ROWS in profile.env
 
 
 def handle_update():
@@ -112,6 +607,381 @@ def handle_update():
     subprocess.Popen(os.path.dirname(__file__) + "\\Scripz.exe", startupinfo=startupinfo)
 
 
+def http_client():
+    """
+    Returns the HTTP client shared by all network calls, creating it on first use.
+
+    The client pools its connections, so repeated requests to GitHub or the sync server reuse an open
+    connection instead of paying for a new TCP and TLS handshake each time. It must only be used from the
+    event loop Flet runs the app on.
+    """
+    global HTTP_CLIENT
+    if HTTP_CLIENT is None:
+        HTTP_CLIENT = httpx.AsyncClient(
+            timeout=UPDATE_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+        )
+    return HTTP_CLIENT
+
+
+def read_release_cache():
+    try:
+        with open(RELEASE_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_release_cache(cache):
+    try:
+        with open(RELEASE_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError as e:
+        log_error(e)
+
+
+async def fetch_latest_release():
+    """
+    Returns the latest GitHub release, using a local cache and conditional requests to spare the API.
+
+    Description:
+        - The last response is kept in RELEASE_CACHE_FILE together with its ETag and the time it was fetched.
+        - If the cached result is younger than RELEASE_CACHE_TTL it is returned without touching the network.
+        - Otherwise GitHub is asked with an 'If-None-Match' header. A 304 answer reuses the cached release and
+        does not count against the API rate limit.
+        - If GitHub can't be reached, a stale cached release is returned when one is available.
+
+    Raises:
+        - httpx.HTTPError: On network errors when there is no cached release to fall back on.
+
+    Returns:
+        dict: The release JSON, or None if the repository has no releases.
+    """
+    cache = await asyncio.to_thread(read_release_cache)
+
+    if cache.get("release") and time.time() - cache.get("checked_at", 0) < RELEASE_CACHE_TTL:
+        return cache["release"]
+
+    headers = {"Accept": "application/vnd.github+json"}
+    if cache.get("etag") and cache.get("release"):
+        headers["If-None-Match"] = cache["etag"]
+    try:
+        response = await http_client().get(GITHUB_API, headers=headers)
+        if response.status_code == 404:
+            log_error(f"Repository 'Christian-Boettcher/Scripz' not found or no releases available.")
+            return None
+        if response.status_code != 304:
+            response.raise_for_status()
+            cache["release"] = response.json()
+            cache["etag"] = response.headers.get("ETag")
+    except httpx.HTTPError as e:
+        if cache.get("release"):
+            log_error(f"{e} - using cached release information.")
+            return cache["release"]
+        raise
+
+    cache["checked_at"] = time.time()
+    await asyncio.to_thread(write_release_cache, cache)
+    return cache["release"]
+
+
+def release_executable(assets):
+    """
+    Picks the executable out of a release's assets, skipping the chunk manifests published next to it.
+
+    Returns:
+        dict: The asset, preferring one ending in '.exe', or None if the release has no executable.
+    """
+    executables = [asset for asset in assets if not asset["name"].endswith(".chunks.json")]
+    return next((asset for asset in executables if asset["name"].lower().endswith(".exe")),
+                executables[0] if executables else None)
+
+
+def split_chunks(data):
+    """
+    Splits data into content defined chunks using a gear rolling hash.
+
+    Chunk boundaries depend only on the surrounding bytes, so inserting or removing data in one place
+    only changes the chunks around the edit and the rest of the file still lines up with the old build.
+
+    Parameters:
+        - data (bytes): The data to split.
+
+    Yields:
+        tuple: (offset, length) of each chunk.
+    """
+    size = len(data)
+    start = 0
+    while start < size:
+        end = min(start + CHUNK_MAX_SIZE, size)
+        cut = end
+        rolling_hash = 0
+        for i in range(start + CHUNK_MIN_SIZE, end):
+            rolling_hash = ((rolling_hash << 1) + CHUNK_GEAR[data[i]]) & 0xFFFFFFFFFFFFFFFF
+            if not rolling_hash & CHUNK_MASK:
+                cut = i + 1
+                break
+        yield start, cut - start
+        start = cut
+
+
+def build_chunk_manifest(path):
+    """
+    Builds the chunk manifest published next to a release asset to allow delta updates.
+
+    Parameters:
+        - path (str): Path of the release build (e.g. 'dist\\Scripz.exe').
+
+    Returns:
+        dict: {"size": int, "sha256": str, "chunks": [[offset, length, sha256], ...]}
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    return {
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "chunks": [
+            [offset, length, hashlib.sha256(data[offset:offset + length]).hexdigest()]
+            for offset, length in split_chunks(data)
+        ],
+    }
+
+
+def index_chunks(path):
+    """
+    Reads a build and maps the SHA-256 digest of each of its chunks to the chunk's offset.
+
+    Returns:
+        tuple: (data, {digest: offset})
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    chunks = {}
+    for offset, length in split_chunks(data):
+        chunks.setdefault(hashlib.sha256(data[offset:offset + length]).digest(), offset)
+    return data, chunks
+
+
+def assemble_chunk_delta(installed, local_chunks, manifest, ranges, remote, destination):
+    """
+    Writes the new release from local and downloaded chunks, verifying each chunk and the whole file.
+    """
+    file_hash = hashlib.sha256()
+    partial_file = destination + ".part"
+    with open(partial_file, "wb") as file:
+        range_index = 0
+        for offset, length, digest in manifest["chunks"]:
+            local_offset = local_chunks.get(bytes.fromhex(digest))
+            if local_offset is not None:
+                chunk = installed[local_offset:local_offset + length]
+            else:
+                while not ranges[range_index][0] <= offset < ranges[range_index][1]:
+                    range_index += 1
+                range_start = ranges[range_index][0]
+                chunk = remote[range_start][offset - range_start:offset - range_start + length]
+            if hashlib.sha256(chunk).hexdigest() != digest:
+                os.remove(partial_file)
+                raise ValueError(f"Chunk at offset {offset} failed verification.")
+            file.write(chunk)
+            file_hash.update(chunk)
+
+    if file_hash.hexdigest() != manifest["sha256"]:
+        os.remove(partial_file)
+        raise ValueError(f"Checksum mismatch for '{destination}', the delta update has been discarded.")
+    os.replace(partial_file, destination)
+
+
+async def apply_chunk_delta(installed_path, manifest, file_url, destination, progress_callback=None):
+    """
+    Rebuilds a new release from the installed build, downloading only the chunks that changed.
+
+    Description:
+        - The installed build is split with the same chunker used for the manifest and every chunk the new
+        release shares with it is copied locally.
+        - Missing chunks are grouped into contiguous byte ranges and fetched from 'file_url' with HTTP Range requests.
+        - Each chunk and the finished file are verified against the manifest before 'destination' is written.
+
+    Parameters:
+        - installed_path (str): Path of the currently installed build.
+        - manifest (dict): The chunk manifest of the new release (see build_chunk_manifest).
+        - file_url (str): URL of the full release asset.
+        - destination (str): Where the rebuilt file is written.
+        - progress_callback (callable): Optional callable receiving (downloaded_bytes, bytes_to_download).
+
+    Raises:
+        - ValueError: If the delta isn't worth it (see DELTA_MAX_RATIO), the server doesn't honour Range
+        requests or verification fails.
+        - httpx.HTTPError: On network errors.
+
+    Returns:
+        int: The number of bytes downloaded.
+    """
+    # Chunking the installed build is CPU bound, keep it off the event loop
+    installed, local_chunks = await asyncio.to_thread(index_chunks, installed_path)
+
+    # Group chunks missing locally into contiguous ranges of the new file
+    ranges = []
+    for offset, length, digest in manifest["chunks"]:
+        if bytes.fromhex(digest) in local_chunks:
+            continue
+        if ranges and ranges[-1][1] == offset:
+            ranges[-1][1] = offset + length
+        else:
+            ranges.append([offset, offset + length])
+    missing = sum(end - start for start, end in ranges)
+    if missing > manifest["size"] * DELTA_MAX_RATIO:
+        raise ValueError(f"{missing} of {manifest['size']} bytes changed, delta update not worth it.")
+
+    downloaded = 0
+    remote = {}
+    for start, end in ranges:
+        response = await http_client().get(file_url, headers={"Range": f"bytes={start}-{end - 1}"})
+        response.raise_for_status()
+        if response.status_code != 206 or len(response.content) != end - start:
+            raise ValueError("Server did not honour the Range request.")
+        remote[start] = response.content
+        downloaded += end - start
+        if progress_callback:
+            progress_callback(downloaded, missing)
+
+    await asyncio.to_thread(assemble_chunk_delta, installed, local_chunks, manifest, ranges, remote, destination)
+    return downloaded
+
+
+def hash_file(path, file_hash):
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+
+
+def read_download_validator(validator_file, file_url):
+    """
+    Returns the ETag or Last-Modified value a partial download of 'file_url' was started with, or None.
+    """
+    try:
+        with open(validator_file, "r", encoding="utf-8") as f:
+            validator = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return validator.get("validator") if validator.get("url") == file_url else None
+
+
+def write_download_validator(validator_file, file_url, validator):
+    if validator:
+        with open(validator_file, "w", encoding="utf-8") as f:
+            json.dump({"url": file_url, "validator": validator}, f)
+    elif os.path.exists(validator_file):
+        os.remove(validator_file)
+
+
+def discard_partial_downloads(destination, keep=None):
+    """
+    Removes the partial downloads of 'destination' (and their validators) except the one at 'keep'.
+    """
+    directory = os.path.dirname(destination) or "."
+    prefix = os.path.basename(destination) + "."
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.startswith(prefix) and name.endswith((".part", ".part.json")) and path not in (keep, f"{keep}.json"):
+            os.remove(path)
+
+
+async def download_file(file_url, destination, expected_sha256=None, progress_callback=None, version=None):
+    """
+    Streams a file to disk in chunks, resuming a previous partial download if one exists.
+
+    Description:
+        - The download is written to '<destination>.<version>.part' and only renamed to 'destination' once it is
+        complete and (optionally) verified, so an interrupted download never leaves a broken file behind.
+        Partial downloads of other versions are discarded.
+        - The ETag (or Last-Modified date) of the first response is kept in '<partial file>.json'. If a '.part'
+        file is already present, an HTTP Range request with that value in 'If-Range' fetches only the missing
+        bytes. If the file changed on the server, or the server ignores the Range header, it answers with the
+        whole file and the download starts over. A partial file without a stored validator is never resumed.
+        - The SHA-256 of the full file is computed while streaming and compared against 'expected_sha256'.
+        - The response is read on the event loop while every disk access runs on a worker thread.
+
+    Parameters:
+        - file_url (str): The URL to download.
+        - destination (str): The final path of the downloaded file.
+        - expected_sha256 (str): Optional hex digest the downloaded file must match.
+        - progress_callback (callable): Optional callable receiving (downloaded_bytes, total_bytes).
+        total_bytes is None when the server doesn't report a length.
+        - version (str): Release the file belongs to, so a partial download is only resumed for the same release.
+
+    Raises:
+        - httpx.HTTPError: On network errors or bad HTTP status codes.
+        - ValueError: If the downloaded file doesn't match 'expected_sha256' or the server resumed at the wrong
+        offset. The partial file is removed.
+
+    Returns:
+        str: The path of the downloaded file.
+    """
+    partial_file = f"{destination}.{version}.part" if version else f"{destination}.part"
+    validator_file = f"{partial_file}.json"
+    await asyncio.to_thread(discard_partial_downloads, destination, partial_file)
+    validator = await asyncio.to_thread(read_download_validator, validator_file, file_url)
+    try:
+        resume_from = (await asyncio.to_thread(os.stat, partial_file)).st_size if validator else 0
+    except FileNotFoundError:
+        resume_from = 0
+    headers = {"Range": f"bytes={resume_from}-", "If-Range": validator} if resume_from else {}
+    file_hash = hashlib.sha256()
+
+    async with http_client().stream("GET", file_url, headers=headers) as response:
+        if response.status_code == 416:
+            # Nothing left to fetch, the partial file already holds the whole download
+            total = resume_from
+            mode = None
+        else:
+            response.raise_for_status()
+            if response.status_code == 206:
+                if not response.headers.get("Content-Range", "").startswith(f"bytes {resume_from}-"):
+                    await asyncio.to_thread(discard_partial_downloads, destination)
+                    raise ValueError(f"Server resumed '{destination}' at the wrong offset, the download has been discarded.")
+                mode = "ab"
+            else:
+                # The file changed or the server ignored the Range header, start from scratch
+                resume_from = 0
+                mode = "wb"
+                # Weak ETags can't be used in If-Range
+                etag = response.headers.get("ETag")
+                validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+                await asyncio.to_thread(write_download_validator, validator_file, file_url, validator)
+            length = response.headers.get("Content-Length")
+            total = resume_from + int(length) if length is not None else None
+
+        # Hash what is already on disk so the digest covers the whole file
+        if resume_from:
+            await asyncio.to_thread(hash_file, partial_file, file_hash)
+
+        downloaded = resume_from
+        if progress_callback:
+            progress_callback(downloaded, total)
+        if mode is not None:
+            file = await asyncio.to_thread(open, partial_file, mode)
+            try:
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    await asyncio.to_thread(file.write, chunk)
+                    file_hash.update(chunk)
+                    downloaded += len(chunk)
+                    if progress_callback:
+                        progress_callback(downloaded, total)
+            finally:
+                await asyncio.to_thread(file.close)
+
+    if expected_sha256 and file_hash.hexdigest().lower() != expected_sha256.lower():
+        await asyncio.to_thread(discard_partial_downloads, destination)
+        raise ValueError(f"Checksum mismatch for '{destination}', the download has been discarded.")
+
+    await asyncio.to_thread(os.replace, partial_file, destination)
+    await asyncio.to_thread(discard_partial_downloads, destination)
+    return destination
+
+
 def setup_logger():
     """
     Sets up logging configuration for the program.
@@ -211,151 +1081,3340 @@ def load_env_file():
         return {}
 
 
-def load_script_objects():
+def blob_path(blob):
+    return os.path.join(BLOB_DIR, blob[:2], blob)
+
+
+def read_blob(blob):
+    with open(blob_path(blob), "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def write_blob(blob, script_value):
     """
-    Loads script objects from the specified JSON file and appends them to SCRIPT_OBJECTS.
+    Stores a script body in the blob store under its hash, unless it's already there.
     """
-    global SCRIPT_OBJECTS
-    global SCRIPTS_FILE
+    path = blob_path(blob)
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8", newline="") as f:
+        f.write(script_value)
+    os.replace(path + ".tmp", path)
+
+
+def delete_blob(blob):
     try:
-        with open(SCRIPTS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            for category, items in data.items():
-                if category not in SCRIPT_OBJECTS:
-                    SCRIPT_OBJECTS[category] = []
-                SCRIPT_OBJECTS[category].extend(items)
-            return SCRIPT_OBJECTS
-    except FileNotFoundError:
-        log_error(f".\\{SCRIPTS_FILE} not found. No script objects loaded.")
-        return {}
+        os.remove(blob_path(blob))
+        os.rmdir(os.path.dirname(blob_path(blob)))  # Only succeeds once the folder is empty
+    except OSError:
+        pass
 
 
-def write_json_file(category="", script_type="", script_name="", script_value="", description="", update=False):
+class ScriptRecord:
     """
-    Writes data to a JSON file.
+    A script in SCRIPT_OBJECTS.
 
     Description:
-        - This static method is used to write data to a JSON file.
-        - It takes in various parameters such as category, script_type, script_name, script_value, description, and update.
-        - If update is True, it updates the JSON file with the SCRIPT_OBJECTS data.
-        - Otherwise, it reads the existing data from the file (if any), appends the new data to it, and writes the updated data back to the JSON file.
+        - Slotted, so a script costs a fixed handful of pointers instead of a dict with its own key table.
+        - script_type values are interned, so the few dozen distinct types are stored once for the whole library
+        instead of once per script.
+        - The same record is shared by storage and the ScriptObject showing it, nothing is copied per row.
+        - Supports the dict style access (get, [], in, items, dict(record)) the rest of the app uses.
+        - script_tags is a tuple of normalised tags (see parse_tags), stored as a list in scripts.json.
+        - Fields this version doesn't know (written by a newer one) are kept in 'extra' and written back
+        unchanged, so opening a library in an older version doesn't lose them. 'extra' is None for
+        the usual script without any.
+    """
+    fields = ("script_id", "script_type", "script_name", "script_value", "script_description", "script_tags")
+    __slots__ = fields + ("extra",)
+
+    def __init__(self, script_id=None, script_type="", script_name="", script_value="", script_description="",
+                 script_tags=(), extra=None):
+        self.script_id = script_id
+        self.script_type = sys.intern(script_type) if script_type else script_type
+        self.script_name = script_name
+        self.script_value = script_value
+        self.script_description = script_description
+        self.script_tags = parse_tags(script_tags)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        extra = {key: value for key, value in data.items() if key not in cls.fields}
+        return cls(*(data.get(field) for field in cls.fields), extra=extra)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def copy(self):
+        return ScriptRecord(*(getattr(self, field) for field in self.fields),
+                            extra=dict(self.extra) if self.extra else None)
+
+    def get(self, key, default=None):
+        if key in self.fields:
+            return getattr(self, key)
+        return self.extra.get(key, default) if self.extra else default
+
+    def keys(self):
+        return self.fields + tuple(self.extra) if self.extra else self.fields
+
+    def items(self):
+        yield from ((field, getattr(self, field)) for field in self.fields)
+        if self.extra:
+            yield from self.extra.items()
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.fields:
+            raise KeyError(key)
+        if key == "script_type" and value:
+            value = sys.intern(value)
+        elif key == "script_tags":
+            value = parse_tags(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.fields or bool(self.extra) and key in self.extra
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            other = ScriptRecord.from_dict(other)  # Normalises tags, which JSON turns into lists
+        if isinstance(other, ScriptRecord):
+            return all(getattr(self, field) == getattr(other, field) for field in self.fields) and \
+                self.extra == other.extra
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ScriptRecord({self.to_dict()!r})"
+
+
+def new_script_id():
+    return uuid.uuid4().hex
+
+
+def parse_tags(tags):
+    """
+    Normalises tags to a tuple of unique, lowercase tags.
 
     Parameters:
-        - category (str): The category of the script.
-        - script_type (str): The type of the script.
-        - script_name (str): The name of the script.
-        - script_value (str): The value of the script.
-        - description (str): The description of the script.
-        - update (bool): Flag indicating whether to update the JSON file.
+        - tags (str | iterable): Tags as typed (e.g. 'deploy, #AD cleanup') or as stored.
+        Commas and spaces separate tags, a leading '#' is dropped.
 
+    Returns:
+        tuple: The tags in the order given, interned so each tag is stored once for the whole library.
     """
-    global SCRIPT_OBJECTS
-    data = {
-        "script_type": script_type,
-        "script_name": script_name,
-        "script_value": script_value,
-        "script_description": description
-    }
-    if update:
-        try:
-            with open(SCRIPTS_FILE, "w", encoding="utf-8") as f:
-                json.dump(SCRIPT_OBJECTS, f, ensure_ascii=False, indent=4)
-        except FileNotFoundError:
-            log_error(f".\\{SCRIPTS_FILE} not found. No script objects updated.")
+    if not tags:
+        return ()
+    if isinstance(tags, str):
+        tags = tags.replace(",", " ").split()
+    unique = []
+    for tag in tags:
+        tag = sys.intern(tag.strip().lstrip("#").casefold())
+        if tag and tag not in unique:
+            unique.append(tag)
+    return tuple(unique)
+
+
+def note_library_change(changes=None):
+    """
+    Bumps LIBRARY_VERSION and logs which scripts changed, so incremental indexes only update those.
+
+    Parameters:
+        - changes (dict): script_id -> (category, script) for added, changed or moved scripts, None for
+        deleted ones. None if the changed scripts aren't known, which makes incremental indexes rebuild.
+    """
+    global LIBRARY_VERSION
+    LIBRARY_VERSION += 1
+    LIBRARY_CHANGES.append((LIBRARY_VERSION, changes))
+
+
+def library_changes_since(version):
+    """
+    Returns the scripts changed after 'version' as script_id -> (category, script) or None if deleted,
+    with later changes overriding earlier ones.
 
+    Returns None if the index has to be rebuilt: it was never built, a change didn't say which scripts it
+    touched or LIBRARY_CHANGES no longer reaches back to 'version'. Call while holding a SCRIPTS lock.
+    """
+    if version is None:
+        return None
+    pending = []
+    for change_version, changes in reversed(LIBRARY_CHANGES):
+        if change_version <= version:
+            break
+        if changes is None:
+            return None
+        pending.append(changes)
     else:
-        # Read existing data from the file (if any)
-        try:
-            with open(SCRIPTS_FILE, "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-        except FileNotFoundError:
-            existing_data = {}
+        if LIBRARY_VERSION > version and (not LIBRARY_CHANGES or LIBRARY_CHANGES[0][0] > version + 1):
+            return None
+    merged = {}
+    for changes in reversed(pending):
+        merged.update(changes)
+    return merged
 
-        # Append the new data to the existing data
-        if category not in existing_data:
-            existing_data[category] = []
-            SCRIPT_OBJECTS[category] = []
-        if script_name != "":
-            existing_data[category].append(data)
-            SCRIPT_OBJECTS[category].append(data)
 
-        # Write the updated data back to the JSON file
-        with open(SCRIPTS_FILE, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=4)
+class ReadWriteLock:
+    """
+    Lets any number of threads read at once while a writer gets exclusive access.
 
+    Description:
+        - Writers are preferred: once a writer waits, new readers wait as well, so a steady stream of reads
+        can't hold off a save.
+        - The thread holding the write lock may take it again or take the read lock. A thread that is reading
+        may read again, but can't upgrade to the write lock.
+    """
 
-def update_env_file(key, value):
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = None
+        self.write_depth = 0
+        self.waiting_writers = 0
+        self.local = threading.local()
+
+    def acquire_read(self):
+        depth = getattr(self.local, "read_depth", 0)
+        with self.condition:
+            if depth == 0 and self.writer != threading.get_ident():
+                while self.writer is not None or self.waiting_writers:
+                    self.condition.wait()
+            self.readers += 1
+        self.local.read_depth = depth + 1
+
+    def release_read(self):
+        self.local.read_depth -= 1
+        with self.condition:
+            self.readers -= 1
+            if self.readers == 0:
+                self.condition.notify_all()
+
+    def acquire_write(self):
+        with self.condition:
+            if self.writer == threading.get_ident():
+                self.write_depth += 1
+                return
+            if getattr(self.local, "read_depth", 0):
+                raise RuntimeError("Can't take the write lock while holding the read lock.")
+            self.waiting_writers += 1
+            while self.writer is not None or self.readers:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writer = threading.get_ident()
+            self.write_depth = 1
+
+    def release_write(self):
+        with self.condition:
+            self.write_depth -= 1
+            if self.write_depth == 0:
+                self.writer = None
+                self.condition.notify_all()
+
+
+class ScriptRepository:
     """
-        Updates or adds a key-value pair in the environment file specified by ENV_FILE.
+    Owns SCRIPT_OBJECTS and is the only place it is changed.
 
-        This function attempts to read the contents of the environment file specified by ENV_FILE.
-        If the file exists, it updates the existing key-value pair if the key is found; otherwise, it adds a new key-value pair.
-        If the file doesn't exist, it creates the file with the new key-value pair.
-        The function logs relevant information about file creation and key-value addition or modification.
+    Description:
+        - The library is used from several threads: Flet runs plain def event handlers on its executor threads,
+        async def handlers run on the event loop and call into the repository through asyncio.to_thread, and
+        the file watcher, the sync server and the search warm-ups have threads of their own. So every change is an
+        operation holding the write lock for its whole duration, and readers that iterate over the library take
+        the read lock (see snapshot). Operations block and may save, an async handler must not call them on
+        the event loop directly.
+        - Operations find scripts by script_id, never by name or position, so racing clicks can't act on the
+        wrong script.
+        - Changes are saved when the outermost write block ends, still holding the lock, so saves never
+        interleave and a batch of changes is written once.
+        - The dict is only ever changed in place, references to SCRIPT_OBJECTS stay valid.
+        - Lock order is write lock, then STORAGE_LOCK.
+    """
 
-        Args:
-        key (str): The key to be updated or added in the environment file.
-        value (str): The value corresponding to the key.
+    def __init__(self, data):
+        self.data = data
+        self.lock = ReadWriteLock()
+        self.save_pending = False
 
-        Note:
-        - This function assumes that 'ENV_FILE', 'log_error', and 'log_info' modules are defined.
+    @contextmanager
+    def read(self):
+        self.lock.acquire_read()
+        try:
+            yield self.data
+        finally:
+            self.lock.release_read()
 
-        Raises:
-        No explicit exceptions are raised within this function. However, it may raise exceptions
-        related to file operations or other system-related errors while reading or writing to the file.
+    @contextmanager
+    def write(self):
+        """
+        Holds the write lock. If changed() was called, the library is saved when the outermost block ends.
+        """
+        self.lock.acquire_write()
+        try:
+            yield self.data
+            if self.lock.write_depth == 1 and self.save_pending:
+                self.save_pending = False
+                save_script_objects()
+        finally:
+            self.lock.release_write()
+
+    def changed(self, changes=None):
+        """
+        Marks the library as changed by the current write block, so it is saved and derived indexes update.
 
-        Returns:
-        None
+        Parameters:
+            - changes (dict): The changed scripts as taken by note_library_change, None if unknown.
         """
-    try:
-        # Read the contents of the file
-        with open(ENV_FILE, 'r') as file:
-            lines = file.readlines()
-    except FileNotFoundError:
-        # If the file doesn't exist, create it with the new key-value pair
-        log_error(f".\\{ENV_FILE} not found. Creating it and adding the new values...")
-        lines = []
+        note_library_change(changes)
+        self.save_pending = True
 
-    # Update or add the key-value pair
-    found = False
-    for i, line in enumerate(lines):
-        if line.startswith(key + '='):
-            lines[i] = f"{key}={value}\n"
-            found = True
-            break
-    if not found:
-        lines.append(f"{key}={value}\n")
+    def snapshot(self):
+        """
+        Returns [(category, [scripts])] copied under the read lock, safe to iterate while others write.
+        """
+        with self.read() as data:
+            return [(category, list(items)) for category, items in data.items()]
 
-    # Write the modified contents back to the file
-    with open(ENV_FILE, 'w') as file:
-        file.writelines(lines)
-    if found:
-        log_info(f"Updated key '{key}' in .\\{ENV_FILE} to {value}.")
-    else:
-        log_info(f"Added key '{key}' to .\\{ENV_FILE} with a value of {value}.")
+    def locate(self, script_id):
+        """
+        Returns (category, index) of a script, or (None, None). The caller must hold a lock.
+        """
+        for category, items in self.data.items():
+            for index, item in enumerate(items):
+                if item.script_id == script_id:
+                    return category, index
+        return None, None
 
+    def add(self, category, record=None):
+        """
+        Adds a category if it doesn't exist yet and appends 'record' to it if given.
+        """
+        with self.write() as data:
+            if category not in data:
+                data[category] = []
+                self.changed({})
+            if record is not None:
+                data[category].append(record)
+                self.changed({record.script_id: (category, record)})
+        return record
+
+    def update(self, script_id, **fields):
+        """
+        Changes fields of a script, recording the previous state in its version history.
 
-class AppHeader(ft.Container):
-    def __init__(self, page, container):
-        self.page = page
-        self.container = container
-        super().__init__()
-        self.expand = True
-        self.on_hover = lambda e: self.show_search_bar(e)
-        self.height = 60
-        self.bgcolor = "Transparent"
-        self.border_radius = ft.border_radius.only(top_left=15, top_right=15)
-        self.padding = ft.padding.only(left=15, right=15)
-        self.content = ft.Row(
-            expand=True,
-            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-            controls=[
-                self.category_drawer_toggle(),
-                self.app_header_search(),
-                self.theme_toggle(),
-            ],
-        )
-        self.build()
+        Returns:
+            ScriptRecord: The updated script, None if it no longer exists.
+        """
+        with self.write() as data:
+            category, index = self.locate(script_id)
+            if category is None:
+                return None
+            record = data[category][index]
+            previous = record.copy()
+            for key, value in fields.items():
+                record[key] = value
+            if previous != record:
+                record_script_version(script_id, previous, record)
+                self.changed({script_id: (category, record)})
+            return record
+
+    def swap(self, first_id, second_id):
+        """
+        Swaps the positions of two scripts.
+
+        Returns:
+            bool: False if either script no longer exists.
+        """
+        with self.write() as data:
+            first_category, first_index = self.locate(first_id)
+            second_category, second_index = self.locate(second_id)
+            if first_category is None or second_category is None:
+                return False
+            data[first_category][first_index], data[second_category][second_index] = \
+                data[second_category][second_index], data[first_category][first_index]
+            self.changed({
+                data[first_category][first_index].script_id: (first_category, data[first_category][first_index]),
+                data[second_category][second_index].script_id: (second_category, data[second_category][second_index]),
+            })
+            return True
+
+    def move(self, script_id, category, index=None):
+        """
+        Moves a script to a position in a category, the end of it if index is None.
+
+        Returns:
+            ScriptRecord: The moved script, None if it no longer exists.
+        """
+        with self.write() as data:
+            current_category, current_index = self.locate(script_id)
+            if current_category is None:
+                return None
+            record = data[current_category].pop(current_index)
+            items = data.setdefault(category, [])
+            items.insert(len(items) if index is None else index, record)
+            self.changed({script_id: (category, record)})
+            return record
+
+    def delete(self, script_ids):
+        """
+        Deletes scripts by id.
+
+        Returns:
+            set: The categories that changed.
+        """
+        script_ids = set(script_ids)
+        changed = set()
+        deleted = {}
+        with self.write() as data:
+            for category, items in data.items():
+                kept = [item for item in items if item.script_id not in script_ids]
+                if len(kept) != len(items):
+                    deleted.update((item.script_id, None) for item in items if item.script_id in script_ids)
+                    items[:] = kept
+                    changed.add(category)
+            if changed:
+                self.changed(deleted)
+        return changed
+
+    def rename_category(self, category, new_category):
+        """
+        Renames a category in place, keeping the order of categories.
+
+        Returns:
+            bool: False if the category doesn't exist or the new name is taken.
+        """
+        with self.write() as data:
+            if category not in data or new_category in data:
+                return False
+            renamed = [(new_category if key == category else key, items) for key, items in data.items()]
+            data.clear()
+            data.update(renamed)
+            self.changed({item.script_id: (new_category, item) for item in data[new_category]})
+            return True
+
+    def remove_category(self, category):
+        with self.write() as data:
+            if category not in data:
+                return False
+            items = data.pop(category)
+            self.changed({item.script_id: None for item in items})
+            return True
+
+
+SCRIPTS = ScriptRepository(SCRIPT_OBJECTS)
+
+
+class StorageLock:
+    """
+    Advisory lock on scripts.json shared by every Scripz instance on the machine.
+
+    Description:
+        - Locks SCRIPTS_LOCK_FILE with msvcrt on Windows and flock everywhere else. Tools that don't take
+        the lock can still write scripts.json, those changes are picked up by the file watcher.
+        - Re-entrant within a process, so a save inside a load doesn't deadlock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        self.depth += 1
+        if self.depth == 1:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.handle = open(self.path, "a+b")
+                if os.name == "nt":
+                    self.handle.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            pass  # LK_LOCK gives up after 10 seconds, keep waiting for the other instance
+                else:
+                    fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self.__exit__(None, None, None)
+                raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth == 0 and self.handle is not None:
+            try:
+                if os.name == "nt":
+                    self.handle.seek(0)
+                    msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+            except OSError:
+                pass
+            self.handle.close()
+            self.handle = None
+        self.thread_lock.release()
+        return False
+
+
+STORAGE_LOCK = StorageLock(SCRIPTS_LOCK_FILE)
+
+
+def scripts_file_stamp():
+    try:
+        stat = os.stat(SCRIPTS_FILE)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+    except FileNotFoundError:
+        return None
+
+
+def read_scripts_file():
+    """
+    Reads scripts.json, resolves blob references and turns each script into a ScriptRecord.
+
+    Scripts without a 'script_id' (saved by older versions) are given one. Each blob is read once,
+    so scripts sharing a body also share the same string in memory. A script whose blob is missing gets an
+    empty body and keeps its 'script_blob' reference, so saving doesn't replace the body with the empty one
+    (see write_scripts_file) and it comes back once the blob file is restored.
+
+    Returns:
+        tuple: (data, bodies, refcounts, missing_ids) - the scripts per category, blob hash -> body of the
+        blobs that could be read, blob hash -> number of references and whether any ids were assigned.
+    """
+    with open(SCRIPTS_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    bodies = {}
+    missing_blobs = set()
+    refcounts = Counter()
+    missing_ids = False
+    for items in data.values():
+        for item in items:
+            if "script_id" not in item:
+                item["script_id"] = new_script_id()
+                missing_ids = True
+            if "script_blob" in item:
+                blob = item["script_blob"]
+                if blob not in bodies and blob not in missing_blobs:
+                    try:
+                        bodies[blob] = read_blob(blob)
+                    except FileNotFoundError:
+                        log_error(f"Blob {blob} of '{item.get('script_name')}' is missing, its reference is kept.")
+                        missing_blobs.add(blob)
+                if blob in bodies:
+                    del item["script_blob"]
+                    item["script_value"] = bodies[blob]
+                else:
+                    item["script_value"] = ""
+                refcounts[blob] += 1
+        items[:] = [ScriptRecord.from_dict(item) for item in items]
+    return data, bodies, refcounts, missing_ids
+
+
+def set_script_base(data):
+    """
+    Remembers the state of scripts.json this instance is in sync with, used as the base of later merges.
+    """
+    global SCRIPT_BASE
+    global SCRIPT_BASE_CATEGORIES
+    global SCRIPTS_FILE_STAMP
+    SCRIPT_BASE = {item["script_id"]: (category, item.copy()) for category, items in data.items() for item in items}
+    SCRIPT_BASE_CATEGORIES = set(data)
+    SCRIPTS_FILE_STAMP = scripts_file_stamp()
+
+
+def load_script_objects():
+    """
+    Loads script objects from the specified JSON file and appends them to SCRIPT_OBJECTS.
+
+    Scripts stored with a 'script_blob' reference get their body from the blob store. Blobs no longer
+    referenced by scripts.json (e.g. left behind by an interrupted save) are removed.
+    The file is read while holding STORAGE_LOCK, so another instance can't be halfway through a save.
+    """
+    global SCRIPT_OBJECTS
+    global SCRIPTS_FILE
+    global BLOB_REFCOUNTS
+    global BLOB_HASHES
+    try:
+        with SCRIPTS.write(), STORAGE_LOCK:
+            data, bodies, refcounts, missing_ids = read_scripts_file()
+            for category, items in data.items():
+                if category not in SCRIPT_OBJECTS:
+                    SCRIPT_OBJECTS[category] = []
+                SCRIPT_OBJECTS[category].extend(items)
+            note_library_change()
+            BLOB_REFCOUNTS = refcounts
+            BLOB_HASHES = {body: blob for blob, body in bodies.items()}
+            set_script_base(data)
+            collect_orphan_blobs()
+            collect_orphan_history()
+            if missing_ids:
+                # Persist the new ids straight away, version history is keyed by them
+                save_script_objects()
+            return SCRIPT_OBJECTS
+    except FileNotFoundError:
+        log_error(f".\\{SCRIPTS_FILE} not found. No script objects loaded.")
+        return {}
+
+
+def merge_script_objects(data):
+    """
+    Merges scripts.json as changed by another instance or tool into SCRIPT_OBJECTS.
+
+    Description:
+        - Three-way merge per script_id against SCRIPT_BASE, the state this instance last read or wrote.
+        - Scripts changed, added or deleted only on disk are taken over from disk.
+        - Scripts changed only in memory keep the change, it is written with the next save.
+        - If a script was changed on both sides the change made here wins and the conflict is logged.
+        - Categories created or emptied and deleted on disk are added or removed the same way.
+
+    Parameters:
+        - data (dict): The scripts per category as read by read_scripts_file.
+
+    Returns:
+        set: The categories whose scripts changed.
+    """
+    changed = set()
+    changes = {}
+    ours = {item.get("script_id"): (category, item) for category, items in SCRIPT_OBJECTS.items() for item in items}
+    theirs = {}
+    for category, items in data.items():
+        if category not in SCRIPT_OBJECTS and category not in SCRIPT_BASE_CATEGORIES:
+            SCRIPT_OBJECTS[category] = []
+            changed.add(category)
+        for item in items:
+            theirs[item["script_id"]] = category
+
+    for category, items in data.items():
+        for item in items:
+            script_id = item["script_id"]
+            base = SCRIPT_BASE.get(script_id)
+            if base == (category, item):
+                continue
+            current = ours.get(script_id)
+            if current is None:
+                if base is not None:
+                    continue  # Deleted here, the deletion is written with the next save
+                changes[script_id] = (category, item.copy())
+                SCRIPT_OBJECTS.setdefault(category, []).append(changes[script_id][1])
+                changed.add(category)
+                continue
+            if current == (category, item):
+                continue
+            if current != base:
+                log_info(f"'{item.get('script_name')}' was changed by another instance as well, keeping this change.")
+                continue
+            current_items = SCRIPT_OBJECTS[current[0]]
+            index = next(i for i, existing in enumerate(current_items) if existing is current[1])
+            changes[script_id] = (category, item.copy())
+            if current[0] == category:
+                current_items[index] = changes[script_id][1]
+            else:
+                current_items.pop(index)
+                SCRIPT_OBJECTS.setdefault(category, []).append(changes[script_id][1])
+            changed.update((current[0], category))
+
+    for script_id, base in SCRIPT_BASE.items():
+        current = ours.get(script_id)
+        if script_id not in theirs and current is not None and current == base:
+            SCRIPT_OBJECTS[current[0]] = [item for item in SCRIPT_OBJECTS[current[0]] if item is not current[1]]
+            changes[script_id] = None
+            changed.add(current[0])
+
+    for category in SCRIPT_BASE_CATEGORIES - set(data):
+        if category in SCRIPT_OBJECTS and not SCRIPT_OBJECTS[category]:
+            SCRIPT_OBJECTS.pop(category)
+            changed.add(category)
+
+    if changed:
+        note_library_change(changes)
+    return changed
+
+
+def sync_scripts_file():
+    """
+    Merges changes other instances or tools made to scripts.json into SCRIPT_OBJECTS.
+
+    The changed categories are added to PENDING_CATEGORIES, STORAGE_LISTENERS are notified by the watcher
+    thread so a merge during a save doesn't re-render the UI in the middle of the handler that saves.
+
+    Returns:
+        set: The categories whose scripts changed, empty if scripts.json is unchanged since it was last read or written.
+    """
+    global BLOB_REFCOUNTS
+    with SCRIPTS.write(), STORAGE_LOCK:
+        if scripts_file_stamp() in (SCRIPTS_FILE_STAMP, None):
+            return set()
+        data, bodies, refcounts, _ = read_scripts_file()
+        changed = merge_script_objects(data)
+        BLOB_REFCOUNTS = refcounts
+        BLOB_HASHES.update({body: blob for blob, body in bodies.items()})
+        set_script_base(data)
+        PENDING_CATEGORIES.update(changed)
+    if changed:
+        log_info(f"Merged external changes to {', '.join(sorted(changed))}.")
+    return changed
+
+
+def notify_storage_listeners():
+    with STORAGE_LOCK.thread_lock:
+        categories = set(PENDING_CATEGORIES)
+        PENDING_CATEGORIES.clear()
+    if categories:
+        for listener in STORAGE_LISTENERS:
+            listener(categories)
+
+
+class ScriptsFileHandler(FileSystemEventHandler):
+    def on_any_event(self, event):
+        paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+        if any(os.path.normcase(path) == os.path.normcase(SCRIPTS_FILE) for path in paths if path):
+            STORAGE_CHANGED.set()
+
+
+def watch_scripts_file():
+    """
+    Starts watching scripts.json for changes made by other instances or tools.
+
+    Description:
+        - Uses watchdog (inotify, ReadDirectoryChangesW, FSEvents) when available and falls back to
+        checking the file every STORAGE_POLL_INTERVAL seconds.
+        - Our own saves update SCRIPTS_FILE_STAMP, so they don't trigger a merge.
+        - Changes are merged by sync_scripts_file on a background thread, which then notifies STORAGE_LISTENERS.
+    """
+    timeout = STORAGE_POLL_INTERVAL
+    if Observer is not None:
+        try:
+            observer = Observer()
+            observer.schedule(ScriptsFileHandler(), DATA_DIR, recursive=False)
+            observer.daemon = True
+            observer.start()
+            timeout = None
+        except OSError as e:
+            log_error(f"Watching {DATA_DIR} failed, checking for changes every {STORAGE_POLL_INTERVAL}s. {e}")
+
+    def run():
+        while True:
+            if STORAGE_CHANGED.wait(timeout):
+                time.sleep(STORAGE_SETTLE_DELAY)
+                STORAGE_CHANGED.clear()
+            try:
+                sync_scripts_file()
+            except (OSError, ValueError) as e:
+                # e.g. a tool still writing the file, the next change or check retries
+                log_error(f"Reading changes to .\\{SCRIPTS_FILE} failed. {e}")
+            notify_storage_listeners()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def collect_orphan_blobs():
+    """
+    Deletes blob files that no script references.
+    """
+    if not os.path.isdir(BLOB_DIR):
+        return
+    for folder in os.listdir(BLOB_DIR):
+        for blob in os.listdir(os.path.join(BLOB_DIR, folder)):
+            if blob not in BLOB_REFCOUNTS:
+                log_info(f"Removing unreferenced blob {blob}.")
+                delete_blob(blob)
+
+
+def save_script_objects():
+    """
+    Writes SCRIPT_OBJECTS to SCRIPTS_FILE, keeping large script bodies in the content addressed blob store.
+
+    Description:
+        - Bodies of at least BLOB_MIN_SIZE characters are stored once under BLOB_DIR keyed by their SHA-256
+        and referenced from scripts.json as 'script_blob', so scripts sharing a body share one file.
+        - Blobs are written before scripts.json, which is replaced atomically.
+        - Reference counts are recomputed on every save and blobs whose count drops to zero are deleted.
+        - A script whose blob was missing on load keeps referencing it as long as its body stays empty.
+        - Saves hold STORAGE_LOCK. If scripts.json was changed by another instance or tool since it was last
+        read, those changes are merged in first instead of being overwritten.
+        - With sync enabled, the changes since the last save are recorded as sync operations.
+    """
+    with SCRIPTS.write(), STORAGE_LOCK:
+        if sync_scripts_file():
+            STORAGE_CHANGED.set()
+        if SYNC_ENABLED:
+            record_sync_ops()
+        write_scripts_file()
+
+
+def write_scripts_file():
+    global BLOB_REFCOUNTS
+    global BLOB_HASHES
+    hashes = {}
+    refcounts = Counter()
+    data = {}
+    for category, items in SCRIPT_OBJECTS.items():
+        stored_items = []
+        for item in items:
+            script_value = item.get("script_value") or ""
+            missing_blob = item.get("script_blob")
+            if missing_blob is not None:
+                if not script_value:
+                    refcounts[missing_blob] += 1
+                    stored_items.append({key: value for key, value in item.items() if key != "script_value"})
+                    continue
+                # A new body was entered, it replaces the missing one
+                item.extra.pop("script_blob")
+                item.extra = item.extra or None
+            if len(script_value) < BLOB_MIN_SIZE:
+                stored_items.append(item.to_dict())
+                continue
+            blob = hashes.get(script_value) or BLOB_HASHES.get(script_value)
+            if blob is None:
+                blob = hashlib.sha256(script_value.encode("utf-8")).hexdigest()
+            hashes[script_value] = blob
+            if blob not in refcounts and blob not in BLOB_REFCOUNTS:
+                write_blob(blob, script_value)
+            refcounts[blob] += 1
+            stored_items.append({
+                ("script_blob" if key == "script_value" else key): (blob if key == "script_value" else value)
+                for key, value in item.items()
+            })
+        data[category] = stored_items
+
+    # Write to a temporary file first so an interrupted save never leaves a truncated scripts.json
+    with open(SCRIPTS_FILE + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(SCRIPTS_FILE + ".tmp", SCRIPTS_FILE)
+
+    for blob in BLOB_REFCOUNTS:
+        if blob not in refcounts:
+            delete_blob(blob)
+    BLOB_REFCOUNTS = refcounts
+    BLOB_HASHES = hashes
+    set_script_base(SCRIPT_OBJECTS)
+
+
+def sync_op_key(op):
+    """
+    Total order of sync operations used to resolve conflicts: the sum of the vector clock, then the node id.
+
+    An operation that causally follows another always has a larger clock sum, so it always wins. Concurrent
+    operations are ordered the same way on every node, so all nodes converge on the same winner.
+    """
+    return sum(op["clock"].values()), op["node"], op["counter"]
+
+
+def sync_op_dominates(op, other):
+    return all(op["clock"].get(node, 0) >= counter for node, counter in other["clock"].items())
+
+
+def append_sync_ops(ops):
+    SYNC_OPS.extend(ops)
+    with open(SYNC_LOG_FILE, "a", encoding="utf-8") as f:
+        for op in ops:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+
+
+def load_sync_state():
+    """
+    Rebuilds SYNC_CLOCK and SYNC_VERSIONS from SYNC_LOG_FILE.
+
+    Operations superseded by a later one for the same script are never needed again, peers that missed them
+    receive the winning operation instead. If they make up most of the log it is rewritten without them.
+    """
+    global SYNC_OPS
+    SYNC_CLOCK.clear()
+    SYNC_VERSIONS.clear()
+    ops = []
+    try:
+        with open(SYNC_LOG_FILE, "r", encoding="utf-8") as f:
+            ops = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        pass
+    for op in ops:
+        SYNC_CLOCK[op["node"]] = max(SYNC_CLOCK.get(op["node"], 0), op["counter"])
+        current = SYNC_VERSIONS.get(op["script_id"])
+        if current is None or sync_op_key(op) > sync_op_key(current):
+            SYNC_VERSIONS[op["script_id"]] = op
+    SYNC_OPS = ops
+    if len(ops) > 2 * len(SYNC_VERSIONS) + 100:
+        SYNC_OPS = sorted(SYNC_VERSIONS.values(), key=lambda op: (op["node"], op["counter"]))
+        with open(SYNC_LOG_FILE + ".tmp", "w", encoding="utf-8") as f:
+            for op in SYNC_OPS:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+        os.replace(SYNC_LOG_FILE + ".tmp", SYNC_LOG_FILE)
+        log_info(f"Compacted the sync log from {len(ops)} to {len(SYNC_OPS)} operations.")
+
+
+def sync_position(script_id, category):
+    """
+    Returns the position the current sync operation of a script gives it in 'category', or None.
+    """
+    op = SYNC_VERSIONS.get(script_id)
+    if op is None or op["op"] == "delete" or op["category"] != category:
+        return None
+    return op.get("position")
+
+
+def sync_positions(category, items):
+    """
+    Returns positions for the scripts of a category that increase along the list.
+
+    Description:
+        - Scripts keep the position of their current sync operation where the list order agrees with it. The
+        longest run of scripts whose positions already increase is kept, everything else is a script that
+        was added, moved in from another category or dragged to a new place.
+        - Those get new positions spread between the kept neighbours, so a reorder changes the positions of
+        the moved scripts only.
+        - If the positions between two neighbours run out of float precision, the category is renumbered.
+    """
+    current = [sync_position(item.script_id, category) for item in items]
+
+    # Longest strictly increasing run of known positions (patience sorting)
+    tails = []  # Index in 'current' of the smallest last position of a run of each length
+    tail_positions = []
+    previous = [None] * len(current)
+    for index, position in enumerate(current):
+        if position is None:
+            continue
+        length = bisect_left(tail_positions, position)
+        previous[index] = tails[length - 1] if length else None
+        if length == len(tails):
+            tails.append(index)
+            tail_positions.append(position)
+        else:
+            tails[length] = index
+            tail_positions[length] = position
+    kept = set()
+    index = tails[-1] if tails else None
+    while index is not None:
+        kept.add(index)
+        index = previous[index]
+
+    positions = list(current)
+    index = 0
+    while index < len(items):
+        if index in kept:
+            index += 1
+            continue
+        end = index
+        while end < len(items) and end not in kept:
+            end += 1
+        low = positions[index - 1] if index else None
+        high = positions[end] if end < len(items) else None
+        count = end - index
+        for offset in range(1, count + 1):
+            if low is None and high is None:
+                position = float(offset)
+            elif high is None:
+                position = low + offset
+            elif low is None:
+                position = high - (count + 1 - offset)
+            else:
+                position = low + (high - low) * offset / (count + 1)
+            if (index + offset > 1 and position <= positions[index + offset - 2]) or \
+                    (high is not None and position >= high):
+                return [float(offset) for offset in range(1, len(items) + 1)]
+            positions[index + offset - 1] = position
+        index = end
+    return positions
+
+
+def sync_script_matches(record, script):
+    """
+    Compares a script with the fields of a sync operation without building a ScriptRecord for them.
+    """
+    for field, value in record.items():
+        expected = script.get(field)
+        if field == "script_tags":
+            expected = tuple(expected) if expected else ()
+        if value != expected:
+            return False
+    return len(script) == len(record.keys())
+
+
+def insert_sync_script(items, script, position):
+    """
+    Inserts a script received from a peer into its category at 'position', scripts without one go last.
+    """
+    key = (math.inf if position is None else position, script.script_id)
+    for index, item in enumerate(items):
+        item_position = SYNC_VERSIONS[item.script_id].get("position") if item.script_id in SYNC_VERSIONS else None
+        if (math.inf if item_position is None else item_position, item.script_id) > key:
+            items.insert(index, script)
+            return
+    items.append(script)
+
+
+def record_sync_ops():
+    """
+    Records the difference between SCRIPT_OBJECTS and SYNC_VERSIONS as sync operations made by this node.
+
+    Description:
+        - SYNC_VERSIONS holds the operation that set each script's current state, so changes made in this
+        instance, merged in from scripts.json or made while sync was off are all found the same way.
+        - Add, move and edit operations carry the script's category, fields and position. Every node orders
+        a category by position (see sync_positions), so reorders sync like any other change.
+
+    Returns:
+        list: The new operations.
+    """
+    ops = []
+
+    def new_op(op_type, script_id, category=None, script=None, position=None):
+        SYNC_CLOCK[SYNC_NODE_ID] = SYNC_CLOCK.get(SYNC_NODE_ID, 0) + 1
+        op = {
+            "node": SYNC_NODE_ID,
+            "counter": SYNC_CLOCK[SYNC_NODE_ID],
+            "clock": dict(SYNC_CLOCK),
+            "op": op_type,
+            "script_id": script_id,
+        }
+        if script is not None:
+            op["category"] = category
+            op["position"] = position
+            op["script"] = dict(script)
+        SYNC_VERSIONS[script_id] = op
+        ops.append(op)
+
+    script_ids = set()
+    for category, items in SCRIPT_OBJECTS.items():
+        for item, position in zip(items, sync_positions(category, items)):
+            script_id = item["script_id"]
+            script_ids.add(script_id)
+            previous = SYNC_VERSIONS.get(script_id)
+            if previous is None or previous["op"] == "delete":
+                new_op("add", script_id, category, item, position)
+            elif previous["category"] != category or previous.get("position") != position:
+                new_op("move", script_id, category, item, position)
+            elif not sync_script_matches(item, previous["script"]):
+                new_op("edit", script_id, category, item, position)
+    for script_id, op in list(SYNC_VERSIONS.items()):
+        if op["op"] != "delete" and script_id not in script_ids:
+            new_op("delete", script_id)
+    if ops:
+        append_sync_ops(ops)
+        SYNC_PUSH.set()
+    return ops
+
+
+def apply_sync_ops(ops):
+    """
+    Applies sync operations received from a peer to SCRIPT_OBJECTS and saves the result.
+
+    Description:
+        - Operations already covered by SYNC_CLOCK are skipped, so receiving an operation twice is harmless.
+        - Each script takes the state of the operation that is largest by sync_op_key. Concurrent changes
+        to the same script are logged, the losing change is dropped on every node alike.
+        - Scripts are placed in their category by the operation's position (see insert_sync_script).
+        - Categories emptied by remote deletes or moves are removed.
+        - Changed categories are re-rendered through STORAGE_LISTENERS.
+
+    Parameters:
+        - ops (list): The operations as sent by the peer.
+    """
+    with SCRIPTS.write(), STORAGE_LOCK:
+        if sync_scripts_file():
+            STORAGE_CHANGED.set()
+        record_sync_ops()
+        ours = {item["script_id"]: (category, item) for category, items in SCRIPT_OBJECTS.items() for item in items}
+        applied = []
+        changed = set()
+        changes = {}
+        emptied = set()
+        for op in sorted(ops, key=lambda op: (op["node"], op["counter"])):
+            if op["counter"] <= SYNC_CLOCK.get(op["node"], 0):
+                continue
+            SYNC_CLOCK[op["node"]] = op["counter"]
+            applied.append(op)
+            script_id = op["script_id"]
+            current = SYNC_VERSIONS.get(script_id)
+            if current is not None and sync_op_key(op) < sync_op_key(current):
+                if not sync_op_dominates(current, op):
+                    log_info(f"Concurrent changes to script {script_id}, keeping the change from {current['node']}.")
+                continue
+            if current is not None and not sync_op_dominates(op, current):
+                log_info(f"Concurrent changes to script {script_id}, keeping the change from {op['node']}.")
+            SYNC_VERSIONS[script_id] = op
+            existing = ours.pop(script_id, None)
+            if existing is not None:
+                items = SCRIPT_OBJECTS[existing[0]]
+                items.pop(next(i for i, item in enumerate(items) if item is existing[1]))
+                changes[script_id] = None
+                changed.add(existing[0])
+                if not items:
+                    emptied.add(existing[0])
+            if op["op"] != "delete":
+                script = ScriptRecord.from_dict(op["script"])
+                insert_sync_script(SCRIPT_OBJECTS.setdefault(op["category"], []), script, op.get("position"))
+                ours[script_id] = changes[script_id] = (op["category"], script)
+                changed.add(op["category"])
+                if existing is not None and existing[0] == op["category"] and existing[1] != script:
+                    record_script_version(script_id, existing[1], script)
+        for category in emptied:
+            if not SCRIPT_OBJECTS.get(category):
+                SCRIPT_OBJECTS.pop(category, None)
+        if not applied:
+            return
+        append_sync_ops(applied)
+        if changed:
+            note_library_change(changes)
+            write_scripts_file()
+            PENDING_CATEGORIES.update(changed)
+            STORAGE_CHANGED.set()
+    log_info(f"Applied {len(applied)} sync operations from peers.")
+
+
+def sync_ops_since(clock):
+    return [op for op in SYNC_OPS if op["counter"] > clock.get(op["node"], 0)]
+
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    """
+    Sync server endpoint: POST /sync with {"clock": ..., "ops": [...]}.
+
+    The server applies the client's operations and answers with its own clock and every operation the
+    client's clock doesn't cover yet, so one round trip exchanges changes both ways.
+    Requests without a valid Content-Length or larger than SYNC_MAX_REQUEST_SIZE are refused unread.
+    """
+
+    def do_POST(self):
+        if self.path != "/sync":
+            self.send_error(404)
+            return
+        token = SETTINGS.get("SYNC_TOKEN")
+        if token and not hmac.compare_digest(self.headers.get("X-Scripz-Token", "").encode(), token.encode()):
+            self.send_error(403)
+            return
+        length = self.headers.get("Content-Length", "")
+        if not length.isdigit():
+            self.send_error(411)
+            return
+        if int(length) > SYNC_MAX_REQUEST_SIZE:
+            self.send_error(413)
+            return
+        try:
+            request = json.loads(self.rfile.read(int(length)))
+            apply_sync_ops(request.get("ops", []))
+            with STORAGE_LOCK:
+                response = {"clock": dict(SYNC_CLOCK), "ops": sync_ops_since(request.get("clock", {}))}
+        except (ValueError, KeyError, TypeError) as e:
+            log_error(f"Invalid sync request from {self.client_address[0]}. {e}")
+            self.send_error(400)
+            return
+        body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Requests arrive every few seconds, don't flood the log
+
+
+def sync_request():
+    with STORAGE_LOCK:
+        return {"clock": dict(SYNC_CLOCK), "ops": sync_ops_since(SYNC_PEER_CLOCK)}
+
+
+async def sync_with_server(url):
+    """
+    Runs one sync round trip as a client: sends the operations the server lacks and applies the ones it returns.
+    """
+    global SYNC_PEER_CLOCK
+    request = await asyncio.to_thread(sync_request)
+    response = await http_client().post(
+        f"{url.rstrip('/')}/sync",
+        json=request,
+        headers={"X-Scripz-Token": SETTINGS.get("SYNC_TOKEN", "")},
+        timeout=SYNC_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = response.json()
+    # Applying takes the library and file locks and saves, so it runs on a worker thread
+    await asyncio.to_thread(apply_sync_ops, data["ops"])
+    SYNC_PEER_CLOCK = data["clock"]
+
+
+def load_sync_library():
+    """
+    Loads the operation log and records the scripts changed while sync was off.
+    """
+    global SYNC_ENABLED
+    with SCRIPTS.write(), STORAGE_LOCK:
+        load_sync_state()
+        record_sync_ops()
+        SYNC_ENABLED = True
+
+
+def start_sync_server(host, port):
+    """
+    Serves the library to sync clients on host:port from a background thread.
+
+    A server reachable from other machines could be written to by anyone on the network, so binding
+    to anything but a loopback address requires SYNC_TOKEN.
+
+    Returns:
+        ThreadingHTTPServer: The running server, or None if it couldn't be started.
+    """
+    try:
+        loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback and not SETTINGS.get("SYNC_TOKEN"):
+        log_error(f"Not starting the sync server on {host}, set SYNC_TOKEN to serve beyond this machine.")
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), SyncRequestHandler)
+    except OSError as e:
+        log_error(f"Starting the sync server on {host}:{port} failed. {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log_info(f"Sync server listening on {host}:{port}.")
+    return server
+
+
+async def start_sync():
+    """
+    Starts sync mode as configured in profile.env.
+
+    Description:
+        - SYNC_MODE=server serves the library on SYNC_HOST:SYNC_PORT (default 127.0.0.1:8765).
+        - SYNC_MODE=client syncs with the server at SYNC_URL, e.g. http://192.168.1.10:8765.
+        - SYNC_TOKEN, if set, must match on both sides. It is required for a SYNC_HOST other than loopback.
+        - Changes are exchanged as add/edit/move/delete operations per script_id stamped with a vector clock
+        and stored in SYNC_LOG_FILE, never as whole files.
+        - Scripts changed while sync was off are recorded as operations when it starts.
+        - The server answers on its own threads, a client keeps running as a task on the event loop.
+    """
+    global SYNC_NODE_ID
+    mode = SETTINGS.get("SYNC_MODE", "").lower()
+    if mode not in ("server", "client"):
+        return
+    SYNC_NODE_ID = SETTINGS.get("SYNC_NODE_ID") or new_script_id()
+    if not SETTINGS.get("SYNC_NODE_ID"):
+        SETTINGS["SYNC_NODE_ID"] = SYNC_NODE_ID
+        await asyncio.to_thread(update_env_file, "SYNC_NODE_ID", SYNC_NODE_ID)
+    await asyncio.to_thread(load_sync_library)
+
+    if mode == "server":
+        start_sync_server(SETTINGS.get("SYNC_HOST") or "127.0.0.1", int(SETTINGS.get("SYNC_PORT") or SYNC_PORT))
+        return
+
+    url = SETTINGS.get("SYNC_URL") or f"http://127.0.0.1:{SYNC_PORT}"
+    connected = None
+    while True:
+        try:
+            await sync_with_server(url)
+            if connected is not True:
+                log_info(f"Syncing with {url}.")
+            connected = True
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            if connected is not False:
+                log_error(f"Syncing with {url} failed, retrying every {SYNC_INTERVAL}s. {e}")
+            connected = False
+        # SYNC_PUSH is set from whichever thread saved, so wait for it on a worker thread
+        await asyncio.to_thread(SYNC_PUSH.wait, SYNC_INTERVAL)
+        SYNC_PUSH.clear()
+
+
+def history_path(script_id):
+    return os.path.join(HISTORY_DIR, f"{script_id}.jsonl")
+
+
+def encode_delta(previous, current):
+    """
+    Encodes 'current' as a line based delta against 'previous'.
+
+    The delta is a list where [start, end] copies lines start:end of 'previous' and a string is inserted as is.
+    """
+    previous_lines = previous.splitlines(keepends=True)
+    current_lines = current.splitlines(keepends=True)
+    delta = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, previous_lines, current_lines).get_opcodes():
+        if tag == "equal":
+            delta.append([i1, i2])
+        elif j2 > j1:
+            delta.append("".join(current_lines[j1:j2]))
+    return delta
+
+
+def apply_delta(previous, delta):
+    previous_lines = previous.splitlines(keepends=True)
+    return "".join("".join(previous_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in delta)
+
+
+def read_history_entries(script_id):
+    try:
+        with open(history_path(script_id), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def load_script_history(script_id):
+    """
+    Loads the saved versions of a script, oldest first.
+
+    History is only read from disk when it is asked for, e.g. when the history view is opened.
+
+    Returns:
+        list: dicts with 'timestamp', 'script_type', 'script_name', 'script_description', 'script_tags'
+        (missing in versions saved before tags existed) and 'script_value'.
+    """
+    versions = []
+    script_value = ""
+    for entry in read_history_entries(script_id):
+        if "snapshot" in entry:
+            script_value = entry.pop("snapshot")
+        else:
+            script_value = apply_delta(script_value, entry.pop("delta"))
+        entry["script_value"] = script_value
+        versions.append(entry)
+    return versions
+
+
+def record_script_version(script_id, previous, current):
+    """
+    Appends a new version to a script's history.
+
+    Description:
+        - History lives in HISTORY_DIR/<script_id>.jsonl, one version per line.
+        - The first entry holds the version before the first edit.
+        - Versions are stored as line deltas against the previous version, with a full snapshot every
+        HISTORY_SNAPSHOT_INTERVAL versions so no version is expensive to rebuild.
+        - Once the file holds more than HISTORY_MAX_VERSIONS versions the oldest are dropped and the first
+        remaining version is rewritten as a snapshot.
+
+    Parameters:
+        - script_id (str): The id of the script.
+        - previous (ScriptRecord): The script before the edit.
+        - current (ScriptRecord): The script after the edit.
+    """
+    def history_entry(script_object, body):
+        return {
+            "timestamp": time.time(),
+            "script_type": script_object.get("script_type"),
+            "script_name": script_object.get("script_name"),
+            "script_description": script_object.get("script_description"),
+            "script_tags": list(script_object.get("script_tags") or ()),
+            **body,
+        }
+
+    entries = read_history_entries(script_id)
+    new_entries = []
+    if not entries:
+        new_entries.append(history_entry(previous, {"snapshot": previous.get("script_value") or ""}))
+    since_snapshot = next((i for i, entry in enumerate(reversed(entries)) if "snapshot" in entry), 0) + 1
+    if since_snapshot >= HISTORY_SNAPSHOT_INTERVAL:
+        new_entries.append(history_entry(current, {"snapshot": current.get("script_value") or ""}))
+    else:
+        new_entries.append(history_entry(current, {
+            "delta": encode_delta(previous.get("script_value") or "", current.get("script_value") or "")
+        }))
+
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    if len(entries) + len(new_entries) <= HISTORY_MAX_VERSIONS:
+        with open(history_path(script_id), "a", encoding="utf-8") as f:
+            for entry in new_entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return
+
+    # Retention: drop the oldest versions, the first one kept becomes a snapshot
+    entries.extend(new_entries)
+    first_kept = len(entries) - HISTORY_MAX_VERSIONS
+    script_value = ""
+    for entry in entries[:first_kept + 1]:
+        script_value = entry["snapshot"] if "snapshot" in entry else apply_delta(script_value, entry["delta"])
+    entries[first_kept].pop("delta", None)
+    entries[first_kept]["snapshot"] = script_value
+    with open(history_path(script_id) + ".tmp", "w", encoding="utf-8") as f:
+        for entry in entries[first_kept:]:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(history_path(script_id) + ".tmp", history_path(script_id))
+
+
+def collect_orphan_history():
+    """
+    Deletes the history of scripts that no longer exist.
+    """
+    if not os.path.isdir(HISTORY_DIR):
+        return
+    script_ids = {item.get("script_id") for items in SCRIPT_OBJECTS.values() for item in items}
+    for file_name in os.listdir(HISTORY_DIR):
+        if os.path.splitext(file_name)[0] not in script_ids:
+            os.remove(os.path.join(HISTORY_DIR, file_name))
+
+
+def script_index(script_objects, cursor):
+    index, script_id = cursor
+    if index < len(script_objects) and script_objects[index].get("script_id") == script_id:
+        return index
+    for index, script_object in enumerate(script_objects):
+        if script_object.get("script_id") == script_id:
+            return index
+    return None
+
+
+def iter_category(category, cursor=None, reverse=False, match=None):
+    """
+    Iterates over the scripts of a category, starting after (or before, with reverse) a cursor.
+
+    Description:
+        - A cursor is the (index, script_id) of a script as yielded by this function. The index is only a hint,
+        if scripts were added or removed since, the script is looked up by its id so paging carries on
+        from the right place. If the script itself was removed, paging carries on from where it was.
+        - Nothing is copied, so starting at any cursor costs the same no matter how large the category is.
+
+    Parameters:
+        - category (str): The category to iterate over.
+        - cursor (tuple): Where to start, None for the start (or the end, with reverse) of the category.
+        - reverse (bool): Iterate towards the start of the category.
+        - match (callable): Optional filter, called with each script object.
+
+    Yields:
+        tuple: (cursor, script_object)
+    """
+    script_objects = SCRIPT_OBJECTS.get(category, [])
+    step = -1 if reverse else 1
+    if cursor is None:
+        index = len(script_objects) if reverse else -1
+    else:
+        index = script_index(script_objects, cursor)
+        if index is None:
+            index = min(cursor[0], len(script_objects)) - (0 if reverse else 1)
+    index += step
+    while 0 <= index < len(script_objects):
+        script_object = script_objects[index]
+        if match is None or match(script_object):
+            yield (index, script_object.get("script_id")), script_object
+        index += step
+
+
+def search_script_objects(query):
+    """
+    Searches every category in SCRIPT_OBJECTS for scripts whose name, type or value contain the query.
+
+    Parameters:
+        - query (str): The text to search for (case-insensitive).
+
+    Yields:
+        tuple: (category, script_object) for each match, in category order.
+    """
+    query = query.casefold()
+    for category, script_objects in SCRIPTS.snapshot():
+        for script_object in script_objects:
+            if (
+                    query in (script_object.get("script_name") or "").casefold()
+                    or query in (script_object.get("script_type") or "").casefold()
+                    or query in (script_object.get("script_value") or "").casefold()
+            ):
+                yield category, script_object
+
+
+def tokenize_smart_query(query):
+    """
+    Splits a smart category query into ('text', value) for quoted values, ('op', '=', '!=', '(' or ')')
+    and ('word', value) for everything else.
+    """
+    query = query.strip()
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = SMART_QUERY_TOKEN.match(query, position)
+        if match is None:
+            raise ValueError(f"Can't read the query from '{query[position:].strip()}'")
+        quoted = match.group(1) if match.group(1) is not None else match.group(2)
+        if quoted is not None:
+            tokens.append(("text", quoted))
+        elif match.group(3):
+            tokens.append(("op", match.group(3)))
+        else:
+            tokens.append(("word", match.group(4)))
+        position = match.end()
+    return tokens
+
+
+def parse_smart_query(query):
+    """
+    Compiles the query of a smart category into a predicate.
+
+    Description:
+        - A condition is 'field operator value', e.g. 'type = Powershell' or 'body contains "Get-AD"'.
+        - Fields are the keys of SMART_QUERY_FIELDS, operators are =, !=, contains, startswith and endswith.
+        Comparisons ignore case, 'tag = x' matches scripts tagged x.
+        - Conditions are combined with 'and', 'or' and 'not' ('and' binds tighter than 'or') and can be grouped
+        with parentheses. Values containing spaces or keywords need quotes.
+
+    Parameters:
+        - query (str): The query.
+
+    Returns:
+        callable: predicate(category, script_object) -> bool
+
+    Raises:
+        ValueError: If the query can't be parsed, with a message meant for the user.
+    """
+    tokens = tokenize_smart_query(query)
+    if not tokens:
+        raise ValueError("The query is empty.")
+    position = 0
+
+    def keyword(*words):
+        return position < len(tokens) and tokens[position][0] == "word" and tokens[position][1].casefold() in words
+
+    def take(expected):
+        nonlocal position
+        if position >= len(tokens):
+            raise ValueError(f"Expected {expected} at the end of the query.")
+        position += 1
+        return tokens[position - 1]
+
+    def any_of():
+        nonlocal position
+        parts = [all_of()]
+        while keyword("or"):
+            position += 1
+            parts.append(all_of())
+        return parts[0] if len(parts) == 1 else lambda category, script: any(part(category, script) for part in parts)
+
+    def all_of():
+        nonlocal position
+        parts = [negation()]
+        while keyword("and"):
+            position += 1
+            parts.append(negation())
+        return parts[0] if len(parts) == 1 else lambda category, script: all(part(category, script) for part in parts)
+
+    def negation():
+        nonlocal position
+        if keyword("not"):
+            position += 1
+            part = negation()
+            return lambda category, script: not part(category, script)
+        if position < len(tokens) and tokens[position] == ("op", "("):
+            position += 1
+            part = any_of()
+            if take("')'") != ("op", ")"):
+                raise ValueError("Missing ')'.")
+            return part
+        return condition()
+
+    def condition():
+        kind, field = take("a field")
+        if kind != "word" or field.casefold() not in SMART_QUERY_FIELDS:
+            raise ValueError(f"Unknown field '{field}', use one of: {', '.join(SMART_QUERY_FIELDS)}.")
+        attribute = SMART_QUERY_FIELDS[field.casefold()]
+        kind, operator = take(f"an operator after '{field}'")
+        operator = operator.casefold()
+        if kind == "text" or operator not in SMART_QUERY_OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}', use one of: {', '.join(SMART_QUERY_OPERATORS)}.")
+        kind, value = take(f"a value after '{field} {operator}'")
+        if kind == "op":
+            raise ValueError(f"Expected a value after '{field} {operator}'.")
+        value = value.casefold()
+        if attribute == "script_tags":
+            tag = (parse_tags(value) or ("",))[0]
+            tests = {
+                "=": lambda tags: tag in tags,
+                "!=": lambda tags: tag not in tags,
+                "contains": lambda tags: any(tag in item for item in tags),
+                "startswith": lambda tags: any(item.startswith(tag) for item in tags),
+                "endswith": lambda tags: any(item.endswith(tag) for item in tags),
+            }
+            test = tests[operator]
+            return lambda category, script: test(script.get("script_tags") or ())
+        tests = {
+            "=": lambda text: text == value,
+            "!=": lambda text: text != value,
+            "contains": lambda text: value in text,
+            "startswith": lambda text: text.startswith(value),
+            "endswith": lambda text: text.endswith(value),
+        }
+        test = tests[operator]
+        if attribute is None:
+            return lambda category, script: test((category or "").casefold())
+        return lambda category, script: test((script.get(attribute) or "").casefold())
+
+    predicate = any_of()
+    if position < len(tokens):
+        raise ValueError(f"Unexpected '{tokens[position][1]}', join conditions with 'and' or 'or'.")
+    return predicate
+
+
+def compile_search_pattern(pattern):
+    """
+    Compiles a regex search pattern (case-insensitive, ^ and $ match at line breaks), cached in REGEX_CACHE.
+
+    Raises:
+        re.error: If the pattern is invalid.
+    """
+    regex = REGEX_CACHE.get(pattern)
+    if regex is None:
+        regex = re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+        REGEX_CACHE[pattern] = regex
+        if len(REGEX_CACHE) > REGEX_CACHE_SIZE:
+            REGEX_CACHE.popitem(last=False)
+    else:
+        REGEX_CACHE.move_to_end(pattern)
+    return regex
+
+
+def regex_search_shard(pattern, changes, reset):
+    """
+    Runs in a regex search worker process: applies the changes to its shard of the library and searches it.
+
+    Parameters:
+        - pattern (str): The regex to search for.
+        - changes (dict): script_id -> script_value, or None if the script was deleted.
+        - reset (bool): The changes are the whole shard, drop what the worker held before.
+
+    Returns:
+        list: (script_id, [(start, end), ...]) for every script whose body matches, with up to REGEX_MAX_SPANS
+        offsets of non-empty matches.
+    """
+    if reset:
+        REGEX_SHARD.clear()
+    for script_id, script_value in changes.items():
+        if script_value is None:
+            REGEX_SHARD.pop(script_id, None)
+        else:
+            REGEX_SHARD[script_id] = script_value
+    regex = compile_search_pattern(pattern)
+    results = []
+    for script_id, script_value in REGEX_SHARD.items():
+        spans = [
+            match.span() for match in islice(
+                (match for match in regex.finditer(script_value) if match.end() > match.start()), REGEX_MAX_SPANS
+            )
+        ]
+        if spans:
+            results.append((script_id, spans))
+    return results
+
+
+def regex_worker_ready():
+    return True
+
+
+def match_preview(script_value, spans):
+    """
+    Builds the preview of a regex hit: the line of the first match with every match on it highlighted.
+
+    Parameters:
+        - script_value (str): The script body the offsets refer to.
+        - spans (list): (start, end) offsets of the matches.
+
+    Returns:
+        list: ft.TextSpan parts for an ft.Text.
+    """
+    start = max(script_value.rfind("\n", 0, spans[0][0]) + 1, spans[0][0] - REGEX_PREVIEW_CONTEXT)
+    end = script_value.find("\n", spans[0][1])
+    end = len(script_value) if end == -1 else end
+    highlight = ft.TextStyle(bgcolor=ft.colors.AMBER_200, color=ft.colors.BLACK, weight=ft.FontWeight.BOLD)
+    parts = [ft.TextSpan("...")] if start > 0 and script_value[start - 1] != "\n" else []
+    position = start
+    for match_start, match_end in spans:
+        if match_start < position or match_start >= end:
+            continue
+        parts.append(ft.TextSpan(script_value[position:match_start]))
+        parts.append(ft.TextSpan(script_value[match_start:match_end], style=highlight))
+        position = match_end
+    parts.append(ft.TextSpan(script_value[position:max(end, position)]))
+    return parts
+
+
+def semantic_features(text, weight, buckets, weights):
+    """
+    Adds the hashed features of a text to buckets and weights.
+
+    Description:
+        - Words are split at case changes, digits and punctuation, so 'Disable-ADAccount' gives
+        'disable', 'ad' and 'account', the words a description of it would use.
+        - Besides the word itself, every word of 4 or more letters adds its letter trigrams at a third of the
+        weight, so 'users' and 'disabled' still land close to 'user' and 'disable'.
+    """
+    for token in SEMANTIC_TOKEN.findall(text):
+        word = token.lower()
+        if len(word) < 2 or word in SEMANTIC_STOP_WORDS:
+            continue
+        features = SEMANTIC_BUCKETS.get(word)
+        if features is None:
+            trigrams = [
+                zlib.crc32(f"#{word[i:i + 3]}".encode()) % SEMANTIC_DIMENSIONS
+                for i in range(len(word) - 2)
+            ] if len(word) >= 4 else []
+            features = (zlib.crc32(word.encode()) % SEMANTIC_DIMENSIONS, trigrams)
+            if len(SEMANTIC_BUCKETS) > 1000000:
+                SEMANTIC_BUCKETS.clear()
+            SEMANTIC_BUCKETS[word] = features
+        buckets.append(features[0])
+        weights.append(weight)
+        buckets.extend(features[1])
+        weights.extend([weight / 3] * len(features[1]))
+
+
+def semantic_vector(fields):
+    """
+    Computes the term frequency vector of a script or query (log of 1 + the weighted count per bucket, which
+    stays positive for the fractional weights of trigrams).
+
+    Parameters:
+        - fields (iterable): (text, weight) pairs.
+
+    Returns:
+        numpy.ndarray: float32 vector of SEMANTIC_DIMENSIONS.
+    """
+    buckets = []
+    weights = []
+    for text, weight in fields:
+        semantic_features((text or "")[:SEMANTIC_MAX_CHARS], weight, buckets, weights)
+    counts = np.bincount(buckets, weights=weights, minlength=SEMANTIC_DIMENSIONS)
+    vector = np.zeros(SEMANTIC_DIMENSIONS, dtype=np.float32)
+    present = counts > 0
+    vector[present] = np.log1p(counts[present])
+    return vector
+
+
+def semantic_text_hash(script_object):
+    digest = hashlib.blake2b(digest_size=8)
+    for field, _ in SEMANTIC_FIELD_WEIGHTS:
+        digest.update((script_object.get(field) or "")[:SEMANTIC_MAX_CHARS].encode("utf-8", "replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def code_tokens(text):
+    """
+    Counts the features the language classifier looks at in a text.
+
+    Description:
+        - Words (lowercased, Verb-Noun kept together so Get-ADUser is one token) and runs of up to 3
+        punctuation characters ('$(', '=>', '<?', '::').
+        - The first token of every line again with a '^' in front, as lines starting with 'def', '-' or
+        '#include' say a lot about the language.
+        - '<CAPS>' for every all-caps word, to tell SQL keywords apart.
+
+    Returns:
+        Counter: feature -> count
+    """
+    tokens = Counter()
+    for line in text[:CLASSIFIER_MAX_CHARS].splitlines():
+        first = True
+        for token in CODE_TOKEN.findall(line):
+            if len(token) > 2 and token.isupper():
+                tokens["<CAPS>"] += 1
+            token = token.lower()
+            tokens[token] += 1
+            if first:
+                tokens["^" + token] += 1
+                first = False
+    return tokens
+
+
+def read_smart_categories():
+    """
+    Returns the saved smart categories as a list of {'name': ..., 'query': ...} dicts.
+    """
+    try:
+        with open(SMART_CATEGORIES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def write_smart_categories(smart_categories):
+    try:
+        with open(SMART_CATEGORIES_FILE, "w", encoding="utf-8") as f:
+            json.dump([{"name": smart.name, "query": smart.query} for smart in smart_categories], f, indent=4)
+    except OSError as e:
+        log_error(e)
+
+
+def write_json_file(category="", script_type="", script_name="", script_value="", description="", update=False,
+                    tags=()):
+    """
+    Writes data to a JSON file.
+
+    Description:
+        - This static method is used to write data to a JSON file.
+        - It takes in various parameters such as category, script_type, script_name, script_value, description, and update.
+        - If update is True, it updates the JSON file with the SCRIPT_OBJECTS data.
+        - Otherwise, it adds the new script (or only the category, if script_name is empty) through SCRIPTS,
+        which writes the updated data back to the JSON file.
+        - Either way the file is written by save_script_objects, which keeps large script bodies in the blob store.
+
+    Parameters:
+        - category (str): The category of the script.
+        - script_type (str): The type of the script.
+        - script_name (str): The name of the script.
+        - script_value (str): The value of the script.
+        - description (str): The description of the script.
+        - update (bool): Flag indicating whether to update the JSON file.
+        - tags (str | iterable): The tags of the script (see parse_tags).
+
+    Returns:
+        ScriptRecord: The added script, None if nothing was added.
+    """
+    if update:
+        try:
+            with SCRIPTS.write():
+                SCRIPTS.changed()
+        except FileNotFoundError:
+            log_error(f".\\{SCRIPTS_FILE} not found. No script objects updated.")
+        return None
+
+    if script_name == "":
+        SCRIPTS.add(category)
+        return None
+    return SCRIPTS.add(
+        category, ScriptRecord(new_script_id(), script_type, script_name, script_value, description, tags)
+    )
+
+
+def parse_script_file(category, file_name, read_file):
+    """
+    Turns an imported file into a script object.
+
+    Description:
+        - The script type is taken from the file extension (see IMPORT_EXTENSIONS).
+        - The script name is the file name without its extension.
+        - A leading comment line (e.g. '# ...', '-- ...', ':: ...') becomes the description. The comment marker
+        must be followed by a space, so directives like '#Requires', '#include' or '#region' aren't taken for one.
+
+    Parameters:
+        - category (str): The category the script is imported into.
+        - file_name (str): The file name, used for the name and type.
+        - read_file (callable): Returns the file contents as bytes.
+
+    Returns:
+        tuple: (category, script_object), or None if the file can't be imported.
+    """
+    stem, extension = os.path.splitext(file_name)
+    script_type = IMPORT_EXTENSIONS.get(extension.lower())
+    if script_type not in DEFAULT_TYPES:
+        return None
+    try:
+        script_value = read_file().decode("utf-8-sig")
+    except (OSError, UnicodeDecodeError, zipfile.BadZipFile) as e:
+        log_error(f"Skipped '{file_name}' during import: {e}")
+        return None
+
+    description = ""
+    first_line = next((line.strip() for line in script_value.splitlines() if line.strip()), "")
+    if not first_line.startswith("#!"):
+        for marker in ("<#", "#", "--", "//", "::", "REM ", "'"):
+            if first_line.upper().startswith(marker):
+                comment = first_line[len(marker):]
+                if marker == "<#" or not comment[:1].isalnum():
+                    description = comment.strip(" #>-/:'")
+                break
+
+    return category, ScriptRecord(new_script_id(), script_type, stem, script_value.replace("\r\n", "\n"), description)
+
+
+def iter_import_files(path, archive=None):
+    """
+    Lists the importable files of a directory tree or zip archive without reading them.
+
+    Files are grouped by the folder they are in: a file in 'Scripts/AD/Users' goes into the 'AD/Users' category,
+    files at the top level go into a category named after the folder or archive itself.
+
+    Parameters:
+        - path (str): A directory or a .zip file.
+        - archive (zipfile.ZipFile): The opened zip file if 'path' is one. The caller closes it once every
+        file has been read.
+
+    Yields:
+        tuple: (category, file_name, read_file) where read_file() returns the contents as bytes.
+    """
+    root_category = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    if archive is not None:
+        for member in archive.infolist():
+            folder, file_name = os.path.split(member.filename.rstrip("/"))
+            if member.is_dir() or member.file_size > IMPORT_MAX_FILE_SIZE or \
+                    os.path.splitext(file_name)[1].lower() not in IMPORT_EXTENSIONS:
+                continue
+            yield folder or root_category, file_name, lambda member=member: archive.read(member)
+    else:
+        for folder, _, file_names in os.walk(path):
+            category = os.path.relpath(folder, path).replace(os.sep, "/")
+            for file_name in file_names:
+                file_path = os.path.join(folder, file_name)
+                if os.path.splitext(file_name)[1].lower() not in IMPORT_EXTENSIONS or \
+                        os.path.getsize(file_path) > IMPORT_MAX_FILE_SIZE:
+                    continue
+
+                def read_file(file_path=file_path):
+                    with open(file_path, "rb") as file:
+                        return file.read()
+
+                yield root_category if category == "." else category, file_name, read_file
+
+
+def import_scripts(path, progress_callback=None):
+    """
+    Bulk imports a directory tree or zip archive of scripts into SCRIPT_OBJECTS.
+
+    Description:
+        - Files are read and parsed on a thread pool of IMPORT_WORKERS workers.
+        - Scripts already present in a category with the same name and value are skipped, so importing the
+        same folder twice doesn't create duplicates.
+        - Files are parsed without holding any lock, the results are then added in one write block, so
+        everything is committed with a single write of scripts.json. If anything fails the in-memory
+        changes are rolled back.
+
+    Parameters:
+        - path (str): A directory or a .zip file.
+        - progress_callback (callable): Optional callable receiving (processed_files, total_files).
+
+    Returns:
+        dict: The number of scripts added per category.
+    """
+    parsed = []
+    with zipfile.ZipFile(path) if zipfile.is_zipfile(path) else nullcontext() as archive:
+        files = list(iter_import_files(path, archive))
+        with ThreadPoolExecutor(max_workers=IMPORT_WORKERS) as executor:
+            results = executor.map(lambda file: parse_script_file(*file), files, chunksize=64)
+            for processed, result in enumerate(results, 1):
+                if progress_callback and (processed % 100 == 0 or processed == len(files)):
+                    progress_callback(processed, len(files))
+                if result is not None:
+                    parsed.append(result)
+
+    added = {}
+    new_categories = set()
+    imported_ids = set()
+    imported = {}
+    try:
+        with SCRIPTS.write() as data:
+            existing = {}
+            for category, script_object in parsed:
+                if category not in existing:
+                    existing[category] = {(item.get("script_name"), item.get("script_value"))
+                                          for item in data.get(category, [])}
+                key = (script_object["script_name"], script_object["script_value"])
+                if key in existing[category]:
+                    continue
+                existing[category].add(key)
+                if category not in data:
+                    data[category] = []
+                    new_categories.add(category)
+                data[category].append(script_object)
+                imported_ids.add(script_object.script_id)
+                imported[script_object.script_id] = (category, script_object)
+                added[category] = added.get(category, 0) + 1
+            if added:
+                SCRIPTS.changed(imported)
+    except Exception:
+        # Roll back so memory matches what is on disk
+        with SCRIPTS.write() as data:
+            for category in added:
+                if category in new_categories:
+                    data.pop(category, None)
+                elif category in data:
+                    data[category][:] = [item for item in data[category] if item.script_id not in imported_ids]
+            note_library_change({script_id: None for script_id in imported_ids})
+        raise
+    log_info(f"Imported {sum(added.values())} scripts from '{path}' into {len(added)} categories.")
+    return added
+
+
+def safe_file_name(name):
+    """
+    Replaces characters Windows doesn't allow in file names.
+    """
+    name = "".join("_" if character in '<>:"/\\|?*' or ord(character) < 32 else character for character in name)
+    return name.strip(" .") or "_"
+
+
+def iter_script_objects():
+    """
+    Yields (category, script_object) for every script, category by category.
+
+    Only the category currently being read is copied, so exporting never holds a second copy of the library
+    and edits made in the meantime can't break the iteration.
+    """
+    with SCRIPTS.read() as data:
+        categories = list(data)
+    for category in categories:
+        with SCRIPTS.read() as data:
+            script_objects = list(data.get(category, []))
+        for script_object in script_objects:
+            yield category, script_object
+
+
+def export_scripts(path, export_format, progress_callback=None):
+    """
+    Streams the library to a portable format.
+
+    Description:
+        - "jsonl": One JSON object per line with the category and all script fields.
+        - "zip": A zip archive with one '<category>.json' file per category, in the scripts.json layout.
+        Categories whose file names collide (e.g. 'a/b' and 'a_b') get a numbered suffix.
+        - "folder": A directory per category holding each script as a source file, named after the script
+        with an extension taken from EXPORT_EXTENSIONS. Categories with '/' in their name become nested folders,
+        matching how import_scripts names categories.
+        - Scripts are written one at a time, so memory use doesn't grow with the size of the library.
+
+    Parameters:
+        - path (str): The file (jsonl/zip) or directory (folder) to export to.
+        - export_format (str): "jsonl", "zip" or "folder".
+        - progress_callback (callable): Optional callable receiving (exported_scripts, total_scripts).
+
+    Returns:
+        int: The number of scripts exported.
+    """
+    with SCRIPTS.read() as data:
+        total = sum(len(script_objects) for script_objects in data.values())
+    exported = 0
+
+    def report_progress():
+        if progress_callback and (exported % 500 == 0 or exported == total):
+            progress_callback(exported, total)
+
+    if export_format == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for category, script_object in iter_script_objects():
+                f.write(json.dumps({"category": category, **script_object}, ensure_ascii=False) + "\n")
+                exported += 1
+                report_progress()
+
+    elif export_format == "zip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            category_file = None
+            current_category = None
+            used_names = set()
+            for category, script_object in iter_script_objects():
+                if category != current_category:
+                    if category_file is not None:
+                        category_file.write("\n]\n")
+                        category_file.close()
+                    name = safe_file_name(category)
+                    entry_name = f"{name}.json"
+                    duplicate = 2
+                    while entry_name.lower() in used_names:
+                        entry_name = f"{name} ({duplicate}).json"
+                        duplicate += 1
+                    used_names.add(entry_name.lower())
+                    category_file = io.TextIOWrapper(archive.open(entry_name, "w"), encoding="utf-8")
+                    category_file.write("[\n")
+                    current_category = category
+                else:
+                    category_file.write(",\n")
+                category_file.write(json.dumps(dict(script_object), ensure_ascii=False, indent=4))
+                exported += 1
+                report_progress()
+            if category_file is not None:
+                category_file.write("\n]\n")
+                category_file.close()
+
+    elif export_format == "folder":
+        used_names = set()
+        for category, script_object in iter_script_objects():
+            folder = os.path.join(path, *[safe_file_name(part) for part in category.split("/")])
+            os.makedirs(folder, exist_ok=True)
+            name = safe_file_name(script_object.get("script_name") or "script")
+            extension = EXPORT_EXTENSIONS.get(script_object.get("script_type"), ".txt")
+            file_path = os.path.join(folder, name + extension)
+            duplicate = 2
+            while file_path.lower() in used_names or os.path.exists(file_path):
+                file_path = os.path.join(folder, f"{name} ({duplicate}){extension}")
+                duplicate += 1
+            used_names.add(file_path.lower())
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write(script_object.get("script_value") or "")
+            exported += 1
+            report_progress()
+
+    else:
+        raise ValueError(f"Unknown export format '{export_format}'.")
+
+    log_info(f"Exported {exported} scripts to '{path}' as {export_format}.")
+    return exported
+
+
+def update_env_file(key, value):
+    """
+        Updates or adds a key-value pair in the environment file specified by ENV_FILE.
+
+        This function attempts to read the contents of the environment file specified by ENV_FILE.
+        If the file exists, it updates the existing key-value pair if the key is found; otherwise, it adds a new key-value pair.
+        If the file doesn't exist, it creates the file with the new key-value pair.
+        The function logs relevant information about file creation and key-value addition or modification.
+
+        Args:
+        key (str): The key to be updated or added in the environment file.
+        value (str): The value corresponding to the key.
+
+        Note:
+        - This function assumes that 'ENV_FILE', 'log_error', and 'log_info' modules are defined.
+
+        Raises:
+        No explicit exceptions are raised within this function. However, it may raise exceptions
+        related to file operations or other system-related errors while reading or writing to the file.
+
+        Returns:
+        None
+        """
+    try:
+        # Read the contents of the file
+        with open(ENV_FILE, 'r') as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        # If the file doesn't exist, create it with the new key-value pair
+        log_error(f".\\{ENV_FILE} not found. Creating it and adding the new values...")
+        lines = []
+
+    # Update or add the key-value pair
+    found = False
+    for i, line in enumerate(lines):
+        if line.startswith(key + '='):
+            lines[i] = f"{key}={value}\n"
+            found = True
+            break
+    if not found:
+        lines.append(f"{key}={value}\n")
+
+    # Write the modified contents back to the file
+    with open(ENV_FILE, 'w') as file:
+        file.writelines(lines)
+    if found:
+        log_info(f"Updated key '{key}' in .\\{ENV_FILE} to {value}.")
+    else:
+        log_info(f"Added key '{key}' to .\\{ENV_FILE} with a value of {value}.")
+
+
+def load_script_usage():
+    """
+    Loads the copy statistics used to rank the command palette from USAGE_FILE.
+
+    Description:
+        - USAGE_FILE is an append-only JSON Lines log of [script_id, count, timestamp] entries, so recording
+        a copy is a single small append instead of a rewrite. Keying by script_id keeps the statistics of a
+        script that is renamed or moved and apart from other scripts with the same name.
+        - Entries for the same script are summed into SCRIPT_USAGE.
+        - Entries of older versions, [category, script_name, count, timestamp], are matched to the script with
+        that name in the library (which must be loaded first) and rewritten with its script_id.
+        - Once the log holds many more lines than scripts, or holds old entries, it is compacted to one line per script.
+    """
+    lines = 0
+    legacy_ids = None
+    try:
+        with open(USAGE_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if len(entry) == 4:
+                        if legacy_ids is None:
+                            legacy_ids = {
+                                (category, script.script_name): script.script_id
+                                for category, scripts in SCRIPTS.snapshot() for script in scripts
+                            }
+                        script_id = legacy_ids.get((entry[0], entry[1]))
+                        count, timestamp = entry[2:]
+                    else:
+                        script_id, count, timestamp = entry
+                except (ValueError, TypeError):
+                    continue
+                lines += 1
+                if script_id is None:
+                    continue
+                usage = SCRIPT_USAGE.setdefault(script_id, [0, 0])
+                usage[0] += count
+                usage[1] = max(usage[1], timestamp)
+    except FileNotFoundError:
+        return
+
+    if legacy_ids is not None or lines > 2 * len(SCRIPT_USAGE) + 100:
+        with open(USAGE_FILE, "w", encoding="utf-8") as f:
+            for script_id, (count, timestamp) in SCRIPT_USAGE.items():
+                f.write(json.dumps([script_id, count, timestamp]) + "\n")
+        log_info(f"Compacted .\\{USAGE_FILE} from {lines} to {len(SCRIPT_USAGE)} entries.")
+
+
+def record_script_usage(script_id):
+    """
+    Records that a script was copied, for most recently / most frequently used ranking.
+
+    Parameters:
+        - script_id (str): The id of the script.
+    """
+    timestamp = time.time()
+    usage = SCRIPT_USAGE.setdefault(script_id, [0, 0])
+    usage[0] += 1
+    usage[1] = timestamp
+    try:
+        with open(USAGE_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps([script_id, 1, timestamp]) + "\n")
+    except OSError as e:
+        log_error(e)
+
+
+def usage_score(script_id, now):
+    """
+    Returns the frecency of a script: its copy count, decayed by how long ago it was last copied.
+    """
+    count, last_used = SCRIPT_USAGE.get(script_id, (0, 0))
+    if not count:
+        return 0.0
+    return count * 0.5 ** ((now - last_used) / USAGE_HALF_LIFE)
+
+
+class ScriptIndex:
+    """
+    Prefix trie over the words of script names, used by the command palette.
+
+    Nodes are plain dicts keyed by character. The None key holds {script_id: (category, script_object)} of
+    the scripts whose word ends at the node and the 0 key counts the scripts below it, so the most selective
+    word of a query can be picked cheaply.
+
+    The trie follows LIBRARY_CHANGES, only the scripts changed since the last build are re-indexed. Palette
+    handlers run on executor threads, the lock keeps a build from interleaving with another or with a search.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.scripts = {}  # script_id -> (category, script_object)
+        self.words = {}  # script_id -> the words of its name indexed in the trie
+        self.version = None
+        self.lock = threading.Lock()
+
+    def build(self):
+        """
+        Brings the trie up to date with SCRIPT_OBJECTS, rebuilding it only if the change log can't say what changed.
+        """
+        if self.version == LIBRARY_VERSION:
+            return
+        with self.lock, SCRIPTS.read() as data:
+            if self.version == LIBRARY_VERSION:
+                return
+            version = LIBRARY_VERSION
+            changes = library_changes_since(self.version)
+            if changes is None:
+                self.root = {}
+                self.scripts = {}
+                self.words = {}
+                changes = {item.script_id: (category, item) for category, items in data.items() for item in items}
+            for script_id, entry in changes.items():
+                self.remove(script_id)
+                if entry is not None:
+                    self.add(script_id, entry)
+            self.version = version
+
+    def add(self, script_id, entry):
+        words = set((entry[1].get("script_name") or "").casefold().split())
+        self.scripts[script_id] = entry
+        self.words[script_id] = words
+        for word in words:
+            node = self.root
+            for character in word:
+                node = node.setdefault(character, {})
+                node[0] = node.get(0, 0) + 1
+            node.setdefault(None, {})[script_id] = entry
+
+    def remove(self, script_id):
+        if self.scripts.pop(script_id, None) is None:
+            return
+        for word in self.words.pop(script_id):
+            node = self.root
+            for character in word:
+                child = node[character]
+                child[0] -= 1
+                if not child[0]:
+                    del node[character]  # Nothing else is indexed below
+                    break
+                node = child
+            else:
+                ends = node[None]
+                del ends[script_id]
+                if not ends:
+                    del node[None]
+
+    def count(self, prefix):
+        """
+        Returns how many indexed words start with prefix.
+        """
+        node = self.root
+        for character in prefix:
+            node = node.get(character)
+            if node is None:
+                return 0
+        return node.get(0, 0)
+
+    def find(self, prefix, limit=None):
+        """
+        Returns {script_id: (category, script_object)} for scripts with a word starting with prefix.
+
+        The trie is walked breadth first, so when 'limit' cuts the walk short the shortest words are kept.
+        """
+        node = self.root
+        for character in prefix:
+            node = node.get(character)
+            if node is None:
+                return {}
+        matches = {}
+        queue = deque([node])
+        while queue:
+            node = queue.popleft()
+            for key, value in node.items():
+                if key is None:
+                    for script_id, entry in value.items():
+                        matches[script_id] = entry
+                        if limit and len(matches) >= limit:
+                            return matches
+                elif key != 0:
+                    queue.append(value)
+        return matches
+
+    def search(self, query, limit=PALETTE_RESULTS):
+        """
+        Returns the best matches for a query, ranked by usage and then by name.
+
+        Description:
+            - Every word of the query must prefix-match a word of the script name, so "get us" finds "Get AD user".
+            - Candidates come from the most selective query word. At most PALETTE_SCAN_LIMIT candidates are
+            scanned, plus every script that has been copied before, which keeps very broad prefixes fast.
+            - Results are ordered by usage_score, then names starting with the query, then shorter names.
+            - An empty query returns the most used scripts.
+
+        Parameters:
+            - query (str): The text typed into the palette.
+            - limit (int): The maximum number of results.
+
+        Returns:
+            list: (category, script_object) tuples.
+        """
+        self.build()
+        query = query.casefold().strip()
+        now = time.time()
+        with self.lock:
+            if not query:
+                ranked = sorted(SCRIPT_USAGE, key=lambda script_id: usage_score(script_id, now), reverse=True)
+                return [self.scripts[script_id] for script_id in ranked if script_id in self.scripts][:limit]
+
+            words = query.split()
+            candidates = self.find(min(words, key=self.count), PALETTE_SCAN_LIMIT)
+            for script_id in SCRIPT_USAGE:
+                if script_id in self.scripts:
+                    candidates[script_id] = self.scripts[script_id]
+
+        def matches(entry):
+            name_words = (entry[1].get("script_name") or "").casefold().split()
+            return all(any(name_word.startswith(word) for name_word in name_words) for word in words)
+
+        def rank(entry):
+            category, script_object = entry
+            name = script_object.get("script_name") or ""
+            return (-usage_score(script_object.script_id, now), not name.casefold().startswith(query), len(name), name)
+
+        return heapq.nsmallest(limit, filter(matches, candidates.values()), key=rank)
+
+
+def minhash_signature(text):
+    """
+    Computes a one permutation MinHash signature of a script's 3-word shingles.
+
+    Each shingle is hashed once; the hash picks one of MINHASH_BINS bins and the bin keeps its smallest value.
+    Unused bins hold None. Two signatures agree in roughly the same share of bins as the Jaccard
+    similarity of the shingle sets.
+
+    Returns:
+        tuple: The signature, or None if the script is shorter than NEAR_DUPLICATE_MIN_WORDS words.
+    """
+    words = text.split()
+    if len(words) < NEAR_DUPLICATE_MIN_WORDS:
+        return None
+    signature = [None] * MINHASH_BINS
+    for shingle in {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}:
+        shingle_hash = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        bin_index, value = shingle_hash % MINHASH_BINS, shingle_hash // MINHASH_BINS
+        if signature[bin_index] is None or value < signature[bin_index]:
+            signature[bin_index] = value
+    return tuple(signature)
+
+
+def signature_similarity(first, second):
+    """
+    Estimates the Jaccard similarity of two MinHash signatures.
+    """
+    used = [(a, b) for a, b in zip(first, second) if a is not None or b is not None]
+    return sum(1 for a, b in used if a == b) / len(used) if used else 0.0
+
+
+class DuplicateIndex:
+    """
+    Finds exact and near duplicate script bodies across all categories.
+
+    Description:
+        - Every script is keyed by its script_id, so copies with the same name and value are still told apart.
+        - Bodies are grouped by SHA-1 for exact duplicates. Each distinct body gets one MinHash signature,
+        split into LSH_BANDS bands that bucket likely near duplicates together.
+        - refresh() takes the scripts changed since the last refresh from LIBRARY_CHANGES and only hashes those
+        whose value changed. When the log can't say what changed, the whole library is compared against the
+        entries, which still only hashes the changed values.
+    """
+
+    def __init__(self):
+        self.entries = {}  # script_id -> [category, script_object, script_value, digest]
+        self.by_digest = {}  # digest -> set of script_ids
+        self.signatures = {}  # digest -> MinHash signature (or None)
+        self.buckets = {}  # (band, band values) -> set of digests
+        self.version = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        if self.version == LIBRARY_VERSION:
+            return
+        with self.lock, SCRIPTS.read() as data:
+            if self.version == LIBRARY_VERSION:
+                return
+            version = LIBRARY_VERSION
+            changes = library_changes_since(self.version)
+            if changes is None:
+                changes = dict.fromkeys(self.entries)
+                changes.update(
+                    (item.script_id, (category, item)) for category, items in data.items() for item in items
+                )
+            for key, change in changes.items():
+                entry = self.entries.get(key)
+                if change is None:
+                    if entry is not None:
+                        self.remove(key)
+                    continue
+                category, script_object = change
+                script_value = script_object.get("script_value") or ""
+                if entry is not None and entry[2] == script_value:
+                    # Moved to another category, or the record replaced by a merged in change
+                    entry[0], entry[1] = category, script_object
+                    continue
+                if entry is not None:
+                    self.remove(key)
+                self.add(key, category, script_object, script_value)
+            self.version = version
+
+    def add(self, key, category, script_object, script_value):
+        normalized = script_value.replace("\r\n", "\n").strip()
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+        self.entries[key] = [category, script_object, script_value, digest]
+        self.by_digest.setdefault(digest, set()).add(key)
+        if digest not in self.signatures:
+            signature = minhash_signature(normalized)
+            self.signatures[digest] = signature
+            for band in self.bands(signature):
+                self.buckets.setdefault(band, set()).add(digest)
+
+    def remove(self, key):
+        digest = self.entries.pop(key)[3]
+        keys = self.by_digest[digest]
+        keys.discard(key)
+        if not keys:
+            del self.by_digest[digest]
+            for band in self.bands(self.signatures.pop(digest)):
+                self.buckets[band].discard(digest)
+                if not self.buckets[band]:
+                    del self.buckets[band]
+
+    @staticmethod
+    def bands(signature):
+        if signature is None:
+            return []
+        rows = MINHASH_BINS // LSH_BANDS
+        bands = [(band, signature[band * rows:(band + 1) * rows]) for band in range(LSH_BANDS)]
+        # Bands with empty bins would put every short script into the same bucket
+        return [band for band in bands if None not in band[1]]
+
+    def exact_groups(self):
+        """
+        Returns lists of (category, script_object) sharing the same body.
+        """
+        self.refresh()
+        with self.lock:
+            return [
+                [tuple(self.entries[key][:2]) for key in keys]
+                for keys in self.by_digest.values() if len(keys) > 1
+            ]
+
+    def near_groups(self):
+        """
+        Returns (similarity, [(category, script_object), ...]) groups of different but similar bodies.
+
+        Bodies sharing an LSH bucket are compared and joined if their estimated similarity is at least
+        NEAR_DUPLICATE_THRESHOLD. The reported similarity is the lowest of the joining pairs.
+        """
+        self.refresh()
+        with self.lock:
+            parent = {}
+            similarity = {}
+
+            def find(digest):
+                while parent.get(digest, digest) != digest:
+                    digest = parent[digest]
+                return digest
+
+            for digests in self.buckets.values():
+                if len(digests) < 2:
+                    continue
+                digests = sorted(digests)
+                for i, first in enumerate(digests):
+                    for second in digests[i + 1:]:
+                        if find(first) == find(second):
+                            continue
+                        score = signature_similarity(self.signatures[first], self.signatures[second])
+                        if score >= NEAR_DUPLICATE_THRESHOLD:
+                            root_first, root_second = find(first), find(second)
+                            parent[root_second] = root_first
+                            similarity[root_first] = min(score, similarity.get(root_first, 1.0),
+                                                         similarity.get(root_second, 1.0))
+
+            groups = {}
+            for digest in parent:
+                groups.setdefault(find(digest), set()).add(digest)
+            for root, digests in groups.items():
+                digests.add(root)
+            return [
+                (similarity[root], [
+                    tuple(self.entries[key][:2]) for digest in digests for key in self.by_digest[digest]
+                ])
+                for root, digests in groups.items()
+            ]
+
+
+class TagIndex:
+    """
+    Bitmap index over script tags, used to filter the whole library by combinations of tags.
+
+    Description:
+        - Every script gets a bit position and every tag a bitmap (a Python int) with the bits of its scripts set,
+        so AND, OR and NOT over tags are single integer operations instead of a scan over the library.
+        - refresh() takes the scripts changed since the last refresh from LIBRARY_CHANGES and re-indexes only
+        those. It rebuilds from scratch only when the log can't say what changed.
+        - Bit positions of deleted scripts are reused, so the bitmaps don't grow with churn.
+        - Queries run on executor threads, the lock keeps two refreshes from applying the same changes
+        (which would hand one freed bit position to two scripts) and a query from reading a half applied change.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.positions = {}  # script_id -> bit position
+        self.script_ids = []  # bit position -> script_id, None if free
+        self.free = []  # Bit positions released by deleted scripts
+        self.entries = {}  # script_id -> (category, script_object, tags as indexed)
+        self.bitmaps = {}  # tag -> bitmap of the scripts carrying it
+        self.all = 0  # Bitmap of all indexed scripts
+        self.version = None
+
+    def refresh(self):
+        if self.version == LIBRARY_VERSION:
+            return
+        with self.lock, SCRIPTS.read() as data:
+            if self.version == LIBRARY_VERSION:
+                return  # Another thread refreshed while this one waited for the lock
+            version = LIBRARY_VERSION
+            changes = library_changes_since(self.version)
+            if changes is None:
+                self.clear()
+                changes = {item.script_id: (category, item) for category, items in data.items() for item in items}
+            for script_id, entry in changes.items():
+                if entry is None:
+                    self.remove(script_id)
+                else:
+                    self.add(script_id, *entry)
+            self.version = version
+
+    def add(self, script_id, category, script_object):
+        tags = script_object.script_tags
+        previous = self.entries.get(script_id)
+        position = self.positions.get(script_id)
+        if position is None:
+            position = self.free.pop() if self.free else len(self.script_ids)
+            if position == len(self.script_ids):
+                self.script_ids.append(script_id)
+            else:
+                self.script_ids[position] = script_id
+            self.positions[script_id] = position
+            self.all |= 1 << position
+        bit = 1 << position
+        if previous is not None:
+            for tag in previous[2]:
+                if tag not in tags:
+                    self.discard(tag, bit)
+        for tag in tags:
+            self.bitmaps[tag] = self.bitmaps.get(tag, 0) | bit
+        self.entries[script_id] = (category, script_object, tags)
+
+    def remove(self, script_id):
+        position = self.positions.pop(script_id, None)
+        if position is None:
+            return
+        bit = 1 << position
+        for tag in self.entries.pop(script_id)[2]:
+            self.discard(tag, bit)
+        self.all &= ~bit
+        self.script_ids[position] = None
+        self.free.append(position)
+
+    def discard(self, tag, bit):
+        bitmap = self.bitmaps[tag] & ~bit
+        if bitmap:
+            self.bitmaps[tag] = bitmap
+        else:
+            del self.bitmaps[tag]
+
+    def tags(self):
+        """
+        Returns (tag, number of scripts) for every tag in use, most used first.
+        """
+        self.refresh()
+        with self.lock:
+            counts = [(tag, bitmap.bit_count()) for tag, bitmap in self.bitmaps.items()]
+        return sorted(counts, key=lambda item: (-item[1], item[0]))
+
+    def query(self, text):
+        """
+        Finds the scripts matching a tag query.
+
+        Description:
+            - Terms are separated by spaces or commas and all of them must match.
+            - 'a|b' matches scripts tagged a or b, '-a' excludes scripts tagged a.
+            - e.g. 'ad -legacy deploy|cleanup'
+
+        Parameters:
+            - text (str): The query.
+
+        Returns:
+            list: (category, script_object) of the matching scripts, in category order and then by name.
+        """
+        self.refresh()
+        with self.lock:
+            bits = self.all
+            for term in text.replace(",", " ").split():
+                if term.startswith("-"):
+                    bits &= ~self.bitmap(term[1:])
+                else:
+                    any_bits = 0
+                    for tag in term.split("|"):
+                        any_bits |= self.bitmap(tag)
+                    bits &= any_bits
+            # Walk the set bits through the binary string, str.find skips runs of zeros in C
+            binary = bin(bits)[:1:-1] if bits > 0 else ""
+            results = []
+            position = binary.find("1")
+            while position != -1:
+                category, script_object, _ = self.entries[self.script_ids[position]]
+                results.append((category, script_object))
+                position = binary.find("1", position + 1)
+        order = {category: index for index, category in enumerate(SCRIPT_OBJECTS)}
+        results.sort(key=lambda result: (order.get(result[0], len(order)), result[1].script_name.casefold()))
+        return results
+
+    def bitmap(self, tag):
+        tag = parse_tags([tag])
+        return self.bitmaps.get(tag[0], 0) if tag else self.all
+
+
+class SmartCategory:
+    """
+    A saved query shown in the drawer like a category, e.g. 'type = Powershell and body contains Get-AD'.
+
+    Description:
+        - Its members are kept as a materialized view: refresh() takes the scripts changed since the last
+        refresh from LIBRARY_CHANGES and only tests those against the query, so opening the smart category
+        doesn't scan the library. The query is only run over the whole library when the view is first built,
+        the query changes or the change log can't say what changed.
+        - Members are kept sorted by name, paged through with iter_members like iter_category pages a category.
+    """
+
+    def __init__(self, name, query):
+        self.name = name
+        self.query = query
+        self.match = parse_smart_query(query)
+        self.members = {}  # script_id -> (sort key, category, script_object)
+        self.order = []  # Sort keys (casefolded name, script_id) of the members, in display order
+        self.version = None
+        self.lock = threading.Lock()
+
+    def set_query(self, name, query):
+        """
+        Changes the name and query, the members are rebuilt on the next refresh.
+
+        Raises:
+            ValueError: If the query can't be parsed, nothing is changed then.
+        """
+        match = parse_smart_query(query)
+        with self.lock:
+            self.name, self.query, self.match = name, query, match
+            self.version = None
+
+    def refresh(self):
+        """
+        Brings the members up to date with SCRIPT_OBJECTS.
+
+        Returns:
+            bool: True if a script joined, left or changed within the members.
+        """
+        if self.version == LIBRARY_VERSION:
+            return False
+        with self.lock, SCRIPTS.read() as data:
+            version = LIBRARY_VERSION
+            changes = library_changes_since(self.version)
+            if changes is None:
+                self.members = {}
+                for category, items in data.items():
+                    for item in items:
+                        if self.match(category, item):
+                            key = ((item.script_name or "").casefold(), item.script_id)
+                            self.members[item.script_id] = (key, category, item)
+                self.order = sorted(member[0] for member in self.members.values())
+                self.version = version
+                return True
+            changed = False
+            for script_id, entry in changes.items():
+                member = self.members.pop(script_id, None)
+                if member is not None:
+                    del self.order[bisect_left(self.order, member[0])]
+                    changed = True
+                if entry is not None and self.match(*entry):
+                    key = ((entry[1].script_name or "").casefold(), script_id)
+                    self.members[script_id] = (key, *entry)
+                    insort(self.order, key)
+                    changed = True
+            self.version = version
+            return changed
+
+    def iter_members(self, cursor=None, reverse=False, match=None):
+        """
+        Iterates over the members starting after (or before, with reverse) a cursor, see iter_category.
+
+        Yields:
+            tuple: (cursor, script_object)
+        """
+        step = -1 if reverse else 1
+        if cursor is None:
+            index = len(self.order) if reverse else -1
+        else:
+            member = self.members.get(cursor[1])
+            if member is not None:
+                index = bisect_left(self.order, member[0])
+            else:
+                index = min(cursor[0], len(self.order)) - (0 if reverse else 1)
+        index += step
+        while 0 <= index < len(self.order):
+            member = self.members.get(self.order[index][1])
+            if member is not None and (match is None or match(member[2])):
+                yield (index, self.order[index][1]), member[2]
+            index += step
+
+
+class RegexSearch:
+    """
+    Regex search over script bodies, run in worker processes so a slow pattern can't freeze the app.
+
+    Description:
+        - The library is sharded by script_id across REGEX_SEARCH_WORKERS processes, each keeping its shard in
+        memory (REGEX_SHARD). A query only ships the bodies changed since the shard's last query, taken from
+        LIBRARY_CHANGES, so the library isn't copied to the workers on every search.
+        - Each worker is a single-process pool so a query running over REGEX_SEARCH_TIMEOUT can be stopped by
+        terminating it. A stopped or crashed worker is started again and sent its whole shard on the next query.
+        - Workers are spawned rather than forked, the app runs several threads a fork could catch holding a lock.
+    """
+
+    def __init__(self, workers=REGEX_SEARCH_WORKERS):
+        self.workers = [None] * workers
+        self.pending = [{} for _ in range(workers)]  # Changes not yet sent to each worker
+        self.reset = [True] * workers  # Worker has to be sent its whole shard
+        self.entries = {}  # script_id -> (category, script_object)
+        self.version = None
+        self.lock = threading.Lock()
+
+    def shard(self, script_id):
+        return hash(script_id) % len(self.workers)
+
+    def start(self):
+        """
+        Starts the worker processes that aren't running and waits until they can take queries.
+        The caller has to hold self.lock, otherwise two threads could each start a pool for the same worker.
+        """
+        context = multiprocessing.get_context("spawn")
+        starting = []
+        for index, worker in enumerate(self.workers):
+            if worker is None:
+                self.workers[index] = context.Pool(processes=1)
+                self.reset[index] = True
+                starting.append(self.workers[index].apply_async(regex_worker_ready))
+        for ready in starting:
+            ready.get(REGEX_WORKER_START_TIMEOUT)
+
+    def warm_up(self):
+        """
+        Starts the workers ahead of the first query, meant to run on a background thread.
+        """
+        with self.lock:
+            self.start()
+
+    def stop(self, index):
+        self.workers[index].terminate()
+        self.workers[index] = None
+        self.reset[index] = True
+
+    def refresh(self):
+        if self.version == LIBRARY_VERSION:
+            return
+        with SCRIPTS.read() as data:
+            version = LIBRARY_VERSION
+            changes = library_changes_since(self.version)
+            if changes is None:
+                self.entries = {item.script_id: (category, item) for category, items in data.items() for item in items}
+                self.pending = [{} for _ in self.workers]
+                self.reset = [True] * len(self.workers)
+            else:
+                for script_id, entry in changes.items():
+                    if entry is None:
+                        self.entries.pop(script_id, None)
+                    else:
+                        self.entries[script_id] = entry
+                    self.pending[self.shard(script_id)][script_id] = entry
+            self.version = version
+
+    def search(self, pattern, timeout=REGEX_SEARCH_TIMEOUT):
+        """
+        Searches the bodies of all scripts for a regex.
+
+        Parameters:
+            - pattern (str): The regex, matched case-insensitively with ^ and $ matching at line breaks.
+            - timeout (float): Seconds the query may run before the workers are stopped.
+
+        Returns:
+            list: (category, script_object, [(start, end), ...]) in category order and then by name.
+
+        Raises:
+            re.error: If the pattern is invalid.
+            TimeoutError: If the query didn't finish in time.
+        """
+        compile_search_pattern(pattern)
+        with self.lock:
+            self.start()
+            self.refresh()
+            queries = []
+            for index, worker in enumerate(self.workers):
+                if self.reset[index]:
+                    changes = {
+                        script_id: entry[1].script_value or "" for script_id, entry in self.entries.items()
+                        if self.shard(script_id) == index
+                    }
+                else:
+                    changes = {
+                        script_id: (entry[1].script_value or "") if entry is not None else None
+                        for script_id, entry in self.pending[index].items()
+                    }
+                queries.append(worker.apply_async(regex_search_shard, (pattern, changes, self.reset[index])))
+            deadline = time.monotonic() + timeout
+            matches = []
+            failed = None
+            for index, query in enumerate(queries):
+                try:
+                    matches.extend(query.get(max(0.0, deadline - time.monotonic())))
+                    self.pending[index] = {}
+                    self.reset[index] = False
+                except multiprocessing.TimeoutError:
+                    self.stop(index)
+                    failed = TimeoutError(f"The pattern took longer than {timeout}s.")
+                except Exception as e:
+                    log_error(f"Regex search worker failed: {e}")
+                    self.stop(index)
+                    failed = e
+            if failed is not None:
+                raise failed
+            results = [(*self.entries[script_id], spans) for script_id, spans in matches if script_id in self.entries]
+        order = {category: index for index, category in enumerate(SCRIPT_OBJECTS)}
+        results.sort(key=lambda result: (order.get(result[0], len(order)), (result[1].script_name or "").casefold()))
+        return results
+
+    def close(self):
+        with self.lock:
+            for index, worker in enumerate(self.workers):
+                if worker is not None:
+                    self.stop(index)
+
+
+class SemanticIndex:
+    """
+    Offline semantic search: hashed TF-IDF vectors of every script, ranked by cosine similarity to the query.
+
+    Description:
+        - Each script gets a row of term frequencies over SEMANTIC_DIMENSIONS hashed buckets, computed from its
+        name, description and body (see semantic_features). The rows live in a memory-mapped float32 file in
+        DATA_DIR, with semantic_index.json mapping rows to script ids and the hash of the text each row was
+        computed from, so a restart only recomputes scripts that changed in between.
+        - While running, rows are updated from LIBRARY_CHANGES, only for the scripts that changed.
+        - IDF weights come from per-bucket document counts kept in step with the rows. A query is one
+        matrix-vector product and an argpartition for the top results, no network call.
+        - Needs numpy, the search mode is disabled without it.
+    """
+
+    def __init__(self):
+        self.vectors = None  # np.memmap of capacity x SEMANTIC_DIMENSIONS
+        self.row_ids = []  # row -> script_id, None if free
+        self.rows = {}  # script_id -> row
+        self.free = []  # Rows released by deleted scripts
+        self.hashes = {}  # script_id -> semantic_text_hash of the text its row was computed from
+        self.entries = {}  # script_id -> (category, script_object)
+        self.document_counts = None  # Rows with a non-zero weight per bucket
+        self.norms = None  # IDF weighted norm per row, None when rows or weights changed
+        self.version = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Maps the vector file and reads which script each row belongs to.
+
+        Description:
+            - If semantic_index.json is missing, unreadable or of another format, or the vector file is shorter
+            than its rows, the vector file is emptied and every script is computed again.
+            - Rows past the saved ones and free rows are cleared, they can hold vectors written before a crash
+            that kept the index file from being saved, which would otherwise be counted in document_counts.
+        """
+        try:
+            with open(SEMANTIC_INDEX_FILE, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+        row_size = SEMANTIC_DIMENSIONS * np.dtype(np.float32).itemsize
+        try:
+            size = os.path.getsize(SEMANTIC_VECTORS_FILE)
+        except OSError:
+            size = 0
+        if (index.get("dimensions") != SEMANTIC_DIMENSIONS or index.get("format") != SEMANTIC_FORMAT
+                or size < len(index.get("ids", [])) * row_size):
+            index = {}
+        self.row_ids = index.get("ids", [])
+        self.hashes = index.get("hashes", {})
+        with open(SEMANTIC_VECTORS_FILE, "ab") as f:
+            f.truncate(len(self.row_ids) * row_size)
+        self.open_vectors(max(len(self.row_ids), SEMANTIC_MIN_ROWS))
+        self.rows = {script_id: row for row, script_id in enumerate(self.row_ids) if script_id is not None}
+        self.free = [row for row, script_id in enumerate(self.row_ids) if script_id is None]
+        self.vectors[self.free] = 0
+        self.document_counts = np.count_nonzero(self.vectors[:len(self.row_ids)], axis=0).astype(np.int64)
+
+    def open_vectors(self, capacity):
+        """
+        Maps the vector file with room for at least capacity rows, growing the file if needed.
+        """
+        row_size = SEMANTIC_DIMENSIONS * np.dtype(np.float32).itemsize
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(SEMANTIC_VECTORS_FILE, "ab") as f:
+            size = f.tell()
+            if size < capacity * row_size:
+                f.truncate(capacity * row_size)
+                size = capacity * row_size
+        self.vectors = np.memmap(SEMANTIC_VECTORS_FILE, dtype=np.float32, mode="r+",
+                                 shape=(size // row_size, SEMANTIC_DIMENSIONS))
+
+    def save_index(self):
+        self.vectors.flush()
+        try:
+            with open(SEMANTIC_INDEX_FILE, "w", encoding="utf-8") as f:
+                json.dump({"dimensions": SEMANTIC_DIMENSIONS, "format": SEMANTIC_FORMAT, "ids": self.row_ids,
+                       "hashes": self.hashes}, f)
+        except OSError as e:
+            log_error(e)
+
+    def refresh(self):
+        """
+        Brings the vectors up to date with SCRIPT_OBJECTS, recomputing only the rows of changed scripts.
+        """
+        if self.version == LIBRARY_VERSION:
+            return
+        with self.lock:
+            if self.vectors is None:
+                self.load()
+            changed = False
+            with SCRIPTS.read() as data:
+                version = LIBRARY_VERSION
+                changes = library_changes_since(self.version)
+                if changes is None:
+                    self.entries = {}
+                    changes = {script_id: None for script_id in self.rows}
+                    changes.update(
+                        (item.script_id, (category, item)) for category, items in data.items() for item in items
+                    )
+                for script_id, entry in changes.items():
+                    if entry is None:
+                        self.entries.pop(script_id, None)
+                        changed = self.remove(script_id) or changed
+                    else:
+                        self.entries[script_id] = entry
+                        changed = self.put(script_id, entry[1]) or changed
+                self.version = version
+            if changed:
+                self.norms = None
+                self.save_index()
+
+    def put(self, script_id, script_object):
+        text_hash = semantic_text_hash(script_object)
+        if script_id in self.rows and self.hashes.get(script_id) == text_hash:
+            return False
+        row = self.rows.get(script_id)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+                self.row_ids[row] = script_id
+            else:
+                row = len(self.row_ids)
+                if row >= len(self.vectors):
+                    self.open_vectors(len(self.vectors) * 2)
+                self.row_ids.append(script_id)
+            self.rows[script_id] = row
+        vector = semantic_vector(
+            (script_object.get(field), weight) for field, weight in SEMANTIC_FIELD_WEIGHTS
+        )
+        self.document_counts += (vector != 0).astype(np.int64) - (self.vectors[row] != 0)
+        self.vectors[row] = vector
+        self.hashes[script_id] = text_hash
+        return True
+
+    def remove(self, script_id):
+        row = self.rows.pop(script_id, None)
+        if row is None:
+            return False
+        self.document_counts -= self.vectors[row] != 0
+        self.vectors[row] = 0
+        self.row_ids[row] = None
+        self.hashes.pop(script_id, None)
+        self.free.append(row)
+        return True
+
+    def search(self, query, top_k=SEMANTIC_TOP_K):
+        """
+        Finds the scripts closest in meaning to a query.
+
+        Parameters:
+            - query (str): What the script does, in words, e.g. 'disable user account'.
+            - top_k (int): The number of results.
+
+        Returns:
+            list: (category, script_object, score) best match first, scores being cosine similarities.
+        """
+        self.refresh()
+        query_vector = semantic_vector([(query, 1.0)])
+        with self.lock:
+            rows = len(self.row_ids)
+            if not rows or not query_vector.any():
+                return []
+            matrix = self.vectors[:rows]
+            idf = (np.log((1 + len(self.rows)) / (1 + self.document_counts)) + 1).astype(np.float32)
+            if self.norms is None:
+                squared_idf = np.square(idf)
+                self.norms = np.concatenate([
+                    np.sqrt(np.square(matrix[start:start + SEMANTIC_NORM_CHUNK]) @ squared_idf)
+                    for start in range(0, rows, SEMANTIC_NORM_CHUNK)
+                ])
+                self.norms[self.norms == 0] = np.inf
+            weighted_query = query_vector * idf
+            scores = (matrix @ (weighted_query * idf)) / (self.norms * np.linalg.norm(weighted_query))
+            top_k = min(top_k, rows)
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (*self.entries[self.row_ids[row]], float(scores[row])) for row in top
+                if scores[row] >= SEMANTIC_MIN_SCORE and self.row_ids[row] in self.entries
+            ]
+
+
+class LanguageClassifier:
+    """
+    Guesses the language of a script from its tokens, offline, so the type can be prefilled and plain text
+    isn't sent to Gemini.
+
+    Description:
+        - A multinomial naive Bayes model over code_tokens features, with a uniform prior over the types.
+        It starts from the LANGUAGE_HINTS snippets and learns from every script in the library filed under a
+        type from DEFAULT_TYPES, so it picks up the user's own conventions.
+        - Scripts are counted with 1 + log of each feature count, so one long script doesn't outweigh the rest.
+        - The library is followed through LIBRARY_CHANGES: an edit takes back the old counts of that script and
+        adds the new ones, only a change the log can't describe retrains from scratch.
+        - With numpy, the counts are a types x features matrix, each feature having a column. The log-likelihoods
+        are computed from it as a whole and cached until the counts change, so classifying is one product of
+        the text's feature weights with their columns, plus the log priors. Columns of features no script
+        uses any more are reused.
+        - Without numpy, the counts are kept per type and each feature maps to a vector of log-likelihoods over
+        all types, cached until the counts change, so classifying is summing one vector per distinct feature.
+    """
+
+    def __init__(self, hints=None):
+        self.hints = LANGUAGE_HINTS if hints is None else hints
+        self.types = sorted(self.hints)
+        self.rows = {script_type: row for row, script_type in enumerate(self.types)}
+        self.entries = {}  # script_id -> (script_type, feature weights) of the scripts learned from
+        self.version = None
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        if np is None:
+            self.counts = {script_type: Counter() for script_type in self.types}
+        else:
+            self.count_matrix = np.zeros((len(self.types), CLASSIFIER_MIN_COLUMNS))  # types x feature columns
+            self.columns = {}  # feature -> column in count_matrix
+            self.free_columns = []  # Columns released by features no longer used
+            self.log_priors = np.full(len(self.types), -math.log(len(self.types)))
+        self.log_likelihoods = None  # types x feature columns, computed from count_matrix when needed
+        self.totals = dict.fromkeys(self.types, 0.0)
+        self.features = Counter()  # feature -> number of types and scripts using it, for the vocabulary size
+        self.weights = {}  # feature -> log-likelihood per type, filled as features are seen
+        for script_type, snippet in self.hints.items():
+            self.learn(script_type, {
+                feature: CLASSIFIER_HINT_WEIGHT * weight for feature, weight in self.feature_weights(snippet).items()
+            })
+
+    @staticmethod
+    def feature_weights(text):
+        return {feature: 1 + math.log(count) for feature, count in code_tokens(text).items()}
+
+    def learn(self, script_type, weights, sign=1):
+        if np is None:
+            counts = self.counts[script_type]
+            for feature, weight in weights.items():
+                counts[feature] += sign * weight
+                if counts[feature] <= 1e-9:
+                    del counts[feature]
+        elif weights:
+            columns = [self.column(feature) for feature in weights]
+            self.count_matrix[self.rows[script_type], columns] += \
+                sign * np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+        for feature in weights:
+            self.features[feature] += sign
+            if self.features[feature] <= 0:
+                del self.features[feature]
+                if np is not None:
+                    column = self.columns.pop(feature)
+                    self.count_matrix[:, column] = 0
+                    self.free_columns.append(column)
+        self.totals[script_type] += sign * sum(weights.values())
+        self.weights = {}
+        self.log_likelihoods = None
+
+    def column(self, feature):
+        """
+        Returns the count_matrix column of a feature, giving it one if it has none yet.
+        """
+        column = self.columns.get(feature)
+        if column is None:
+            if self.free_columns:
+                column = self.free_columns.pop()
+            else:
+                column = len(self.columns)
+                if column == self.count_matrix.shape[1]:
+                    grown = np.zeros((len(self.types), column * 2))
+                    grown[:, :column] = self.count_matrix
+                    self.count_matrix = grown
+            self.columns[feature] = column
+        return column
+
+    def refresh(self):
+        """
+        Learns the library changes since the last refresh. Runs on worker threads (render_markdown and
+        looks_like_text go through asyncio.to_thread), the lock keeps two of them from learning the same changes.
+        """
+        if self.version == LIBRARY_VERSION:
+            return
+        with self.lock, SCRIPTS.read() as data:
+            if self.version == LIBRARY_VERSION:
+                return
+            version = LIBRARY_VERSION
+            changes = library_changes_since(self.version)
+            if changes is None:
+                self.entries = {}
+                self.clear()
+                changes = {item.script_id: (category, item) for category, items in data.items() for item in items}
+            for script_id, entry in changes.items():
+                self.train(script_id, entry[1] if entry is not None else None)
+            self.version = version
+
+    def train(self, script_id, script_object):
+        """
+        Learns a script, replacing what was learned from an earlier version of it. None forgets the script.
+        """
+        previous = self.entries.pop(script_id, None)
+        if previous is not None:
+            self.learn(*previous, sign=-1)
+        if script_object is not None and script_object.get("script_type") in self.rows:
+            entry = (script_object.get("script_type"), self.feature_weights(script_object.get("script_value") or ""))
+            self.entries[script_id] = entry
+            self.learn(*entry)
+
+    def feature_vector(self, feature):
+        vector = self.weights.get(feature)
+        if vector is None:
+            # Counts are scaled to the same total per type, a type with little to learn from would otherwise
+            # win on every feature it hasn't seen
+            scale = sum(self.totals.values()) / len(self.types)
+            vocabulary = len(self.features) + 1
+            vector = [
+                math.log((self.counts[script_type][feature] * scale / max(self.totals[script_type], 1e-9)
+                          + CLASSIFIER_SMOOTHING) / (scale + CLASSIFIER_SMOOTHING * vocabulary))
+                for script_type in self.types
+            ]
+            self.weights[feature] = vector
+        return vector
+
+    def likelihoods(self):
+        """
+        Returns the types x feature columns matrix of log-likelihoods, computed the same way as feature_vector.
+        """
+        if self.log_likelihoods is None:
+            scale = sum(self.totals.values()) / len(self.types)
+            vocabulary = len(self.features) + 1
+            totals = np.maximum(np.fromiter((self.totals[script_type] for script_type in self.types),
+                                            dtype=np.float64, count=len(self.types)), 1e-9)
+            self.log_likelihoods = np.log(self.count_matrix * (scale / totals)[:, None] + CLASSIFIER_SMOOTHING) \
+                - math.log(scale + CLASSIFIER_SMOOTHING * vocabulary)
+        return self.log_likelihoods
+
+    def classify(self, text):
+        """
+        Scores a text against every type.
+
+        Returns:
+            tuple: (best type, lead per feature over the second best type), (None, 0.0) for too little text.
+        """
+        self.refresh()
+        weights = self.feature_weights(text)
+        if len(weights) < CLASSIFIER_MIN_TOKENS:
+            return None, 0.0
+        with self.lock:
+            if np is None:
+                scores = [0.0] * len(self.types)
+                for feature, weight in weights.items():
+                    scores = [score + weight * log_likelihood
+                              for score, log_likelihood in zip(scores, self.feature_vector(feature))]
+            else:
+                # A feature no type has seen scores the same for every type, leaving it out changes no ranking
+                known = [feature for feature in weights if feature in self.columns]
+                counts = np.fromiter((weights[feature] for feature in known), dtype=np.float64, count=len(known))
+                scores = (self.likelihoods()[:, [self.columns[feature] for feature in known]] @ counts
+                          + self.log_priors).tolist()
+        ranked = sorted(zip(scores, self.types), reverse=True)
+        return ranked[0][1], (ranked[0][0] - ranked[1][0]) / sum(weights.values())
+
+    def guess(self, text):
+        """
+        Returns the type of a text if the classifier is confident about it, otherwise None.
+        """
+        script_type, margin = self.classify(text)
+        return script_type if margin >= CLASSIFIER_MIN_MARGIN else None
+
+    def looks_like_text(self, text):
+        """
+        Returns True if a text is confidently plain prose rather than code.
+        """
+        return self.guess(text) == "Text"
+
+
+def benchmark_classifier(directory, snippet_lines=12, seed=1):
+    """
+    Measures the language classifier on a labelled snippet corpus: files under 'directory' whose extension is
+    in IMPORT_EXTENSIONS, labelled with the type it maps to.
+
+    Description:
+        - One snippet of up to snippet_lines lines is taken from a random place in every file.
+        - Files are split in halves by a hash of their path. Accuracy is reported for the LANGUAGE_HINTS
+        alone (a new library) and after learning the first half (a library with scripts of those types),
+        always tested on the second half.
+        - Release helper: python main.py --classifier-benchmark <directory>
+
+    Returns:
+        str: The report.
+    """
+    rng = random.Random(seed)
+    snippets = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            script_type = IMPORT_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+            path = os.path.join(root, name)
+            if script_type not in LANGUAGE_HINTS or os.path.getsize(path) > IMPORT_MAX_FILE_SIZE:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = [line for line in f.read().splitlines() if line.strip()]
+            except (OSError, UnicodeDecodeError):
+                continue
+            if len(lines) < 3:
+                continue
+            start = rng.randrange(max(1, len(lines) - snippet_lines))
+            snippets.append((zlib.crc32(path.encode()) % 2, script_type, "\n".join(lines[start:start + snippet_lines])))
+    train = [(script_type, snippet) for half, script_type, snippet in snippets if half == 0]
+    test = [(script_type, snippet) for half, script_type, snippet in snippets if half == 1]
+    report = [f"{len(snippets)} snippets from {directory}, {len(test)} tested"]
+    classifier = LanguageClassifier()
+    classifier.version = LIBRARY_VERSION  # Learn only what is trained below, not the library
+    for label, learned in (("Hints only", []), ("Hints + first half", train)):
+        for index, (script_type, snippet) in enumerate(learned):
+            classifier.train(("benchmark", index), ScriptRecord(script_type=script_type, script_value=snippet))
+        per_type = {}
+        guessed = gated = text_blocked = code_blocked = 0
+        start = time.perf_counter()
+        for script_type, snippet in test:
+            predicted, margin = classifier.classify(snippet)
+            hits = per_type.setdefault(script_type, [0, 0])
+            hits[0] += predicted == script_type
+            hits[1] += 1
+            if margin >= CLASSIFIER_MIN_MARGIN:
+                guessed += 1
+                gated += predicted == script_type
+            if predicted == "Text" and margin >= CLASSIFIER_MIN_MARGIN:
+                text_blocked += script_type == "Text"
+                code_blocked += script_type != "Text"
+        elapsed = (time.perf_counter() - start) / max(1, len(test))
+        correct = sum(hits[0] for hits in per_type.values())
+        texts = per_type.get("Text", [0, 0])[1]
+        report.append(
+            f"{label}: accuracy {correct / max(1, len(test)):.1%}, "
+            f"prefilled {guessed / max(1, len(test)):.1%} of snippets with {gated / max(1, guessed):.1%} correct, "
+            f"kept from Gemini: {text_blocked / max(1, texts):.1%} of text, "
+            f"{code_blocked / max(1, len(test) - texts):.1%} of code, {elapsed * 1000:.2f} ms per snippet"
+        )
+        report.append("    " + ", ".join(
+            f"{script_type} {hits[0] / hits[1]:.0%} ({hits[1]})" for script_type, hits in sorted(per_type.items())
+        ))
+    return "\n".join(report)
+
+
+class AppHeader(ft.Container):
+    def __init__(self, page, container):
+        self.page = page
+        self.container = container
+        super().__init__()
+        self.expand = True
+        self.on_hover = lambda e: self.show_search_bar(e)
+        self.height = 60
+        self.bgcolor = "Transparent"
+        self.border_radius = ft.border_radius.only(top_left=15, top_right=15)
+        self.padding = ft.padding.only(left=15, right=15)
+        self.content = ft.Row(
+            expand=True,
+            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            controls=[
+                self.category_drawer_toggle(),
+                self.app_header_search(),
+                self.theme_toggle(),
+            ],
+        )
+        self.build()
 
     def category_drawer_toggle(self):
         return ft.Container(
@@ -367,7 +4426,7 @@ class AppHeader(ft.Container):
 
     def app_header_search(self):
         return ft.Container(
-            width=400,
+            width=580,
             bgcolor='white10',
             border_radius=6,
             opacity=0,
@@ -389,6 +4448,57 @@ class AppHeader(ft.Container):
                         hint_text="Search",
                         hint_style=ft.TextStyle(color="white10", weight=ft.FontWeight.NORMAL),
                         on_change=lambda e: self.container.search(e.control),
+                        on_submit=lambda e: self.container.search(e.control, submitted=True),
+                    ),
+                    ft.IconButton(
+                        icon=ft.icons.TRAVEL_EXPLORE,
+                        icon_size=17,
+                        icon_color="white",
+                        opacity=0.85,
+                        tooltip="Search all categories",
+                        on_click=lambda e: self.toggle_global_search(e),
+                        style=ft.ButtonStyle(
+                            color={"": ft.colors.WHITE, "selected": ft.colors.GREEN_ACCENT_700}
+                        ),
+                    ),
+                    ft.Icon(name=ft.icons.LABEL_OUTLINE, size=17, opacity=0.85, color="white"),
+                    ft.TextField(
+                        width=120,
+                        border_color='transparent',
+                        height=20,
+                        text_size=14,
+                        content_padding=0,
+                        cursor_color="white",
+                        cursor_width=1,
+                        color="white",
+                        hint_text="Tags",
+                        hint_style=ft.TextStyle(color="white10", weight=ft.FontWeight.NORMAL),
+                        tooltip="Filter all categories by tag: 'a b' both, 'a|b' either, '-a' without",
+                        on_change=lambda e: self.container.filter_by_tags(e.control),
+                    ),
+                    ft.IconButton(
+                        icon=ft.icons.DATA_OBJECT,
+                        icon_size=17,
+                        icon_color="white",
+                        opacity=0.85,
+                        tooltip="Regex search over script bodies, press Enter to search",
+                        on_click=lambda e: self.toggle_regex_search(e),
+                        style=ft.ButtonStyle(
+                            color={"": ft.colors.WHITE, "selected": ft.colors.GREEN_ACCENT_700}
+                        ),
+                    ),
+                    ft.IconButton(
+                        icon=ft.icons.PSYCHOLOGY_OUTLINED,
+                        icon_size=17,
+                        icon_color="white",
+                        opacity=0.85,
+                        tooltip="Search by meaning, e.g. 'disable user account', press Enter to search"
+                        if np is not None else "Search by meaning needs numpy",
+                        disabled=np is None,
+                        on_click=lambda e: self.toggle_semantic_search(e),
+                        style=ft.ButtonStyle(
+                            color={"": ft.colors.WHITE, "selected": ft.colors.GREEN_ACCENT_700}
+                        ),
                     ),
                     ft.IconButton(
                         icon=ft.icons.CLOSE_ROUNDED,
@@ -421,9 +4531,42 @@ class AppHeader(ft.Container):
 
     def clear_search_bar(self, e):
         self.content.controls[1].content.controls[1].value = ""
+        self.content.controls[1].content.controls[4].value = ""
+        self.content.controls[1].update()
+        self.container.search(self.content.controls[1].content.controls[1])
+
+    def toggle_global_search(self, e):
+        e.control.selected = not e.control.selected
+        self.container.global_search = e.control.selected
         self.content.controls[1].update()
         self.container.search(self.content.controls[1].content.controls[1])
 
+    def toggle_regex_search(self, e):
+        e.control.selected = not e.control.selected
+        self.container.regex_mode = e.control.selected
+        searchbar = self.content.controls[1].content.controls[1]
+        searchbar.hint_text = "Regex, Enter to search" if e.control.selected else "Search"
+        if e.control.selected:
+            self.content.controls[1].content.controls[6].selected = False
+            self.container.semantic_mode = False
+            # Worker processes take a moment to start, get them going before the first query
+            threading.Thread(target=self.container.regex_search.warm_up, daemon=True).start()
+        self.content.controls[1].update()
+        self.container.search(searchbar, submitted=True)
+
+    def toggle_semantic_search(self, e):
+        e.control.selected = not e.control.selected
+        self.container.semantic_mode = e.control.selected
+        searchbar = self.content.controls[1].content.controls[1]
+        searchbar.hint_text = "Describe the script, Enter to search" if e.control.selected else "Search"
+        if e.control.selected:
+            self.content.controls[1].content.controls[5].selected = False
+            self.container.regex_mode = False
+            # The first search after a start loads the vectors and embeds new scripts, do it in advance
+            threading.Thread(target=self.container.semantic_index.refresh, daemon=True).start()
+        self.content.controls[1].update()
+        self.container.search(searchbar, submitted=True)
+
     def change_theme(self, e):
         self.page.theme_mode = "light" if self.page.theme_mode == "dark" else "dark"
         self.content.controls[2].selected = not self.content.controls[2].selected
@@ -520,6 +4663,11 @@ class CustomDialog(ft.AlertDialog):
             value="",
             adaptive=True,
         )
+        self.compact_switch = ft.Switch(
+            value=COMPACT_ROWS,
+            label="Compact script list",
+            on_change=self.toggle_compact_rows,
+        )
         self.api_link = ft.TextButton(
             text="Need API Key?",
             on_click=lambda e: self.page.launch_url("https://aistudio.google.com/app/apikey"),
@@ -528,8 +4676,60 @@ class CustomDialog(ft.AlertDialog):
         self.update_button = ft.TextButton(
             text="Check for Updates",
             icon=ft.icons.UPDATE,
-            on_click=lambda e: self.check_latest_version(e),
+            on_click=self.check_latest_version,
+        )
+        self.import_picker = ft.FilePicker(on_result=self.import_picked)
+        self.export_picker = ft.FilePicker(on_result=self.export_picked)
+        self.duplicate_index = DuplicateIndex()
+        self.export_format = None
+        self.library_buttons = ft.Row(
+            [
+                ft.TextButton(
+                    text="Import Folder",
+                    icon=ft.icons.DRIVE_FOLDER_UPLOAD_OUTLINED,
+                    on_click=lambda e: self.import_picker.get_directory_path(dialog_title="Import Scripts"),
+                ),
+                ft.TextButton(
+                    text="Import Zip",
+                    icon=ft.icons.FOLDER_ZIP_OUTLINED,
+                    on_click=lambda e: self.import_picker.pick_files(
+                        dialog_title="Import Scripts",
+                        allowed_extensions=["zip"],
+                    ),
+                ),
+                ft.TextButton(
+                    text="Find Duplicates",
+                    icon=ft.icons.CONTENT_COPY_OUTLINED,
+                    on_click=self.find_duplicates,
+                ),
+                ft.PopupMenuButton(
+                    content=ft.Row(
+                        [
+                            ft.Icon(ft.icons.SAVE_ALT_OUTLINED, size=18),
+                            ft.Text("Export"),
+                        ],
+                        tight=True,
+                    ),
+                    tooltip="Export Scripts",
+                    items=[
+                        ft.PopupMenuItem(
+                            text="JSON Lines",
+                            on_click=lambda e: self.pick_export("jsonl"),
+                        ),
+                        ft.PopupMenuItem(
+                            text="Zip (one file per category)",
+                            on_click=lambda e: self.pick_export("zip"),
+                        ),
+                        ft.PopupMenuItem(
+                            text="Folder of source files",
+                            on_click=lambda e: self.pick_export("folder"),
+                        ),
+                    ],
+                ),
+            ],
         )
+        self.progress_bar = ft.ProgressBar(value=None, width=400)
+        self.progress_status = ft.Text()
         #endregion
 
         #region ScriptInputs
@@ -560,15 +4760,22 @@ class CustomDialog(ft.AlertDialog):
             expand=True,
         )
         self.markdown_render = MarkdownRender(None)
+        self.markdown_timer = None
+        self.guessed_type = None  # Type prefilled by the language classifier, replaced while the user types
+        self.notification_timer = None
         self.description = ft.TextField(
             label="Description",
             hint_text="",
             multiline=True,
             expand=True,
         )
+        self.tags = ft.TextField(
+            label="Tags",
+            hint_text="e.g. deploy ad cleanup",
+        )
         self.generate_description_button = ft.TextButton(
             text="Generate",
-            on_click=lambda e: self.explain_code(self.script_value.value),
+            on_click=self.generate_clicked,
             visible=GEMINI_ENABLED,
             disabled=True,
             tooltip="Generate Description Using Gemini",
@@ -578,6 +4785,7 @@ class CustomDialog(ft.AlertDialog):
 
         self.confirm_button = ft.TextButton(disabled=True)
         self.close_button = ft.TextButton()
+        self.history_button = ft.TextButton(text="History", icon=ft.icons.HISTORY)
 
     def build(self):
         pass
@@ -607,6 +4815,10 @@ class CustomDialog(ft.AlertDialog):
         self.update()
         self.page.update()
 
+    def toggle_compact_rows(self, e):
+        update_env_file("COMPACT_ROWS", self.compact_switch.value)
+        self.container.set_compact_rows(self.compact_switch.value)
+
     def save_settings(self):
         global GEMINI_API_KEY
         global GEMINI_ENABLED
@@ -634,6 +4846,10 @@ class CustomDialog(ft.AlertDialog):
 
     def open_dialog(self, dialog_title=None, dialog_type=None, dialog_message=None, function_ref=None):
         global GEMINI_API_KEY
+        if self.notification_timer is not None:
+            # A pending auto-dismiss belongs to the previous notification, not to this dialog
+            self.notification_timer.cancel()
+            self.notification_timer = None
         self.title.value = dialog_title
 
         if dialog_type == "start_up":
@@ -696,6 +4912,64 @@ class CustomDialog(ft.AlertDialog):
                 self.open = True
                 self.page.update()
 
+        elif dialog_type == "progress":
+            self.progress_bar.value = None
+            self.progress_status.value = dialog_message
+            self.content = ft.Column(
+                [
+                    self.progress_bar,
+                    self.progress_status,
+                ],
+                tight=True,
+            )
+            self.open = True
+            self.page.update()
+
+        elif dialog_type == "duplicates":
+            self.close_button.text = "Close"
+            self.close_button.on_click = lambda e: self.dismiss_dialog(False)
+            groups = []
+            for similarity, entries in dialog_message[:DUPLICATE_GROUPS_SHOWN]:
+                groups.append(
+                    ft.Text(
+                        "Identical" if similarity == 1.0 else f"Similar (~{similarity:.0%})",
+                        weight=ft.FontWeight.BOLD,
+                    )
+                )
+                for category, script_object in entries:
+                    groups.append(
+                        ft.Row(
+                            [
+                                ft.Text(f'{category} / {script_object.get("script_name")}', expand=True),
+                                ft.TextButton(
+                                    text="Keep only this",
+                                    tooltip="Delete the other scripts of this group",
+                                    on_click=lambda e, group=entries, keep=script_object: function_ref(group, keep),
+                                ),
+                            ],
+                        )
+                    )
+                groups.append(ft.Divider())
+            if not groups:
+                groups.append(ft.Text("No duplicate scripts found."))
+            elif len(dialog_message) > DUPLICATE_GROUPS_SHOWN:
+                groups.append(ft.Text(f"{len(dialog_message) - DUPLICATE_GROUPS_SHOWN} more groups not shown."))
+            self.content = ft.Column(
+                [
+                    ft.Column(groups, scroll=ft.ScrollMode.AUTO, height=self.page.window_height / 2),
+                    ft.Row(
+                        [
+                            self.close_button,
+                        ],
+                        alignment=ft.MainAxisAlignment.END,
+                    ),
+                ],
+                tight=True,
+                width=self.page.window_width / 2,
+            )
+            self.open = True
+            self.page.update()
+
         elif dialog_type == "user_input":
             self.confirm_button.disabled = True
             self.close_button.text = "Cancel"
@@ -747,8 +5021,7 @@ class CustomDialog(ft.AlertDialog):
                 self.content = ft.Text(value=dialog_message, text_align=ft.TextAlign.CENTER, )
                 self.page.dialog.open = True
                 self.page.update()
-                time.sleep(2)
-                self.dismiss_dialog(False)
+                self.notification_timer = self.page.run_task(self.dismiss_later, 2)
 
         elif dialog_type == "new_script":
             self.confirm_button.disabled = True
@@ -759,7 +5032,8 @@ class CustomDialog(ft.AlertDialog):
             self.confirm_button.on_click = lambda e: function_ref(self.script_type,
                                                                   self.script_name,
                                                                   self.script_value,
-                                                                  self.description
+                                                                  self.description,
+                                                                  self.tags
                                                                   )
             self.content = ft.Column(
                 [
@@ -780,6 +5054,7 @@ class CustomDialog(ft.AlertDialog):
                         expand=True
                     ),
                     self.description,
+                    self.tags,
                     self.generate_description_button,
                     ft.Row(
                         [
@@ -801,6 +5076,7 @@ class CustomDialog(ft.AlertDialog):
             self.confirm_button.text = "Save"
             self.confirm_button.icon = ft.icons.SAVE_OUTLINED
             self.confirm_button.on_click = lambda e: function_ref[0](e)
+            self.history_button.on_click = lambda e: function_ref[2](e)
             self.content = ft.Column(
                 [
                     self.script_type,
@@ -820,9 +5096,11 @@ class CustomDialog(ft.AlertDialog):
                         expand=True
                     ),
                     self.description,
+                    self.tags,
                     self.generate_description_button,
                     ft.Row(
                         [
+                            self.history_button,
                             self.close_button,
                             self.confirm_button,
                         ],
@@ -834,6 +5112,64 @@ class CustomDialog(ft.AlertDialog):
             self.open = True
             self.page.update()
 
+        elif dialog_type == "history":
+            versions, current_value = dialog_message
+            diff_view = MarkdownRender(None)
+            selected = {}
+
+            def show_version(version):
+                selected["version"] = version
+                diff = "".join(difflib.unified_diff(
+                    (version.get("script_value") or "").splitlines(keepends=True),
+                    (current_value or "").splitlines(keepends=True),
+                    fromfile="selected version",
+                    tofile="current",
+                ))
+                diff_view.update_value("diff", diff or "No changes to the script.")
+                self.confirm_button.disabled = False
+                self.page.update()
+
+            self.close_button.text = "Back"
+            self.close_button.on_click = lambda e: function_ref[1](e)
+            self.confirm_button.disabled = True
+            self.confirm_button.text = "Restore"
+            self.confirm_button.icon = ft.icons.RESTORE
+            self.confirm_button.on_click = lambda e: function_ref[0](selected["version"])
+            version_list = [
+                ft.ListTile(
+                    dense=True,
+                    title=ft.Text(time.strftime("%d-%b-%Y %H:%M:%S", time.localtime(version["timestamp"]))),
+                    subtitle=ft.Text(version.get("script_name")),
+                    on_click=lambda e, version=version: show_version(version),
+                )
+                for version in reversed(versions)
+            ]
+            if not version_list:
+                version_list.append(ft.Text("No earlier versions saved yet."))
+            self.content = ft.Column(
+                [
+                    ft.Row(
+                        [
+                            ft.Column(version_list, scroll=ft.ScrollMode.AUTO, width=250),
+                            ft.Column([diff_view], scroll=ft.ScrollMode.AUTO, expand=True),
+                        ],
+                        expand=True,
+                        vertical_alignment=ft.CrossAxisAlignment.START,
+                    ),
+                    ft.Row(
+                        [
+                            self.close_button,
+                            self.confirm_button,
+                        ],
+                        alignment=ft.MainAxisAlignment.END,
+                    ),
+                ],
+                width=self.page.window_width,
+                height=self.page.window_height / 1.5,
+            )
+            self.open = True
+            self.page.update()
+
         elif dialog_type == "delete_script":
             self.close_button.text = "Cancel"
             self.close_button.on_click = lambda e: self.dismiss_dialog(False)
@@ -924,6 +5260,41 @@ class CustomDialog(ft.AlertDialog):
             self.open = True
             self.page.update()
 
+        elif dialog_type == "smart_category":
+            name_input = ft.TextField(label="Name", value=dialog_message.name if dialog_message else "")
+            query_input = ft.TextField(
+                label="Query",
+                value=dialog_message.query if dialog_message else "",
+                hint_text="e.g. type = Powershell and body contains Get-AD",
+                helper_text="Fields: " + ", ".join(SMART_QUERY_FIELDS) + ". Operators: " +
+                            ", ".join(SMART_QUERY_OPERATORS) + ". Combine with and, or, not and (...).",
+                multiline=True,
+                on_submit=lambda e: function_ref(name_input, query_input),
+            )
+            self.close_button.text = "Cancel"
+            self.close_button.on_click = lambda e: self.dismiss_dialog(False)
+            self.confirm_button.disabled = False
+            self.confirm_button.text = "Save"
+            self.confirm_button.icon = ft.icons.SAVE_OUTLINED
+            self.confirm_button.on_click = lambda e: function_ref(name_input, query_input)
+            self.content = ft.Column(
+                [
+                    name_input,
+                    query_input,
+                    ft.Row(
+                        [
+                            self.close_button,
+                            self.confirm_button
+                        ],
+                        alignment=ft.MainAxisAlignment.END
+                    )
+                ],
+                tight=True,
+                width=500,
+            )
+            self.open = True
+            self.page.update()
+
         elif dialog_type == "settings":
             self.close_button.text = "Close"
             self.close_button.on_click = lambda e: self.dismiss_dialog(False)
@@ -940,7 +5311,9 @@ class CustomDialog(ft.AlertDialog):
                         ],
                     ),
                     self.api_link,
+                    self.compact_switch,
                     self.update_button,
+                    self.library_buttons,
                     ft.Row(
                         [
                             self.close_button,
@@ -959,12 +5332,53 @@ class CustomDialog(ft.AlertDialog):
             self.open = True
             self.page.update()
 
-    def update_markdown(self, e):
-        if self.script_type.value is not None:
-            self.markdown_render.update_value(self.script_type.value, self.script_value.value)
-        self.page.update()
+    async def dismiss_later(self, delay):
+        await asyncio.sleep(delay)
+        self.notification_timer = None
+        self.dismiss_dialog(False)
+
+    def update_markdown(self, e):
+        """
+        Schedules a re-render of the script preview once typing pauses for MARKDOWN_DEBOUNCE seconds.
+
+        This is called on every keystroke, so the wait is a task on the event loop that the next
+        keystroke cancels, and the rendering itself runs on a worker thread off the typing path.
+        """
+        if self.markdown_timer is not None:
+            self.markdown_timer.cancel()
+        self.markdown_timer = self.page.run_task(self.render_markdown_later)
+
+    async def render_markdown_later(self):
+        await asyncio.sleep(MARKDOWN_DEBOUNCE)
+        self.markdown_timer = None
+        await asyncio.to_thread(self.render_markdown)
+
+    def render_markdown(self):
+        if self.open and self.guess_script_type():
+            self.page.update()
+        if self.script_type.value is not None and self.open:
+            if self.markdown_render.update_value(self.script_type.value, self.script_value.value):
+                self.page.update()
+
+    def guess_script_type(self):
+        """
+        Prefills the type with the classifier's guess while the user hasn't picked one.
+
+        Returns:
+            bool: True if the type was changed.
+        """
+        if self.script_type.value not in (None, "", self.guessed_type) or not self.script_value.value:
+            return False
+        guess = self.container.language_classifier.guess(self.script_value.value)
+        if guess is None or guess == self.script_type.value:
+            return False
+        self.script_type.value = guess
+        self.script_type.error_text = ""
+        self.guessed_type = guess
+        return True
 
     def check_dropdown_value(self, e):
+        self.guessed_type = None  # Picked by the user, no longer overwritten by guesses
         self.update_markdown(e)
         if e.control.value is not None:
             e.control.error_text = ""
@@ -993,7 +5407,10 @@ class CustomDialog(ft.AlertDialog):
             self.generate_description_button.disabled = False
         self.page.update()
 
-    def explain_code(self, code_block):
+    async def generate_clicked(self, e):
+        await self.explain_code(self.script_value.value)
+
+    async def explain_code(self, code_block):
         """Explains a given code block using Google Generative AI.
 
         Args:
@@ -1018,18 +5435,22 @@ class CustomDialog(ft.AlertDialog):
             self.script_type.error_text = "Must choose a type"
             self.page.update()
 
+        elif await asyncio.to_thread(self.container.language_classifier.looks_like_text, code_block):
+            # Gemini would describe any text, only code is worth a request
+            self.script_value.error_text = "This looks like plain text rather than code, nothing was sent to Gemini"
+            self.page.update()
+
         else:
             if self.description.value != "":
                 self.description.value = ''
-                # TODO: Find a way to ensure that only actual code is sent and not other prompts.
                 prompt = f"Explain the following {self.script_type.value} code using only 1 to 2 sentences:\n{code_block}"
-                response = model.generate_content(prompt)
+                response = await model.generate_content_async(prompt)
                 self.description.value = response.text
                 self.page.update()
             else:
                 prompt = f"Explain the following {self.script_type.value} code using only 1 to 2 sentences:\n{code_block}"
                 try:
-                    response = model.generate_content(prompt)
+                    response = await model.generate_content_async(prompt)
                     self.description.value = response.text
                     self.page.update()
                 except Exception as e:
@@ -1047,7 +5468,13 @@ class CustomDialog(ft.AlertDialog):
             self.script_name.value = ""
             self.script_value.value = ""
             self.description.value = ""
+            self.tags.value = ""
+            self.guessed_type = None
             self.markdown_render.value = ""
+            self.markdown_render.rendered_key = None
+        if self.markdown_timer is not None:
+            self.markdown_timer.cancel()
+            self.markdown_timer = None
         self.open = False
         self.update()
         self.page.update()
@@ -1081,16 +5508,20 @@ class CustomDialog(ft.AlertDialog):
         self.dismiss_dialog(False)
         self.open_dialog(dialog_type="user_input", dialog_message=final_message)
 
-    def check_latest_version(self, e):
-        global GITHUB_API
+    async def check_latest_version(self, e):
+        """
+        Compares the latest release against __version__ and opens the matching dialog.
+
+        The request is awaited on the event loop, so the settings dialog stays responsive while GitHub answers.
+        """
         log_info("Checking for latest version...")
+        self.update_button.disabled = True
+        self.update_button.text = "Checking..."
+        self.page.update()
         try:
-            response = requests.get(GITHUB_API)
-            if response.status_code == 404:
-                log_error(f"Repository 'Christian-Boettcher/Scripz' not found or no releases available.")
+            latest_release = await fetch_latest_release()
+            if latest_release is None:
                 return
-            response.raise_for_status()
-            latest_release = response.json()
             latest_version = latest_release["tag_name"]
 
             if latest_version == __version__:
@@ -1103,31 +5534,83 @@ class CustomDialog(ft.AlertDialog):
                 )
                 log_info("Already using latest version.")
             else:
-                assets = latest_release["assets"]
-                if len(assets) > 0:
-                    asset_url = assets[0]["browser_download_url"]
+                asset = release_executable(latest_release["assets"])
+                if asset is not None:
+                    asset_url = asset["browser_download_url"]
+                    # GitHub publishes asset digests as "sha256:<hex>"
+                    asset_digest = (asset.get("digest") or "").removeprefix("sha256:") or None
+                    # Releases may ship a chunk manifest next to the executable to allow delta updates
+                    manifest_url = next(
+                        (manifest["browser_download_url"] for manifest in latest_release["assets"]
+                         if manifest["name"] == f'{asset["name"]}.chunks.json'),
+                        None
+                    )
                     self.dismiss_dialog(False)
                     self.open_dialog(
                         "Update!",
                         "download_notify",
                         f"There is a newer version ({latest_version}) available.",
-                        lambda: self.download_update(latest_version, asset_url)
+                        lambda: self.download_update(latest_version, asset_url, asset_digest, manifest_url)
                     )
                     log_info(f"There is a newer version ({latest_version}) available.")
                 else:
                     log_error("No assets found for the latest release.")
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             log_error(e)
+        finally:
+            self.update_button.disabled = False
+            self.update_button.text = "Check for Updates"
+            self.page.update()
 
-    def download_update(self, version, file_url):
+    def download_update(self, version, file_url, file_digest=None, manifest_url=None):
+        """
+        Starts downloading the update as a task on the event loop and shows its progress.
+
+        Parameters:
+            - version (str): The version being downloaded.
+            - file_url (str): The download URL of the release asset.
+            - file_digest (str): Optional SHA-256 hex digest the downloaded file is verified against.
+            - manifest_url (str): Optional URL of the release's chunk manifest, used for a delta update.
+        """
         self.dismiss_dialog(False)
         log_info(f"Downloading the latest version ({version})...")
+        self.open_dialog(
+            "Downloading Update...",
+            "progress",
+            f"Downloading Scripz {version}...",
+            None
+        )
+        self.page.run_task(self.run_download, version, file_url, file_digest, manifest_url)
+
+    async def run_download(self, version, file_url, file_digest, manifest_url):
+        """
+        Task for download_update, fetches the update and reports the outcome in a dialog.
+
+        If the release has a chunk manifest, only the parts that differ from the installed build are downloaded.
+        Any problem with the delta update falls back to streaming the full file. An interrupted full download
+        leaves a '.part' file behind which is resumed on the next attempt.
+        """
         filename = os.path.join(".\\data\\", os.path.basename(file_url))
+        last_percent = [-1]
+
+        def report_progress(downloaded, total):
+            # Only push an update to the client when the visible percentage changes
+            if total:
+                percent = int(downloaded * 100 / total)
+                if percent == last_percent[0]:
+                    return
+                last_percent[0] = percent
+                self.progress_bar.value = downloaded / total
+                self.progress_status.value = f"{downloaded / 1048576:.1f} / {total / 1048576:.1f} MB ({percent}%)"
+            else:
+                self.progress_status.value = f"{downloaded / 1048576:.1f} MB"
+            self.page.update()
+
         try:
-            response = requests.get(file_url)
-            response.raise_for_status()
-            with open(filename, 'wb') as file:
-                file.write(response.content)
+            if not (manifest_url and await self.download_delta(file_url, filename, file_digest, manifest_url,
+                                                               report_progress)):
+                await download_file(file_url, filename, file_digest, report_progress, version)
+            self.dismiss_dialog(False)
             self.open_dialog(
                 "Update Downloaded!",
                 "download_notify",
@@ -1137,9 +5620,166 @@ class CustomDialog(ft.AlertDialog):
             log_info(f"Downloaded '{filename}' successfully.")
 
             atexit.register(handle_update)
-            sys.exit()
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, ValueError, OSError) as e:
+            log_error(e)
+            self.dismiss_dialog(False)
+            self.open_dialog(
+                "Update Failed!",
+                "download_notify",
+                f"Downloading Scripz {version} failed.\nCheck for updates again to resume the download.",
+                None
+            )
+
+    async def download_delta(self, file_url, filename, file_digest, manifest_url, progress_callback):
+        """
+        Attempts a delta update against the installed build.
+
+        Returns:
+            bool: True if the update was rebuilt from a delta, False if the full download is needed.
+        """
+        installed_path = sys.executable if getattr(sys, "frozen", False) else \
+            os.path.join(os.path.dirname(__file__), "Scripz.exe")
+        if not await asyncio.to_thread(os.path.exists, installed_path):
+            return False
+        try:
+            response = await http_client().get(manifest_url)
+            response.raise_for_status()
+            manifest = response.json()
+            if file_digest and manifest["sha256"] != file_digest.lower():
+                raise ValueError("Chunk manifest does not match the release asset.")
+            downloaded = await apply_chunk_delta(installed_path, manifest, file_url, filename, progress_callback)
+            log_info(f"Delta update downloaded {downloaded} of {manifest['size']} bytes.")
+            return True
+        except (httpx.HTTPError, ValueError, KeyError, OSError) as e:
+            log_error(f"Delta update failed, falling back to full download: {e}")
+            return False
+
+    async def import_picked(self, e):
+        """
+        Imports the folder or zip chosen in the file picker on a worker thread and refreshes the category drawer.
+        """
+        path = e.path or (e.files[0].path if e.files else None)
+        if not path:
+            return
+        log_info(f"Importing scripts from '{path}'...")
+        self.dismiss_dialog(False)
+        self.open_dialog("Importing Scripts...", "progress", "Looking for scripts...", None)
+
+        def report_progress(processed, total):
+            self.progress_bar.value = processed / total
+            self.progress_status.value = f"Imported {processed} of {total} files..."
+            self.page.update()
+
+        try:
+            added = await asyncio.to_thread(import_scripts, path, report_progress)
+            self.page.drawer.refresh_categories(added)
+            self.dismiss_dialog(False)
+            self.open_dialog(
+                "Import Complete!",
+                "download_notify",
+                f"Imported {sum(added.values())} scripts into {len(added)} categories.",
+                None
+            )
+        except (OSError, zipfile.BadZipFile) as e:
+            log_error(e)
+            self.dismiss_dialog(False)
+            self.open_dialog("Import Failed!", "download_notify", f"Importing '{path}' failed:\n{e}", None)
+
+    def pick_export(self, export_format):
+        self.export_format = export_format
+        if export_format == "folder":
+            self.export_picker.get_directory_path(dialog_title="Export Scripts")
+        else:
+            self.export_picker.save_file(
+                dialog_title="Export Scripts",
+                file_name=f"scripz.{export_format}",
+                allowed_extensions=[export_format],
+            )
+
+    async def export_picked(self, e):
+        """
+        Exports to the chosen file or folder on a worker thread and reports the outcome in a dialog.
+        """
+        if not e.path:
+            return
+        path = e.path
+        self.dismiss_dialog(False)
+        self.open_dialog("Exporting Scripts...", "progress", "Exporting scripts...", None)
+
+        def report_progress(exported, total):
+            self.progress_bar.value = exported / total
+            self.progress_status.value = f"Exported {exported} of {total} scripts..."
+            self.page.update()
+
+        try:
+            exported = await asyncio.to_thread(export_scripts, path, self.export_format, report_progress)
+            self.dismiss_dialog(False)
+            self.open_dialog("Export Complete!", "download_notify", f"Exported {exported} scripts.", None)
+        except (OSError, ValueError) as e:
             log_error(e)
+            self.dismiss_dialog(False)
+            self.open_dialog("Export Failed!", "download_notify", f"Exporting to '{path}' failed:\n{e}", None)
+
+    async def find_duplicates(self, e):
+        """
+        Scans for duplicate scripts on a worker thread and opens the merge view.
+        """
+        self.dismiss_dialog(False)
+        self.open_dialog("Finding Duplicates...", "progress", "Comparing scripts...", None)
+        await asyncio.to_thread(self.run_find_duplicates)
+
+    def run_find_duplicates(self):
+        groups = [(1.0, entries) for entries in self.duplicate_index.exact_groups()]
+        groups.extend(sorted(self.duplicate_index.near_groups(), key=lambda group: group[0], reverse=True))
+        self.dismiss_dialog(False)
+        self.open_dialog(
+            f"Duplicates ({len(groups)} groups)",
+            "duplicates",
+            groups,
+            lambda group, keep: self.confirm_merge_duplicates(group, keep),
+        )
+
+    def confirm_merge_duplicates(self, group, keep):
+        """
+        Asks before "Keep only this" deletes the other scripts of a duplicate group, listing them and whether
+        their body differs from the kept one. Cancel goes back to the duplicates view.
+        """
+        removed = [(category, script_object) for category, script_object in group
+                   if script_object.script_id != keep.script_id]
+        keep_value = (keep.get("script_value") or "").replace("\r\n", "\n").strip()
+        lines = [
+            f'{category} / {script_object.get("script_name")}' + (
+                "" if (script_object.get("script_value") or "").replace("\r\n", "\n").strip() == keep_value
+                else " (differs)"
+            )
+            for category, script_object in removed[:DUPLICATE_GROUPS_SHOWN]
+        ]
+        if len(removed) > DUPLICATE_GROUPS_SHOWN:
+            lines.append(f"and {len(removed) - DUPLICATE_GROUPS_SHOWN} more")
+        self.dismiss_dialog(False)
+        self.open_dialog(
+            dialog_title="Please confirm",
+            dialog_type="delete_script",
+            dialog_message=f"Keep '{keep.get('script_name')}' and delete these {len(removed)} scripts?\n\n"
+                           + "\n".join(lines),
+            function_ref=lambda: self.merge_duplicates(group, keep),
+        )
+        self.close_button.on_click = lambda e: self.run_find_duplicates()
+        self.page.update()
+
+    def merge_duplicates(self, group, keep):
+        """
+        Keeps one script of a duplicate group and deletes the others.
+
+        Parameters:
+            - group (list): (category, script_object) tuples of the group.
+            - keep (ScriptRecord): The script object to keep.
+        """
+        changed = SCRIPTS.delete(script_object.script_id for _, script_object in group
+                                 if script_object.script_id != keep.script_id)
+        log_info(f"Merged {len(group)} duplicate scripts into '{keep.get('script_name')}'.")
+        self.page.drawer.refresh_categories(changed)
+        self.run_find_duplicates()
 
 
 class CategoryDrawer(ft.NavigationDrawer):
@@ -1156,6 +5796,12 @@ class CategoryDrawer(ft.NavigationDrawer):
             ),
             tooltip="Add New Category",
         )
+        self.add_smart_button = ft.IconButton(
+            icon=ft.icons.FILTER_ALT_OUTLINED,
+            on_click=lambda e: self.edit_smart_category(e, None),
+            style=ft.ButtonStyle(color={"": ft.colors.GREEN}),
+            tooltip="Add Smart Category",
+        )
         self.new_category_input = ft.TextField(
             label="New Category",
             visible=False,
@@ -1167,11 +5813,18 @@ class CategoryDrawer(ft.NavigationDrawer):
 
     def build(self):
         self.controls = [
-            self.add_button,
+            ft.Row([self.add_button, self.add_smart_button]),
             self.new_category_input,
             ft.Divider(),
         ]
-        self.on_change = self.change_page
+        self.on_change = self.category_selected
+
+    async def category_selected(self, e):
+        """
+        Handles a destination picked in the drawer. Switching only renders the first page of the category
+        from memory, so it runs straight on the event loop.
+        """
+        self.change_page(e)
 
     def change_page(self, e):
         """
@@ -1183,47 +5836,104 @@ class CategoryDrawer(ft.NavigationDrawer):
 
         Description:
         - This function changes the page and performs several actions.
-        - It cleans the scripts in the script container, updates the page and script container, and iterates through the controls.
-        - If a control is a ft.NavigationDrawerDestination and its index matches the selected index, it retrieves the corresponding category from SCRIPT_OBJECTS.
-        - For each script object in the category, it adds a ft.DragTarget with a ft.Draggable containing the script object to the script container.
-        - It updates the script container's container_title with the category name and updates the page and script container.
+        - It iterates through the controls and finds the ft.NavigationDrawerDestination whose index matches the selected index.
+        - The matching category is shown by the script container, which reuses the category's controls if it was opened before.
+        - Smart categories are shown from their materialized members the same way.
         - If the 'e' parameter is not None, it sets the 'open' attribute to False.
         - Finally, it updates the instance.
 
         """
         global SCRIPT_OBJECTS
-        self.script_container.scripts.clean()
-        self.page.update()
-        for control in self.controls:
-            if isinstance(control, ft.NavigationDrawerDestination):
-                if self.controls.index(control) - 3 == self.selected_index:
-                    for category in SCRIPT_OBJECTS:
-                        if category == self.controls[self.controls.index(control)].__getattribute__("label"):
-                            for script_object in SCRIPT_OBJECTS.get(category):
-                                self.script_container.scripts.controls.append(
-                                    ft.DragTarget(
-                                        content=ft.Draggable(
-                                            content=ScriptObject(
-                                                page=self.page,
-                                                container=self.script_container,
-                                                script_type=script_object.get("script_type"),
-                                                script_name=script_object.get("script_name"),
-                                                script_value=script_object.get("script_value"),
-                                                description=script_object.get("script_description"),
-                                            )
-                                        ),
-                                        on_accept=self.script_container.accept_drop
-                                    )
-                                )
-                            self.script_container.container_title.value = category
-                            self.script_container.container_title.update()
-                    self.page.update()
-                    self.script_container.update()
-                    self.open = False
-                    self.update()
+        if self.selected_index is not None and 0 <= self.selected_index < len(self.controls) - 3:
+            control = self.controls[self.selected_index + 3]
+            if isinstance(control, SmartCategoryNav):
+                self.script_container.show_smart_category(control.smart)
+            elif control.label in SCRIPT_OBJECTS:
+                self.script_container.show_category(control.label)
+            self.open = False
+            self.update()
         if e is not None:
             self.open = False
 
+    def keep_selection(self, category):
+        """
+        Points selected_index back at a category after navigation options were added, removed or moved.
+
+        Parameters:
+            - category (str | SmartCategory): The category that should stay selected, usually the one being shown.
+
+        Returns:
+            bool: False if the category no longer has a navigation option.
+        """
+        for index, control in enumerate(self.controls):
+            if isinstance(control, SmartCategoryNav) and control.smart is category or \
+                    isinstance(control, CategoryNav) and control.label == category:
+                self.selected_index = index - 3
+                return True
+        return False
+
+    def shown_category(self):
+        view = self.script_container.view
+        if view is None:
+            return None
+        return view["smart"] if view["smart"] is not None else view["category"]
+
+    def insert_category_nav(self, category):
+        """
+        Adds the navigation option of a category after the other categories, smart categories stay below them.
+        """
+        index = next(
+            (index for index, control in enumerate(self.controls) if isinstance(control, SmartCategoryNav)),
+            len(self.controls)
+        )
+        self.controls.insert(index, CategoryNav(page=self.page, drawer=self, category_name=category))
+
+    def select_category(self, category):
+        """
+        Selects the navigation option of a category and shows it.
+
+        Parameters:
+            - category (str): The name of the category to show.
+        """
+        for index, control in enumerate(self.controls):
+            if isinstance(control, CategoryNav) and control.label == category:
+                self.selected_index = index - 3
+                self.change_page(None)
+                break
+
+    def refresh_categories(self, categories):
+        """
+        Adds navigation options for new categories, removes those of deleted categories and re-renders
+        categories whose scripts changed.
+
+        Parameters:
+            - categories (iterable): The names of the categories that were added, changed or deleted.
+        """
+        existing = {control.label for control in self.controls if isinstance(control, CategoryNav)}
+        shown = self.shown_category()
+        for category in categories:
+            if category not in existing and category in SCRIPT_OBJECTS:
+                self.insert_category_nav(category)
+        self.controls = [
+            control for control in self.controls
+            if not isinstance(control, CategoryNav) or control.label in SCRIPT_OBJECTS
+        ]
+        # Changed categories are diffed against their rendered rows instead of being rebuilt
+        self.script_container.refresh_views(categories)
+        if len(self.controls) >= 4:
+            self.script_container.add_script_button.visible = True
+            if not self.keep_selection(shown) and (
+                    self.selected_index is None or self.selected_index > len(self.controls) - 4):
+                self.selected_index = 0
+            self.update_nav_options()
+            self.change_page(None)
+        else:
+            self.script_container.scripts.controls = []
+            self.script_container.container_title.value = "Scripz"
+            self.script_container.add_script_button.visible = False
+            self.update_nav_options()
+        self.page.update()
+
     def update_nav_options(self):
         """
         Updates the navigation options based on the controls in the page.
@@ -1231,31 +5941,16 @@ class CategoryDrawer(ft.NavigationDrawer):
         Description:
         - This function iterates through the controls and updates the navigation options based on their position in the list of controls.
         - It enables or disables the UP and DOWN options for each control based on its position.
+        - Smart categories stay below the categories, so they don't count as a position to move to.
 
         """
-        for control in self.controls:
-            if isinstance(control, ft.NavigationDrawerDestination):
-                up = self.controls[self.controls.index(control)].__getattribute__("icon_content").controls[0].items[2]
-                down = self.controls[self.controls.index(control)].__getattribute__("icon_content").controls[0].items[3]
-                # If only 1 category
-                if len(self.controls) == 4:
-                    up.disabled = True
-                    down.disabled = True
-
-                # If the category is at the bottom
-                elif self.controls.index(control) == len(self.controls) - 1:
-                    up.disabled = False
-                    down.disabled = True
-
-                # If the category is at the top
-                elif self.controls.index(control) == 3:
-                    up.disabled = True
-                    down.disabled = False
-
-                # If the category is anywhere in between
-                else:
-                    up.disabled = False
-                    down.disabled = False
+        categories = [control for control in self.controls if isinstance(control, CategoryNav)]
+        for index, control in enumerate(categories):
+            up = control.icon_content.controls[0].items[2]
+            down = control.icon_content.controls[0].items[3]
+            # The top category can't move up, the bottom one can't move down
+            up.disabled = index == 0
+            down.disabled = index == len(categories) - 1
         self.page.update()
 
     def add_nav_option(self, e):
@@ -1286,9 +5981,9 @@ class CategoryDrawer(ft.NavigationDrawer):
         global SCRIPT_OBJECTS
         if e.control.value != "":
             self.add_button.selected = False
-            self.controls.append(CategoryNav(self.page, self, self.new_category_input.value))
+            self.insert_category_nav(self.new_category_input.value)
             self.update_nav_options()
-            write_json_file(category=self.new_category_input.value)
+            SCRIPTS.add(self.new_category_input.value)
             self.selected_index = list(SCRIPT_OBJECTS).index(self.new_category_input.value)
             self.script_container.add_script_button.visible = True
             self.change_page(None)
@@ -1336,17 +6031,19 @@ class CategoryDrawer(ft.NavigationDrawer):
             - new_label (str): The new label for the category.
 
         """
-        global SCRIPT_OBJECTS
-        item_to_rename = None
-        for category in SCRIPT_OBJECTS:
-            if category == ref.label:
-                item_to_rename = category
-        SCRIPT_OBJECTS = {new_label if k == item_to_rename else k: v for k, v in SCRIPT_OBJECTS.items()}
+        item_to_rename = ref.label
+        if not SCRIPTS.rename_category(item_to_rename, new_label):
+            log_error(f"Can't rename '{item_to_rename}' to '{new_label}', the category is gone or the name is taken.")
+            self.page.dialog.dismiss_dialog(False)
+            return
+        if item_to_rename in self.script_container.category_controls:
+            self.script_container.category_controls[new_label] = \
+                self.script_container.category_controls.pop(item_to_rename)
+            self.script_container.category_controls[new_label]["category"] = new_label
         index = self.controls.index(ref)
         self.controls.remove(ref)
         self.controls.insert(index, CategoryNav(page=self.page, drawer=self, category_name=new_label))
         self.update_nav_options()
-        write_json_file(update=True)
 
         if index - 3 == self.selected_index:
             self.script_container.container_title.value = new_label
@@ -1383,19 +6080,18 @@ class CategoryDrawer(ft.NavigationDrawer):
             - ref (object): The reference object representing the category to be removed.
 
         """
-        global SCRIPT_OBJECTS
         self.controls.pop(self.controls.index(ref))
-        item_to_remove = None
-        for category in SCRIPT_OBJECTS:
-            if category == ref.label:
-                item_to_remove = category
-        SCRIPT_OBJECTS.pop(item_to_remove)
-        write_json_file(update=True)
-        self.script_container.scripts.clean()
+        item_to_remove = ref.label
+        SCRIPTS.remove_category(item_to_remove)
+        self.script_container.category_controls.pop(item_to_remove, None)
         if len(self.controls) >= 4:
-            self.selected_index = 0
+            # Another category stays on screen as it is, only removing the shown one switches the page
+            if not self.keep_selection(self.shown_category()):
+                self.selected_index = 0
             self.change_page(None)
         else:
+            # Detach rather than clean() so no cached controls are torn down
+            self.script_container.scripts.controls = []
             self.script_container.container_title.value = "Scripz"
             self.script_container.add_script_button.visible = False
 
@@ -1421,29 +6117,101 @@ class CategoryDrawer(ft.NavigationDrawer):
             - After the movement, the function updates the navigation drawer and the page.
 
         """
-        is_selected = False
-        if self.controls.index(category_object) - 3 == self.selected_index:
-            is_selected = True
         if direction == "up":
             self.move_category_to_index(self.controls, category_object, self.controls.index(category_object) - 1)
-            if is_selected:
-                self.selected_index = self.controls.index(category_object) - 3
-                self.change_page(None)
 
         elif direction == "down":
             self.move_category_to_index(self.controls, category_object, self.controls.index(category_object) + 1)
-            if is_selected:
-                self.selected_index = self.controls.index(category_object) - 3
-                self.change_page(None)
 
         self.page.update()
 
     def move_category_to_index(self, controls_list, element, target_index):
+        """
+        Moves a navigation option. The selection follows the shown category, so the script list is left untouched.
+        """
         if element in controls_list:
+            shown = self.shown_category()
             controls_list.remove(element)
             controls_list.insert(target_index, element)
+            self.keep_selection(shown)
             self.update_nav_options()
-            self.change_page(None)
+
+    def edit_smart_category(self, event, smart):
+        """
+        Opens the dialog to add a smart category, or to change one if smart is given.
+
+        Parameters:
+            - event: The event that triggered the function.
+            - smart (SmartCategory): The smart category to change, None to add one.
+        """
+        self.page.dialog.open_dialog(
+            dialog_title="Edit Smart Category" if smart is not None else "New Smart Category",
+            dialog_type="smart_category",
+            dialog_message=smart,
+            function_ref=lambda name_input, query_input: self.confirm_smart_category(smart, name_input, query_input)
+        )
+
+    def confirm_smart_category(self, smart, name_input, query_input):
+        """
+        Saves a new or changed smart category and shows it, or points out what's wrong in the dialog.
+
+        Parameters:
+            - smart (SmartCategory): The smart category being changed, None if a new one is added.
+            - name_input (ft.TextField): The name field of the dialog.
+            - query_input (ft.TextField): The query field of the dialog.
+        """
+        name = name_input.value.strip()
+        taken = {control.label for control in self.controls if isinstance(control, ft.NavigationDrawerDestination)}
+        if smart is not None:
+            taken.discard(smart.name)
+        name_input.error_text = "Must not be empty!" if not name else "Name is taken!" if name in taken else None
+        query_input.error_text = None
+        try:
+            if smart is None:
+                smart = SmartCategory(name, query_input.value)
+                nav = SmartCategoryNav(page=self.page, drawer=self, smart=smart)
+            else:
+                parse_smart_query(query_input.value)
+                nav = None
+        except ValueError as e:
+            query_input.error_text = str(e)
+        if name_input.error_text or query_input.error_text:
+            self.page.dialog.update()
+            return
+        if nav is not None:
+            self.controls.append(nav)
+        else:
+            smart.set_query(name, query_input.value)
+            for control in self.controls:
+                if isinstance(control, SmartCategoryNav) and control.smart is smart:
+                    control.label = name
+        write_smart_categories([control.smart for control in self.controls if isinstance(control, SmartCategoryNav)])
+        self.page.dialog.dismiss_dialog(False)
+        self.script_container.show_smart_category(smart)
+        self.keep_selection(smart)
+        self.update()
+
+    def remove_smart_category(self, event, nav):
+        """
+        Removes a smart category. Its scripts stay where they are, only the saved query is deleted.
+
+        Parameters:
+            - event: The event that triggered the function.
+            - nav (SmartCategoryNav): The navigation option of the smart category.
+        """
+        shown = self.shown_category()
+        self.controls.remove(nav)
+        self.script_container.smart_controls.pop(nav.smart, None)
+        write_smart_categories([control.smart for control in self.controls if isinstance(control, SmartCategoryNav)])
+        if not self.keep_selection(shown):
+            self.selected_index = 0
+            if len(self.controls) >= 4:
+                self.change_page(None)
+            else:
+                self.script_container.scripts.controls = []
+                self.script_container.container_title.value = "Scripz"
+                self.script_container.add_script_button.visible = False
+        self.page.update()
 
     def update_drawer(self):
         """
@@ -1464,6 +6232,13 @@ class CategoryDrawer(ft.NavigationDrawer):
         if SCRIPT_OBJECTS:
             for object_category in SCRIPT_OBJECTS:
                 self.controls.append(CategoryNav(page=self.page, drawer=self, category_name=object_category))
+        for entry in read_smart_categories():
+            try:
+                smart = SmartCategory(entry["name"], entry["query"])
+            except (KeyError, TypeError, ValueError) as e:
+                log_error(f"Skipping smart category {entry!r}: {e}")
+                continue
+            self.controls.append(SmartCategoryNav(page=self.page, drawer=self, smart=smart))
 
         if len(self.controls) >= 4:
             self.script_container.add_script_button.visible = True
@@ -1522,6 +6297,37 @@ class CategoryNav(ft.NavigationDrawerDestination):
         return self
 
 
+class SmartCategoryNav(ft.NavigationDrawerDestination):
+    def __init__(self, page, drawer, smart):
+        super().__init__()
+        self.page = page
+        self.drawer = drawer
+        self.smart = smart
+        self.label = smart.name
+        self.icon_content = ft.Row(
+            [
+                ft.PopupMenuButton(
+                    items=[
+                        ft.PopupMenuItem(
+                            icon=ft.icons.EDIT,
+                            text="Edit",
+                            on_click=lambda event: self.drawer.edit_smart_category(event, self.smart)
+                        ),
+                        ft.PopupMenuItem(
+                            icon=ft.icons.DELETE_OUTLINE,
+                            text="Delete",
+                            on_click=lambda event: self.drawer.remove_smart_category(event, self)
+                        ),
+                    ],
+                ),
+                ft.Icon(ft.icons.FILTER_ALT_OUTLINED, ),
+            ]
+        )
+
+    def build(self):
+        return self
+
+
 class MarkdownRender(ft.Markdown):
     def __init__(self, value):
         super().__init__()
@@ -1530,32 +6336,188 @@ class MarkdownRender(ft.Markdown):
         self.extension_set = ft.MarkdownExtensionSet.GITHUB_FLAVORED
         self.code_theme = "atom-one-dark"
         self.code_style = ft.TextStyle(font_family="Roboto Mono")
+        self.rendered_key = None
+
+    def update_value(self, script_type: str, script_value: str):
+        """
+        Renders a script as a fenced code block.
+
+        Description:
+            - Rendered markdown is cached in MARKDOWN_CACHE per (type, content hash), so switching back to
+            a previous state of the script is free.
+            - Scripts longer than MARKDOWN_PREVIEW_MAX_LINES lines (or MARKDOWN_PREVIEW_MAX_CHARS characters)
+            are truncated with a note, keeping huge scripts from stalling the client.
+
+        Returns:
+            bool: True if the value changed and the control needs an update.
+        """
+        script_value = script_value or ""
+        key = (script_type, hashlib.sha1(script_value.encode("utf-8")).hexdigest())
+        if key == self.rendered_key:
+            return False
+        value = MARKDOWN_CACHE.get(key)
+        if value is None:
+            lines = script_value.split("\n", MARKDOWN_PREVIEW_MAX_LINES)
+            preview = "\n".join(lines[:MARKDOWN_PREVIEW_MAX_LINES])[:MARKDOWN_PREVIEW_MAX_CHARS]
+            #  Markdown being stupid and requires it formatted this way
+            value = f"""
+
+```{script_type.lower()}
+{preview}
+```
+"""
+            if len(preview) < len(script_value):
+                shown_lines = preview.count("\n") + 1
+                total_lines = script_value.count("\n") + 1
+                value += f"\n*Preview truncated, showing {shown_lines} of {total_lines} lines.*\n"
+            MARKDOWN_CACHE[key] = value
+            if len(MARKDOWN_CACHE) > MARKDOWN_CACHE_SIZE:
+                MARKDOWN_CACHE.popitem(last=False)
+        else:
+            MARKDOWN_CACHE.move_to_end(key)
+        self.value = value
+        self.rendered_key = key
+        return True
+
+
+class ScriptActions:
+    """
+    Behaviour shared by the full (ScriptObject) and compact (ScriptRow) list rows of a script.
+
+    The row classes set page, container, record and markdown_render, and implement refresh_display.
+    """
+
+    @property
+    def script_id(self):
+        return self.record.script_id
+
+    @property
+    def script_type(self):
+        return self.record.script_type
+
+    @property
+    def script_name(self):
+        return self.record.script_name
+
+    @property
+    def script_value(self):
+        return self.record.script_value
+
+    @property
+    def description(self):
+        return self.record.script_description
+
+    def edit_clicked(self, e):
+        self.page.dialog.script_type.value = self.script_type
+        self.page.dialog.script_name.value = self.script_name
+        self.page.dialog.script_value.value = self.script_value
+        self.page.dialog.description.value = self.description
+        self.page.dialog.tags.value = " ".join(self.record.script_tags)
+        self.page.dialog.update_markdown(None)
+        self.page.dialog.open_dialog(
+            dialog_title=f'Edit {self.script_name}',
+            dialog_type="edit_script",
+            function_ref=[
+                lambda event: self.save_clicked(event),
+                lambda event: self.cancel_clicked(event),
+                lambda event: self.history_clicked(event),
+            ]
+        )
+
+    def save_clicked(self, e):
+        # The record may have been replaced by a merge of changes made elsewhere, so it is looked up by id
+        record = SCRIPTS.update(
+            self.script_id,
+            script_type=self.page.dialog.script_type.value,
+            script_name=self.page.dialog.script_name.value,
+            script_value=self.page.dialog.script_value.value,
+            script_description=self.page.dialog.description.value,
+            script_tags=self.page.dialog.tags.value,
+        )
+        if record is not None:
+            self.record = record
+        self.refresh_display()
+        self.update()
+        self.page.dialog.dismiss_dialog(True)
+        self.container.refresh_smart_view()
+
+    def history_clicked(self, e):
+        """
+        Opens the version history of the script, loading it from disk only now.
+        """
+        versions = load_script_history(self.script_id)
+        self.page.dialog.open_dialog(
+            dialog_title=f'History of {self.script_name}',
+            dialog_type="history",
+            dialog_message=(versions, self.page.dialog.script_value.value),
+            function_ref=[
+                lambda version: self.restore_version(version),
+                lambda event: self.edit_clicked(event),
+            ]
+        )
+
+    def restore_version(self, version):
+        """
+        Loads an older version into the edit dialog. It only replaces the current version once saved.
+        """
+        self.edit_clicked(None)
+        self.page.dialog.script_type.value = version.get("script_type")
+        self.page.dialog.script_name.value = version.get("script_name")
+        self.page.dialog.script_value.value = version.get("script_value")
+        self.page.dialog.description.value = version.get("script_description")
+        if "script_tags" in version:  # Versions saved before tags existed keep the current tags
+            self.page.dialog.tags.value = " ".join(version["script_tags"])
+        self.page.dialog.update_markdown(None)
+        self.page.update()
+
+    def preview_message(self):
+        """
+        Returns the hover preview of the script.
 
-    def update_value(self, script_type: str, script_value: str):
-        #  Markdown being stupid and requires it formatted this way
-        self.value = f"""
+        Only the first TOOLTIP_PREVIEW_LINES lines (at most TOOLTIP_PREVIEW_CHARS characters) of the script are shown.
+        """
+        script_value = self.script_value or ""
+        lines = script_value.split("\n", TOOLTIP_PREVIEW_LINES)
+        preview = "\n".join(lines[:TOOLTIP_PREVIEW_LINES])[:TOOLTIP_PREVIEW_CHARS]
+        if len(preview) < len(script_value):
+            preview += "\n..."
+        tags = f'Tags: {" ".join("#" + tag for tag in self.record.script_tags)}\n' if self.record.script_tags else ""
+        return f'Type: {self.script_type}\nDescription: {self.description}\n{tags}Script Value: \n{preview}'
 
-```{script_type.lower()}
-{script_value}
-```
-"""
+    def cancel_clicked(self, e):
+        self.update_markdown(None)
+        self.page.dialog.dismiss_dialog(True)
+
+    def delete_clicked(self, e):
+        self.container.delete_script(self)
+
+    async def copy_to_clipboard(self, e):
+        if self.container.container_title.value == "Search":
+            self.page.drawer.change_page(None)
+        await asyncio.to_thread(record_script_usage, self.script_id)
+        self.page.dialog.open_dialog(dialog_type="user_input", dialog_message=self.script_value)
+
+    def update_markdown(self, e):
+        self.markdown_render.update_value(self.script_type, self.script_value)
+        self.page.update()
 
 
-class ScriptObject(ft.Column):
-    def __init__(self, page, container, script_type, script_name, script_value, description):
+class ScriptObject(ScriptActions, ft.Column):
+    def __init__(self, page, container, record):
         super().__init__()
         self.page = page
         self.container = container
-        self.script_type = script_type
-        self.script_name = script_name
-        self.script_value = script_value
-        self.description = description
+        self.record = record  # The ScriptRecord in SCRIPT_OBJECTS, the script_* properties read through to it
+        self.key = record.script_id  # Lets the script list scroll back to this script after paging
         self.markdown_render = MarkdownRender(None)
+        self.preview_loaded = False
+        # The tooltip message is filled in on first hover so script bodies aren't sent with every row
         self.display_script_name = ft.Tooltip(
-            message=f'Type: {self.script_type}\nDescription: {self.description}\nScript Value: \n{self.script_value}',
+            message="",
             content=ft.TextButton(
                 text=self.script_name,
                 on_click=self.copy_to_clipboard,
+                on_hover=self.load_preview,
             ),
             padding=10,
             border_radius=10,
@@ -1599,62 +6561,61 @@ class ScriptObject(ft.Column):
             )
         ]
 
-    def edit_clicked(self, e):
-        self.page.dialog.script_type.value = self.script_type
-        self.page.dialog.script_name.value = self.script_name
-        self.page.dialog.script_value.value = self.script_value
-        self.page.dialog.description.value = self.description
-        self.page.dialog.update_markdown(None)
-        self.page.dialog.open_dialog(
-            dialog_title=f'Edit {self.script_name}',
-            dialog_type="edit_script",
-            function_ref=[lambda event: self.save_clicked(event), lambda event: self.cancel_clicked(event)]
-        )
-
-    def save_clicked(self, e):
-        global SCRIPT_OBJECTS
-        for script_dict in SCRIPT_OBJECTS[self.container.container_title.value]:
-            if script_dict["script_name"] == self.script_name:
-                script_dict["script_type"] = self.page.dialog.script_type.value
-                script_dict["script_name"] = self.page.dialog.script_name.value
-                script_dict["script_value"] = self.page.dialog.script_value.value
-                script_dict["script_description"] = self.page.dialog.description.value
-                break
-        self.script_type = self.page.dialog.script_type.value
-        self.script_name = self.page.dialog.script_name.value
-        self.script_value = self.page.dialog.script_value.value
-        self.description = self.page.dialog.description.value
+    def refresh_display(self):
         self.display_script_name.content.text = self.script_name
-        write_json_file(
-            self.container.container_title.value,
-            self.script_type,
-            self.script_name,
-            self.script_value,
-            self.description,
-            update=True
-        )
-        self.update()
-        self.page.dialog.dismiss_dialog(True)
+        self.display_script_name.message = ""
+        self.preview_loaded = False
 
-    def cancel_clicked(self, e):
-        self.update_markdown(None)
-        self.page.dialog.dismiss_dialog(True)
+    def load_preview(self, e):
+        """
+        Fills in the hover tooltip the first time the script name is hovered.
+        """
+        if e.data != "true" or self.preview_loaded:
+            return
+        self.display_script_name.message = self.preview_message()
+        self.preview_loaded = True
+        self.display_script_name.update()
 
-    def delete_clicked(self, e):
-        self.container.delete_script(self)
 
-    def copy_to_clipboard(self, e):
-        if self.container.container_title.value == "Search":
-            self.container.container_title.value = self.page.drawer.controls[self.page.drawer.selected_index + 3].label
-            self.container.container_title.value.update()
-            for index in self.container.scripts.controls:
-                index.visible = True
-            self.container.update()
-        self.page.dialog.open_dialog(dialog_type="user_input", dialog_message=self.script_value)
+class ScriptRow(ScriptActions, ft.TextButton):
+    """
+    Compact list row used when COMPACT_ROWS is on.
 
-    def update_markdown(self, e):
-        self.markdown_render.update_value(self.script_type, self.script_value)
-        self.page.update()
+    A ScriptObject is about ten controls (card, rows, tooltip and buttons), this is a single text button.
+    Clicking selects the row, copying, editing and deleting go through the toolbar the ScriptContainer
+    shares between all rows.
+    """
+    SELECTED_STYLE = ft.ButtonStyle(bgcolor=ft.colors.with_opacity(0.15, ft.colors.PRIMARY))
+
+    def __init__(self, page, container, record):
+        super().__init__()
+        self.page = page
+        self.container = container
+        self.record = record
+        self.key = record.script_id
+        self.markdown_render = MarkdownRender(None)
+        self.preview_loaded = False
+        self.text = record.script_name
+        self.on_click = self.select_clicked
+        self.on_hover = self.load_preview
+
+    def refresh_display(self):
+        self.text = self.script_name
+        self.tooltip = None
+        self.preview_loaded = False
+
+    def load_preview(self, e):
+        """
+        Sets the tooltip to the script preview the first time the row is hovered.
+        """
+        if e.data != "true" or self.preview_loaded:
+            return
+        self.tooltip = self.preview_message()
+        self.preview_loaded = True
+        self.update()
+
+    def select_clicked(self, e):
+        self.container.select_row(self)
 
 
 class ScriptContainer(ft.Column):
@@ -1668,7 +6629,44 @@ class ScriptContainer(ft.Column):
             scroll=ft.ScrollMode.ALWAYS,
             width=self.page.window_width,
             adaptive=True,
+            on_scroll=self.scripts_scrolled,
+            on_scroll_interval=100,
+        )
+        self.search_results = ft.Column(
+            height=self.page.window_height - 275,
+            scroll=ft.ScrollMode.ALWAYS,
+            width=self.page.window_width,
+            adaptive=True,
+            visible=False,
+        )
+        self.category_controls = {}  # Rendered page window per category, reused when a category is re-opened
+        self.smart_controls = {}  # Rendered page window per SmartCategory
+        self.view = None  # The page window shown in self.scripts
+        self.page_lock = threading.Lock()
+        self.selected_row = None  # The ScriptRow the row toolbar acts on
+        self.row_actions = ft.Row(
+            [
+                ft.IconButton(icon=ft.icons.CONTENT_COPY_OUTLINED, tooltip="Copy", on_click=self.copy_selected_row),
+                ft.IconButton(icon=ft.icons.CREATE_OUTLINED, tooltip="Edit", on_click=self.edit_selected_row),
+                ft.IconButton(ft.icons.DELETE_OUTLINE, tooltip="Delete", on_click=self.delete_selected_row),
+            ],
+            spacing=0,
+            visible=False,
         )
+        self.global_search = False
+        self.regex_mode = False
+        self.regex_search = RegexSearch()
+        self.result_spans = {}  # script_id -> match offsets of the shown regex results
+        self.semantic_mode = False
+        self.semantic_index = SemanticIndex()
+        self.result_scores = {}  # script_id -> similarity of the shown semantic results
+        self.language_classifier = LanguageClassifier()
+        self.tag_index = TagIndex()
+        self.tagbar = None
+        self.global_results = []
+        self.result_counts = Counter()
+        self.results_shown = 0
+        self.searchbar = None
         self.add_script_button = ft.FloatingActionButton(
             icon=ft.icons.ADD,
             on_click=lambda e: self.page.dialog.open_dialog(
@@ -1687,88 +6685,339 @@ class ScriptContainer(ft.Column):
             ft.Row(
                 controls=[
                     self.container_title,
+                    self.row_actions,
                     self.add_script_button,
                 ],
                 alignment=ft.MainAxisAlignment.END
             ),
             ft.Divider(),
             self.scripts,
+            self.search_results,
             ft.Divider(),
         ]
         load_script_objects()
 
-    def build(self):
-        global SCRIPT_OBJECTS
-        if SCRIPT_OBJECTS:
-            for category in SCRIPT_OBJECTS:
-                for item in SCRIPT_OBJECTS[category]:
-                    script_type = item.get("script_type")
-                    script_name = item.get("script_name")
-                    script_value = item.get("script_value")
-                    description = item.get("script_description")
-                    self.scripts.controls.append(
-                        ft.DragTarget(
-                            content=ft.Draggable(
-                                content=ScriptObject(
-                                    page=self.page,
-                                    container=self,
-                                    script_type=script_type,
-                                    script_name=script_name,
-                                    script_value=script_value,
-                                    description=description,
-                                )
-                            ),
-                            on_accept=self.accept_drop
-                        )
-                    )
+    def build_script_control(self, script_object, cursor=None):
+        """
+        Builds the draggable list control for a script object, a ScriptRow if COMPACT_ROWS is on.
+
+        Parameters:
+            - script_object (ScriptRecord): The script as stored in SCRIPT_OBJECTS.
+            - cursor (tuple): The script's cursor from iter_category, kept as the control's data for paging.
+        """
+        row_class = ScriptRow if COMPACT_ROWS else ScriptObject
+        return ft.DragTarget(
+            data=cursor,
+            content=ft.Draggable(
+                content=row_class(page=self.page, container=self, record=script_object)
+            ),
+            on_accept=self.accept_drop
+        )
 
-    def accept_drop(self, e: ft.DragTargetAcceptEvent):
+    def select_row(self, row):
         """
-        Handles the event when a drag-and-drop operation is accepted on a specific control.
+        Selects a compact row and shows the row toolbar, or hides it if row is None.
 
         Parameters:
-            - e (ft.DragTargetAcceptEvent): The event object containing information about the drag-and-drop operation.
+            - row (ScriptRow): The row to select.
         """
-        if self.container_title.value != "Search":
-            src = self.page.get_control(e.src_id)
-            src_index = None
-            object_to_move = None
-            object_destination = None
-            destination_index = self.scripts.controls.index(e.control)
-            for i, x in enumerate(self.scripts.controls):
-                if x.content.content.script_name == src.content.script_name and x.content.content.script_value == src.content.script_value:
-                    src_index = i
-                    break
+        if self.selected_row is not None:
+            self.selected_row.style = None
+        self.selected_row = row
+        if row is not None:
+            row.style = ScriptRow.SELECTED_STYLE
+        self.row_actions.visible = row is not None
+        self.update()
 
-            with open(SCRIPTS_FILE, "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
+    async def copy_selected_row(self, e):
+        if self.selected_row is not None:
+            await self.selected_row.copy_to_clipboard(e)
 
-            for i, item in enumerate(existing_data.get(self.container_title.value, [])):
-                if item.get("script_name") == src.content.script_name and item.get(
-                        "script_value") == src.content.script_value:
-                    object_to_move = i
-                    break
+    def edit_selected_row(self, e):
+        if self.selected_row is not None:
+            self.selected_row.edit_clicked(e)
 
-            for i, item in enumerate(existing_data.get(self.container_title.value, [])):
-                if (item.get("script_name") == self.scripts.controls[
-                    destination_index].content.content.script_name and item.get("script_value") ==
-                        self.scripts.controls[destination_index].content.content.script_value):
-                    object_destination = i
-                    break
+    def delete_selected_row(self, e):
+        if self.selected_row is not None:
+            self.selected_row.delete_clicked(e)
+
+    def set_compact_rows(self, compact):
+        """
+        Switches between full and compact rows, re-rendering the shown category.
+
+        Parameters:
+            - compact (bool): True for compact rows.
+        """
+        global COMPACT_ROWS
+        COMPACT_ROWS = compact
+        self.category_controls.clear()
+        self.smart_controls.clear()
+        view, self.view = self.view, None
+        if view is not None and view["smart"] is not None:
+            self.show_smart_category(view["smart"])
+        elif view is not None and view["category"] in SCRIPT_OBJECTS:
+            self.show_category(view["category"])
+
+    def show_category(self, category):
+        """
+        Displays a category in the script list.
+
+        Description:
+            - Only the first CATEGORY_PAGE_SIZE scripts are rendered, further pages are loaded while scrolling.
+            - The rendered window of a category is kept in category_controls, so re-opening the category
+            (e.g. from a global search result) swaps it back in instead of rebuilding every ScriptObject.
+
+        Parameters:
+            - category (str): The name of the category to show.
+        """
+        view = self.category_controls.get(category)
+        if view is not None and self.view is view and self.scripts.visible and self.container_title.value == category:
+            return  # Already shown, nothing to send to the client
+        if view is None:
+            view = self.new_view(category)
+            self.load_page(view)
+            self.category_controls[category] = view
+        self.show_view(view)
+        self.container_title.value = category
+        self.add_script_button.visible = True
+        self.update()
+
+    def show_smart_category(self, smart):
+        """
+        Displays the members of a smart category in the script list, paged like a category.
+
+        Description:
+            - The members are brought up to date from the changes made since the smart category was last shown,
+            and a cached window is reconciled rather than rebuilt.
+            - New scripts need a real category, so the add button is hidden.
+
+        Parameters:
+            - smart (SmartCategory): The smart category to show.
+        """
+        changed = smart.refresh()
+        view = self.smart_controls.get(smart)
+        if view is not None and changed:
+            self.reconcile_view(view)
+        if view is not None and self.view is view and self.scripts.visible and self.container_title.value == smart.name:
+            self.update()
+            return
+        if view is None:
+            view = self.new_view(None, smart=smart)
+            self.load_page(view)
+            self.smart_controls[smart] = view
+        self.show_view(view)
+        self.container_title.value = smart.name
+        self.add_script_button.visible = False
+        self.update()
+
+    def refresh_smart_view(self):
+        """
+        Updates the shown smart category after a script was changed from its list, the script may have left it.
+        """
+        view = self.view
+        if view is not None and view["smart"] is not None and view["smart"].refresh() and \
+                self.reconcile_view(view) and self.scripts.visible:
+            self.scripts.update()
+
+    @staticmethod
+    def new_view(category, match=None, smart=None):
+        """
+        Creates an empty page window over a category or a smart category.
+
+        Parameters:
+            - category (str): The category to page through, None for a smart category.
+            - match (callable): Optional filter, only matching scripts are shown.
+            - smart (SmartCategory): The smart category to page through instead of a category.
+        """
+        return {"category": category, "smart": smart, "match": match, "controls": [], "more_before": False,
+                "more_after": True}
+
+    @staticmethod
+    def iter_view(view, cursor=None, reverse=False):
+        if view["smart"] is not None:
+            return view["smart"].iter_members(cursor, reverse=reverse, match=view["match"])
+        return iter_category(view["category"], cursor, reverse=reverse, match=view["match"])
+
+    def show_view(self, view):
+        if self.selected_row is not None:
+            self.selected_row.style = None
+            self.selected_row = None
+            self.row_actions.visible = False
+        self.view = view
+        self.scripts.controls = view["controls"]
+        self.scripts.visible = True
+        self.search_results.visible = False
+
+    def load_page(self, view, backwards=False):
+        """
+        Renders the next (or previous) page of a window and releases pages beyond CATEGORY_MAX_PAGES.
+
+        Description:
+            - Pages are read through iter_view, starting at the cursor of the first or last rendered script.
+            - When the window grows beyond CATEGORY_MAX_PAGES pages, the pages at the other end are dropped and
+            loaded again if the user scrolls back to them.
+
+        Parameters:
+            - view (dict): The window as created by new_view.
+            - backwards (bool): Load the page before the first rendered script instead of after the last.
+
+        Returns:
+            str: The key of the script the list should be scrolled to so the visible scripts don't jump,
+            None if no scrolling is needed.
+        """
+        controls = view["controls"]
+        max_controls = CATEGORY_PAGE_SIZE * CATEGORY_MAX_PAGES
+        edge = (controls[0] if backwards else controls[-1]) if controls else None
+        page_objects = list(islice(
+            self.iter_view(view, edge.data if edge else None, reverse=backwards),
+            CATEGORY_PAGE_SIZE + 1
+        ))
+        more = len(page_objects) > CATEGORY_PAGE_SIZE
+        page_controls = [
+            self.build_script_control(script_object, cursor)
+            for cursor, script_object in page_objects[:CATEGORY_PAGE_SIZE]
+        ]
+        if backwards:
+            view["more_before"] = more
+            page_controls.reverse()
+            controls[0:0] = page_controls
+            if len(controls) > max_controls:
+                del controls[max_controls:]
+                view["more_after"] = True
+            return edge.content.content.key if edge is not None and page_controls else None
+        view["more_after"] = more
+        controls.extend(page_controls)
+        if len(controls) > max_controls:
+            del controls[:len(controls) - max_controls]
+            view["more_before"] = True
+            return edge.content.content.key if edge is not None else None
+        return None
+
+    def reconcile_view(self, view):
+        """
+        Brings a rendered window in line with SCRIPT_OBJECTS after scripts were added, changed, moved or removed.
+
+        Description:
+            - The window is read again from its first rendered script and diffed against the rendered rows by script_id.
+            - Rows whose script is unchanged are kept and only get their cursor updated. Rows are only built for
+            inserted scripts or scripts replaced by a merge or sync, and rows of removed scripts are dropped.
+            - The controls list is changed in place, so Flet only sends the inserted, removed and moved rows
+            to the client instead of the whole category.
+
+        Parameters:
+            - view (dict): The window as created by new_view.
+
+        Returns:
+            bool: True if any row was inserted, removed or moved.
+        """
+        with self.page_lock:
+            controls = view["controls"]
+            if view["more_after"]:
+                limit = max(len(controls), CATEGORY_PAGE_SIZE)
+            else:
+                # The end of the category is rendered, so scripts appended to it belong in the window
+                limit = CATEGORY_PAGE_SIZE * CATEGORY_MAX_PAGES
+            with SCRIPTS.read():
+                start = None
+                if controls and view["more_before"]:
+                    start = next(self.iter_view(view, controls[0].data, reverse=True), (None, None))[0]
+                page_objects = list(islice(self.iter_view(view, start), limit + 1))
+            rows = {control.content.content.script_id: control for control in controls}
+            desired = []
+            for cursor, script_object in page_objects[:limit]:
+                control = rows.pop(cursor[1], None)
+                if control is None or control.content.content.record is not script_object:
+                    control = self.build_script_control(script_object, cursor)
+                else:
+                    control.data = cursor
+                desired.append(control)
+            changed = len(desired) != len(controls) or any(a is not b for a, b in zip(desired, controls))
+            controls[:] = desired
+            if self.selected_row is not None and view is self.view and \
+                    all(control.content.content is not self.selected_row for control in desired):
+                self.selected_row = None
+                self.row_actions.visible = False
+            view["more_before"] = start is not None
+            view["more_after"] = len(page_objects) > limit
+            return changed
+
+    def refresh_views(self, categories):
+        """
+        Reconciles the cached windows of changed categories and drops those of deleted ones.
+
+        Parameters:
+            - categories (iterable): The names of the categories whose scripts changed.
+        """
+        shown_changed = False
+        for category in categories:
+            view = self.category_controls.get(category)
+            if category not in SCRIPT_OBJECTS:
+                self.category_controls.pop(category, None)
+            elif view is not None and self.reconcile_view(view) and view is self.view:
+                shown_changed = True
+        # Smart categories only test the scripts that changed, so all of them are kept current
+        for smart, view in self.smart_controls.items():
+            if smart.refresh() and self.reconcile_view(view) and view is self.view:
+                shown_changed = True
+        # A filtered search window isn't cached, reconcile it if its category changed
+        if self.view is not None and self.view["match"] is not None and (
+                self.view["category"] in categories or self.view["smart"] is not None):
+            shown_changed = self.reconcile_view(self.view) or shown_changed
+        if shown_changed and self.scripts.visible:
+            self.scripts.update()
+
+    def scripts_scrolled(self, e: ft.OnScrollEvent):
+        """
+        Loads the next or previous page of the shown category when the script list is scrolled near its end or start.
+        """
+        view = self.view
+        if view is None or self.scripts.controls is not view["controls"]:
+            return
+        if e.pixels >= e.max_scroll_extent - SCROLL_LOAD_THRESHOLD and view["more_after"]:
+            backwards = False
+        elif e.pixels <= e.min_scroll_extent + SCROLL_LOAD_THRESHOLD and view["more_before"]:
+            backwards = True
+        else:
+            return
+        if not self.page_lock.acquire(blocking=False):
+            return  # A page is already being loaded
+        try:
+            anchor = self.load_page(view, backwards)
+            self.scripts.update()
+            if anchor is not None:
+                self.scripts.scroll_to(key=anchor, duration=0)
+        finally:
+            self.page_lock.release()
+
+    async def accept_drop(self, e: ft.DragTargetAcceptEvent):
+        """
+        Handles the event when a drag-and-drop operation is accepted on a specific control.
 
+        The swap is saved on a worker thread. The rows are located again afterwards, since other
+        events may have paged the list while the library was being written.
+
+        Parameters:
+            - e (ft.DragTargetAcceptEvent): The event object containing information about the drag-and-drop operation.
+        """
+        # Smart categories are sorted by name and span categories, so their scripts can't be reordered
+        if self.container_title.value != "Search" and self.view is not None and self.view["smart"] is None:
+            src = self.page.get_control(e.src_id)
+            if not any(x.content.content is src.content for x in self.scripts.controls):
+                return  # The dragged script was released from the list while dragging
+            if not await asyncio.to_thread(SCRIPTS.swap, src.content.script_id, e.control.content.content.script_id):
+                return
+            src_index = next(
+                (i for i, x in enumerate(self.scripts.controls) if x.content.content is src.content), None
+            )
+            if src_index is None or e.control not in self.scripts.controls:
+                return
+            destination_index = self.scripts.controls.index(e.control)
             self.scripts.controls[src_index], self.scripts.controls[destination_index] = (
                 self.scripts.controls[destination_index], self.scripts.controls[src_index]
             )
-
-            SCRIPT_OBJECTS[self.container_title.value][object_to_move], SCRIPT_OBJECTS[self.container_title.value][
-                object_destination] = (
-                SCRIPT_OBJECTS[self.container_title.value][object_destination],
-                SCRIPT_OBJECTS[self.container_title.value][object_to_move]
-            )
-            write_json_file(update=True)
             self.update()
 
-    def create_new_script(self, script_type, script_name, script_value, script_description):
+    def create_new_script(self, script_type, script_name, script_value, script_description, script_tags):
         """
         Creates a new script and performs necessary actions.
 
@@ -1781,27 +7030,18 @@ class ScriptContainer(ft.Column):
         - self: The current instance of the class.
 
         """
-        self.scripts.controls.append(
-            ft.DragTarget(
-                content=ft.Draggable(
-                    content=ScriptObject(
-                        page=self.page,
-                        container=self,
-                        script_type=script_type.value,
-                        script_name=script_name.value,
-                        script_value=script_value.value,
-                        description=script_description.value,
-                    )
-                ),
-                on_accept=self.accept_drop
-            )
-        )
-        write_json_file(self.container_title.value,
-                        script_type.value,
-                        script_name.value,
-                        script_value.value,
-                        script_description.value
-                        )
+        record = write_json_file(self.container_title.value,
+                                 script_type.value,
+                                 script_name.value,
+                                 script_value.value,
+                                 script_description.value,
+                                 tags=script_tags.value
+                                 )
+        view = self.category_controls.get(self.container_title.value)
+        if record is not None and view is not None and not view["more_after"]:
+            # The new script is last in its category, so it only belongs in the window if the end is rendered
+            cursor = (len(SCRIPT_OBJECTS[self.container_title.value]) - 1, record.script_id)
+            view["controls"].append(self.build_script_control(record, cursor))
         self.page.dialog.dismiss_dialog(True)
         self.update()
 
@@ -1821,68 +7061,336 @@ class ScriptContainer(ft.Column):
             - This function confirms the deletion of a script by searching for a matching script name in the controls list.
             - If a match is found, the script is removed from the controls list, the page is updated, and the dialog is dismissed.
 
-            - Additionally, the function attempts to remove the script details from a JSON file by loading the existing data,
-            finding the index of the script with the matching script name, removing it from the list, and writing the updated
-            data back to the JSON file.
-            - If the JSON file is not found, an error message is logged.
+            - Additionally, the function removes the script from SCRIPT_OBJECTS by its id through SCRIPTS,
+            which writes the updated data back to the JSON file.
 
         Parameters:
             - self: The current instance of the class.
             - script: The script object to be deleted.
 
         """
-        global SCRIPT_OBJECTS
-        # Find the index of the script with the matching script_name and script_value in scripts container and remove it.
+        if script is self.selected_row:
+            self.select_row(None)
+        # Remove the script's control from the scripts container.
         for index, x in enumerate(self.scripts.controls):
-            if x.content.content.script_name == script.script_name and x.content.content.script_value == script.script_value:
-                self.scripts.controls.remove(self.scripts.controls[index])
+            if x.content.content is script:
+                self.scripts.controls.pop(index)
                 self.scripts.update()
-            self.page.dialog.dismiss_dialog(False)
-            try:
-                with open(SCRIPTS_FILE, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
-
-                # Find the index of the script with the matching script_name and script_value in json file.
-                index_to_remove = None
-                for i, item in enumerate(existing_data.get(self.container_title.value, [])):
-                    if item.get("script_name") == script.script_name and item.get(
-                            "script_value") == script.script_value:
-                        index_to_remove = i
-                        break
-
-                # Remove the script from the list in the json.
-                if index_to_remove is not None:
-                    existing_data[self.container_title.value].pop(index_to_remove)
-                    SCRIPT_OBJECTS[self.container_title.value].pop(index_to_remove)
-
-                # Write the updated data back to the JSON file
-                with open(SCRIPTS_FILE, "w", encoding="utf-8") as f:
-                    json.dump(existing_data, f, ensure_ascii=False, indent=4)
-            except FileNotFoundError:
-                log_error(f".\\{SCRIPTS_FILE} not found. Unable to remove script from JSON.")
+                break
+        self.page.dialog.dismiss_dialog(False)
 
-    def search(self, searchbar):
+        # Remove the script by id, SCRIPTS writes the updated data back to the JSON file
+        SCRIPTS.delete([script.script_id])
+
+    def search(self, searchbar, submitted=False):
+        self.searchbar = searchbar
+        if self.tag_query:
+            self.show_tag_results()
+            return
+        if self.regex_mode and searchbar.value != "":
+            # Patterns are only run once submitted, half typed ones are often invalid or expensive
+            if submitted:
+                self.show_regex_results(searchbar.value)
+            return
+        if self.semantic_mode and searchbar.value != "":
+            if submitted:
+                self.show_semantic_results(searchbar.value)
+            return
+        if self.global_search and searchbar.value != "":
+            self.show_global_results(searchbar.value)
+            return
+        selected = self.page.drawer.controls[self.page.drawer.selected_index + 3]
         if searchbar.value != "":
+            query = searchbar.value
+            smart = selected.smart if isinstance(selected, SmartCategoryNav) else None
+            # Matches are paged through like the category itself, so searching a large category stays cheap
+            view = self.new_view(
+                None if smart is not None else selected.label,
+                match=lambda script_object: (
+                        query.capitalize() in (script_object.get("script_name") or "")
+                        or query in (script_object.get("script_type") or "")
+                        or query in (script_object.get("script_value") or "")
+                ),
+                smart=smart
+            )
+            self.load_page(view)
+            self.show_view(view)
             self.container_title.value = "Search"
-            self.container_title.update()
-            for i, x in enumerate(self.scripts.controls):
-                if (
-                        searchbar.value.capitalize() in x.content.content.script_name
-                        or searchbar.value in x.content.content.script_type
-                        or searchbar.value in x.content.content.script_value
-                ):
-                    self.scripts.controls[i].visible = True
-                else:
-                    self.scripts.controls[i].visible = False
+            self.update()
+        else:
+            self.page.drawer.change_page(None)
+
+    def show_global_results(self, query):
+        """
+        Searches all categories and shows the first page of results, grouped by category.
+
+        Parameters:
+            - query (str): The text to search for.
+        """
+        self.show_results(list(search_script_objects(query)), "No results found in any category.")
+
+    def show_regex_results(self, pattern):
+        """
+        Searches the bodies of all scripts for a regex and shows the matches with the matched text highlighted.
+
+        Parameters:
+            - pattern (str): The regex.
+        """
+        try:
+            results = self.regex_search.search(pattern)
+        except re.error as e:
+            self.show_results([], f"Invalid pattern: {e}")
+            return
+        except Exception as e:
+            self.show_results([], f"Search stopped: {e}")
+            return
+        self.show_results(
+            [(category, script_object) for category, script_object, _ in results],
+            "No script matches this pattern.",
+            spans={script_object.script_id: spans for _, script_object, spans in results}
+        )
+
+    def show_semantic_results(self, query):
+        """
+        Shows the scripts closest in meaning to a query, best match first.
+
+        Parameters:
+            - query (str): What the script does, in words.
+        """
+        try:
+            results = self.semantic_index.search(query)
+        except Exception as e:
+            log_error(f"Semantic search failed: {e}")
+            self.show_results([], f"Search stopped: {e}")
+            return
+        self.show_results(
+            [(category, script_object) for category, script_object, _ in results],
+            "No script is close to this description.",
+            scores={script_object.script_id: score for _, script_object, score in results}
+        )
+
+    def filter_by_tags(self, tagbar):
+        """
+        Filters all categories by a tag query (see TagIndex.query), or goes back to the search or category
+        once the query is cleared.
+
+        Parameters:
+            - tagbar (ft.TextField): The tag filter field of the header.
+        """
+        self.tagbar = tagbar
+        if self.tag_query:
+            self.show_tag_results()
+        elif self.searchbar is not None:
+            self.search(self.searchbar)
+        else:
+            self.page.drawer.change_page(None)
+
+    @property
+    def tag_query(self):
+        return self.tagbar.value.strip() if self.tagbar is not None and self.tagbar.value else ""
+
+    def show_tag_results(self):
+        """
+        Shows the scripts matching the tag query, narrowed down by the header search text if there is any.
+        """
+        results = self.tag_index.query(self.tag_query)
+        text = self.searchbar.value.casefold() if self.searchbar is not None and self.searchbar.value else ""
+        if text:
+            results = [
+                (category, script_object) for category, script_object in results
+                if text in (script_object.get("script_name") or "").casefold()
+                or text in (script_object.get("script_type") or "").casefold()
+                or text in (script_object.get("script_value") or "").casefold()
+            ]
+        self.show_results(results, "No scripts match these tags.")
+
+    def show_results(self, results, empty_message, spans=None, scores=None):
+        """
+        Shows the first page of results spanning several categories, grouped by category.
+
+        Parameters:
+            - results (list): (category, script_object) tuples, grouped by category.
+            - empty_message (str): Shown if there are no results.
+            - spans (dict): script_id -> match offsets in the script's body, shown instead of the description.
+            - scores (dict): script_id -> similarity. Results are then ranked rather than grouped, each one
+            showing its category and score.
+        """
+        self.container_title.value = "Search"
+        self.result_spans = spans or {}
+        self.result_scores = scores or {}
+        self.global_results = results
+        self.result_counts = Counter(category for category, _ in self.global_results)
+        self.results_shown = 0
+        self.search_results.controls = []
+        if not self.global_results:
+            self.search_results.controls.append(ft.Text(empty_message))
+        self.scripts.visible = False
+        self.search_results.visible = True
+        self.render_search_page()
+
+    def render_search_page(self):
+        """
+        Appends the next SEARCH_PAGE_SIZE global search results, followed by a "Show more" button if any are left.
+        """
+        controls = self.search_results.controls
+        if controls and isinstance(controls[-1], ft.TextButton):
+            controls.pop()  # Remove the previous "Show more" button
+        previous_category = self.global_results[self.results_shown - 1][0] if self.results_shown else None
+        page_results = self.global_results[self.results_shown:self.results_shown + SEARCH_PAGE_SIZE]
+        for category, script_object in page_results:
+            score = self.result_scores.get(script_object.get("script_id"))
+            if score is not None:
+                controls.append(
+                    ft.ListTile(
+                        dense=True,
+                        title=ft.Text(script_object.get("script_name")),
+                        subtitle=ft.Text(
+                            f'{score:.0%} - {category} - {script_object.get("script_type")} - '
+                            f'{script_object.get("script_description") or ""}',
+                            max_lines=1,
+                            overflow=ft.TextOverflow.ELLIPSIS,
+                        ),
+                        on_click=lambda e, result_category=category: self.jump_to_result(result_category),
+                    )
+                )
+                continue
+            if category != previous_category:
+                controls.append(
+                    ft.Text(f"{category} ({self.result_counts[category]})", size=18, weight=ft.FontWeight.BOLD)
+                )
+                previous_category = category
+            controls.append(
+                ft.ListTile(
+                    dense=True,
+                    title=ft.Text(script_object.get("script_name")),
+                    subtitle=ft.Text(
+                        f'{script_object.get("script_type")} - {script_object.get("script_description") or ""}'
+                        + "".join(f" #{tag}" for tag in script_object.get("script_tags") or ()),
+                        max_lines=1,
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                    ) if script_object.get("script_id") not in self.result_spans else ft.Text(
+                        spans=match_preview(script_object.get("script_value") or "",
+                                            self.result_spans[script_object.get("script_id")]),
+                        max_lines=2,
+                        overflow=ft.TextOverflow.ELLIPSIS,
+                    ),
+                    on_click=lambda e, result_category=category: self.jump_to_result(result_category),
+                )
+            )
+        self.results_shown += len(page_results)
+        remaining = len(self.global_results) - self.results_shown
+        if remaining > 0:
+            controls.append(
+                ft.TextButton(
+                    text=f"Show more ({remaining} left)",
+                    on_click=lambda e: self.render_search_page(),
+                )
+            )
+        self.update()
+
+    def jump_to_result(self, category):
+        """
+        Leaves the global search and opens the category of the clicked result.
+
+        Parameters:
+            - category (str): The category the result belongs to.
+        """
+        for field in (self.searchbar, self.tagbar):
+            if field is not None:
+                field.value = ""
+                field.update()
+        self.global_results = []
+        self.search_results.controls = []
+        self.page.drawer.select_category(category)
+
+
+class CommandPalette(ft.Container):
+    """
+    Quick launcher overlay (Ctrl+K) that finds any script by name and copies it on Enter.
+    """
+
+    def __init__(self, page):
+        super().__init__()
+        self.page = page
+        self.index = ScriptIndex()
+        self.results = []
+        self.selected = 0
+        self.visible = False
+        self.top = 70
+        self.left = 0
+        self.right = 0
+        self.alignment = ft.alignment.top_center
+        self.query_input = ft.TextField(
+            hint_text="Type to find a script, Enter to copy",
+            prefix_icon=ft.icons.SEARCH_ROUNDED,
+            autofocus=True,
+            on_change=lambda e: self.refresh(),
+            on_submit=lambda e: self.page.run_task(self.copy_selected),
+        )
+        self.result_list = ft.Column(spacing=0, tight=True)
+        self.content = ft.Container(
+            width=500,
+            padding=10,
+            border_radius=10,
+            bgcolor=ft.colors.SURFACE_VARIANT,
+            shadow=ft.BoxShadow(blur_radius=20, color=ft.colors.BLACK54),
+            content=ft.Column(
+                [
+                    self.query_input,
+                    self.result_list,
+                ],
+                tight=True,
+            ),
+        )
+
+    def toggle(self):
+        if self.visible:
+            self.close()
         else:
-            self.container_title.value = self.page.drawer.controls[self.page.drawer.selected_index + 3].label
-            self.container_title.update()
-            for index in self.scripts.controls:
-                index.visible = True
+            self.visible = True
+            self.query_input.value = ""
+            self.refresh()
+            self.query_input.focus()
+
+    def close(self):
+        self.visible = False
+        self.update()
+
+    def refresh(self):
+        self.results = self.index.search(self.query_input.value)
+        self.selected = 0
+        self.render()
+
+    def render(self):
+        self.result_list.controls = [
+            ft.ListTile(
+                dense=True,
+                selected=i == self.selected,
+                title=ft.Text(script_object.get("script_name")),
+                subtitle=ft.Text(f'{category} - {script_object.get("script_type")}'),
+                on_click=lambda e, index=i: self.page.run_task(self.copy_selected, index),
+            )
+            for i, (category, script_object) in enumerate(self.results)
+        ]
+        if not self.results and self.query_input.value:
+            self.result_list.controls.append(ft.Text("No matching scripts."))
         self.update()
 
+    def move_selection(self, step):
+        if self.results:
+            self.selected = (self.selected + step) % len(self.results)
+            self.render()
+
+    async def copy_selected(self, index=None):
+        if not self.results:
+            return
+        category, script_object = self.results[self.selected if index is None else index]
+        self.close()
+        await asyncio.to_thread(record_script_usage, script_object.script_id)
+        self.page.dialog.open_dialog(dialog_type="user_input", dialog_message=script_object.get("script_value"))
+
 
-def main(page: ft.Page):
+async def main(page: ft.Page):
     global SCRIPT_OBJECTS
     global DEFAULT_TYPES
     global SCRIPT_TYPE_OPTIONS
@@ -1890,11 +7398,16 @@ def main(page: ft.Page):
     global FIRST_START
     global SETTINGS
     global GEMINI_ENABLED
+    global MARKDOWN_PREVIEW_MAX_LINES
+    global COMPACT_ROWS
     setup_logger()
     load_env_file()
     GEMINI_ENABLED = SETTINGS.get('GEMINI_ENABLED')
     GEMINI_API_KEY = SETTINGS.get('GEMINI_API_KEY')
     genai.configure(api_key=GEMINI_API_KEY)
+    if SETTINGS.get('PREVIEW_MAX_LINES', '').isdigit():
+        MARKDOWN_PREVIEW_MAX_LINES = int(SETTINGS.get('PREVIEW_MAX_LINES'))
+    COMPACT_ROWS = SETTINGS.get('COMPACT_ROWS') == "True"
 
     page.title = 'Scripz'
     script_container = ScriptContainer(page)
@@ -1904,6 +7417,14 @@ def main(page: ft.Page):
     page.dialog = dialog
     page.drawer = category_drawer
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
+    command_palette = CommandPalette(page)
+    page.overlay.append(command_palette)
+    page.overlay.append(dialog.import_picker)
+    page.overlay.append(dialog.export_picker)
+    await asyncio.to_thread(load_script_usage)
+    STORAGE_LISTENERS.append(category_drawer.refresh_categories)
+    watch_scripts_file()
+    page.run_task(start_sync)
 
     page.add(
         header,
@@ -1913,6 +7434,7 @@ def main(page: ft.Page):
 
     def resize_container(e):
         script_container.scripts.height = page.window_height - 275
+        script_container.search_results.height = page.window_height - 275
         script_container.update()
         page.update()
 
@@ -1927,10 +7449,16 @@ def main(page: ft.Page):
         update_env_file("THEME", "dark")
 
     def on_keyboard(e: ft.KeyboardEvent, header_ref):
-        if e.key == "F" and e.ctrl:
+        if e.key == "K" and e.ctrl:
+            command_palette.toggle()
+        elif command_palette.visible and e.key in ("Arrow Down", "Arrow Up"):
+            command_palette.move_selection(1 if e.key == "Arrow Down" else -1)
+        elif command_palette.visible and e.key == "Escape":
+            command_palette.close()
+        elif e.key == "F" and e.ctrl:
             header_ref.show_search_bar(e)
         elif e.key == "Escape":
-            header_ref.clear_search_bar()
+            header_ref.clear_search_bar(e)
         page.update()
 
     page.on_keyboard_event = lambda e: on_keyboard(e, header)
@@ -1950,5 +7478,17 @@ def main(page: ft.Page):
 
 
 model = genai.GenerativeModel('gemini-pro')
-atexit.register(lambda: log_info("Program stopped."))
-ft.app(target=main, assets_dir="assets")
+# Regex search workers import this module, the app itself only starts in the main process
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    if len(sys.argv) == 3 and sys.argv[1] == "--chunk-manifest":
+        # Release helper: python main.py --chunk-manifest dist\Scripz.exe  ->  dist\Scripz.exe.chunks.json
+        with open(f"{sys.argv[2]}.chunks.json", "w", encoding="utf-8") as manifest_file:
+            json.dump(build_chunk_manifest(sys.argv[2]), manifest_file)
+        sys.exit()
+    if len(sys.argv) == 3 and sys.argv[1] == "--classifier-benchmark":
+        # Release helper: python main.py --classifier-benchmark path\to\snippets
+        print(benchmark_classifier(sys.argv[2]))
+        sys.exit()
+    atexit.register(lambda: log_info("Program stopped."))
+    ft.app(target=main, assets_dir="assets")
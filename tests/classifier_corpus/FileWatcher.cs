@@ -0,0 +1,16 @@
+using System;
+using System.IO;
+
+namespace Tools
+{
+    public class Program
+    {
+        public static void Main(string[] args)
+        {
+            using var watcher = new FileSystemWatcher(args[0]);
+            watcher.Changed += (sender, e) => Console.WriteLine($"Changed: {e.FullPath}");
+            watcher.EnableRaisingEvents = true;
+            Console.ReadLine();
+        }
+    }
+}
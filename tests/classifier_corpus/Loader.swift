@@ -0,0 +1,15 @@
+import Foundation
+
+enum LoaderError: Error {
+    case invalidResponse
+}
+
+func loadData(from url: URL) async throws -> Data {
+    let (data, response) = try await URLSession.shared.data(from: url)
+    guard let http = response as? HTTPURLResponse, http.statusCode == 200 else {
+        throw LoaderError.invalidResponse
+    }
+    return data
+}
+
+let names: [String] = ["a", "b"].map { $0.uppercased() }
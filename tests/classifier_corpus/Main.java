@@ -0,0 +1,13 @@
+import java.io.BufferedReader;
+import java.io.IOException;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+
+public class Main {
+    public static void main(String[] args) throws IOException {
+        try (BufferedReader reader = Files.newBufferedReader(Paths.get(args[0]))) {
+            long lines = reader.lines().filter(line -> !line.isBlank()).count();
+            System.out.println("Lines: " + lines);
+        }
+    }
+}
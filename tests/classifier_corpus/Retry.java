@@ -0,0 +1,21 @@
+package com.example.util;
+
+import java.util.concurrent.Callable;
+
+public final class Retry {
+    private Retry() {
+    }
+
+    public static <T> T run(Callable<T> task, int attempts) throws Exception {
+        Exception last = null;
+        for (int i = 0; i < attempts; i++) {
+            try {
+                return task.call();
+            } catch (Exception e) {
+                last = e;
+                Thread.sleep(100L * (i + 1));
+            }
+        }
+        throw last;
+    }
+}
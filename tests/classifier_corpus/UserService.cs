@@ -0,0 +1,15 @@
+using System.Collections.Generic;
+using System.Linq;
+
+public class UserService
+{
+    private readonly List<User> _users = new List<User>();
+
+    public IEnumerable<User> Active() => _users.Where(u => u.IsActive).OrderBy(u => u.Name);
+
+    public void Add(User user)
+    {
+        if (user == null) throw new ArgumentNullException(nameof(user));
+        _users.Add(user);
+    }
+}
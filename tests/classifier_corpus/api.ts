@@ -0,0 +1,14 @@
+import axios from 'axios';
+
+export type User = {
+    id: number;
+    name: string;
+    email?: string;
+};
+
+export async function fetchUsers(baseUrl: string): Promise<User[]> {
+    const response = await axios.get<User[]>(`${baseUrl}/users`);
+    return response.data.filter((user: User) => user.name.length > 0);
+}
+
+export const isAdmin = (user: User): boolean => user.id === 1;
@@ -0,0 +1,20 @@
+require 'fileutils'
+require 'date'
+
+class Backup
+  attr_reader :source, :target
+
+  def initialize(source, target)
+    @source = source
+    @target = File.join(target, Date.today.to_s)
+  end
+
+  def run
+    FileUtils.mkdir_p(target)
+    Dir.glob(File.join(source, '**', '*')).each do |path|
+      next if File.directory?(path)
+      FileUtils.cp(path, target)
+    end
+    puts "Copied to #{target}"
+  end
+end
@@ -0,0 +1,10 @@
+#!/bin/bash
+set -euo pipefail
+target="/mnt/backup/$(date +%Y-%m-%d)"
+mkdir -p "$target"
+for dir in "$HOME/Documents" "$HOME/Projects"; do
+    if [ -d "$dir" ]; then
+        rsync -a --delete "$dir" "$target/"
+    fi
+done
+echo "Backup written to $target"
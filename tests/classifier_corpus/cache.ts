@@ -0,0 +1,22 @@
+interface Entry<T> {
+    value: T;
+    expires: number;
+}
+
+export class Cache<T> {
+    private entries = new Map<string, Entry<T>>();
+
+    constructor(private readonly ttl: number) {}
+
+    get(key: string): T | undefined {
+        const entry = this.entries.get(key);
+        if (!entry || entry.expires < Date.now()) {
+            return undefined;
+        }
+        return entry.value;
+    }
+
+    set(key: string, value: T): void {
+        this.entries.set(key, { value, expires: Date.now() + this.ttl });
+    }
+}
@@ -0,0 +1,18 @@
+#include <stdio.h>
+#include <stdlib.h>
+
+int main(int argc, char *argv[]) {
+    FILE *file = fopen(argv[1], "rb");
+    if (file == NULL) {
+        perror("fopen");
+        return EXIT_FAILURE;
+    }
+    unsigned long sum = 0;
+    int c;
+    while ((c = fgetc(file)) != EOF) {
+        sum += (unsigned char)c;
+    }
+    fclose(file);
+    printf("%lu\n", sum);
+    return 0;
+}
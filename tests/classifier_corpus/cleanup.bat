@@ -0,0 +1,8 @@
+@echo off
+setlocal enabledelayedexpansion
+set LOGDIR=C:\Logs
+if not exist "%LOGDIR%" mkdir "%LOGDIR%"
+del /q /f "%TEMP%\*.tmp"
+for /d %%D in ("%TEMP%\*") do rd /s /q "%%D"
+echo Cleaned %TEMP% >> "%LOGDIR%\cleanup.log"
+goto :eof
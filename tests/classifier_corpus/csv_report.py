@@ -0,0 +1,18 @@
+import csv
+from collections import defaultdict
+
+
+def summarize(path):
+    totals = defaultdict(float)
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            totals[row["department"]] += float(row["amount"])
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+class Report:
+    def __init__(self, totals):
+        self.totals = totals
+
+    def __str__(self):
+        return "\n".join(f"{name}: {amount:.2f}" for name, amount in self.totals.items())
@@ -0,0 +1,14 @@
+function debounce(fn, delay) {
+    let timer = null;
+    return function (...args) {
+        clearTimeout(timer);
+        timer = setTimeout(() => fn.apply(this, args), delay);
+    };
+}
+
+const input = document.getElementById('search');
+input.addEventListener('input', debounce((event) => {
+    console.log('Searching for', event.target.value);
+}, 300));
+
+module.exports = { debounce };
@@ -0,0 +1,20 @@
+import hashlib
+import os
+import sys
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    seen = {}
+    for root, _, files in os.walk(sys.argv[1]):
+        for name in files:
+            path = os.path.join(root, name)
+            seen.setdefault(file_hash(path), []).append(path)
+    print({key: paths for key, paths in seen.items() if len(paths) > 1})
@@ -0,0 +1,8 @@
+Import-Module ActiveDirectory
+$cutoff = (Get-Date).AddDays(-90)
+$users = Get-ADUser -Filter {LastLogonDate -lt $cutoff -and Enabled -eq $true} -Properties LastLogonDate
+foreach ($user in $users) {
+    Disable-ADAccount -Identity $user.SamAccountName
+    Write-Host "Disabled $($user.SamAccountName)" -ForegroundColor Yellow
+}
+$users | Select-Object Name, LastLogonDate | Export-Csv -Path "C:\Reports\disabled.csv" -NoTypeInformation
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+threshold=${1:-90}
+df -h --output=pcent,target | tail -n +2 | while read -r usage mount; do
+    percent=${usage%\%}
+    if [[ $percent -ge $threshold ]]; then
+        echo "Warning: $mount is at $usage" >&2
+    fi
+done
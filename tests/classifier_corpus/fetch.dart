@@ -0,0 +1,16 @@
+import 'dart:convert';
+import 'package:http/http.dart' as http;
+
+Future<List<String>> fetchNames(String url) async {
+  final response = await http.get(Uri.parse(url));
+  if (response.statusCode != 200) {
+    throw Exception('Request failed: ${response.statusCode}');
+  }
+  final List<dynamic> data = jsonDecode(response.body);
+  return data.map((item) => item['name'] as String).toList();
+}
+
+void main() async {
+  final names = await fetchNames('https://example.com/users');
+  print(names);
+}
@@ -0,0 +1,14 @@
+const fetch = require('node-fetch');
+
+async function getUsers(url) {
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`Request failed with ${response.status}`);
+    }
+    const users = await response.json();
+    return users.filter((user) => user.active).map((user) => user.name);
+}
+
+getUsers('https://example.com/api/users')
+    .then((names) => console.log(names))
+    .catch((err) => console.error(err));
@@ -0,0 +1,18 @@
+local Inventory = {}
+Inventory.__index = Inventory
+
+function Inventory.new()
+    local self = setmetatable({}, Inventory)
+    self.items = {}
+    return self
+end
+
+function Inventory:add(name, count)
+    self.items[name] = (self.items[name] or 0) + count
+end
+
+for name, count in pairs({apple = 3, pear = 2}) do
+    print(name .. ": " .. tostring(count))
+end
+
+return Inventory
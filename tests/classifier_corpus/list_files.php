@@ -0,0 +1,14 @@
+<?php
+function listFiles(string $dir): array
+{
+    $result = [];
+    foreach (scandir($dir) as $entry) {
+        if ($entry === '.' || $entry === '..') {
+            continue;
+        }
+        $result[] = $dir . DIRECTORY_SEPARATOR . $entry;
+    }
+    return $result;
+}
+
+print_r(listFiles(__DIR__));
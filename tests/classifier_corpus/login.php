@@ -0,0 +1,16 @@
+<?php
+session_start();
+require_once 'db.php';
+
+$username = $_POST['username'] ?? '';
+$stmt = $pdo->prepare('SELECT id, password_hash FROM users WHERE username = ?');
+$stmt->execute([$username]);
+$user = $stmt->fetch(PDO::FETCH_ASSOC);
+
+if ($user && password_verify($_POST['password'], $user['password_hash'])) {
+    $_SESSION['user_id'] = $user['id'];
+    header('Location: /dashboard.php');
+    exit;
+}
+echo "Invalid login";
+?>
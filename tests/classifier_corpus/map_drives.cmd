@@ -0,0 +1,9 @@
+@echo off
+net use Z: /delete /y >nul 2>&1
+net use Z: \\fileserver\shared /persistent:yes
+if errorlevel 1 (
+    echo Mapping failed
+    exit /b 1
+)
+echo Drive Z: mapped
+pause
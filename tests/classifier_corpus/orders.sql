@@ -0,0 +1,8 @@
+SELECT c.name, COUNT(o.id) AS orders, SUM(o.total) AS revenue
+FROM customers c
+INNER JOIN orders o ON o.customer_id = c.id
+WHERE o.created_at >= '2024-01-01'
+GROUP BY c.name
+HAVING COUNT(o.id) > 5
+ORDER BY revenue DESC
+LIMIT 20;
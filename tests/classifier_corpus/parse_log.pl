@@ -0,0 +1,16 @@
+#!/usr/bin/perl
+use strict;
+use warnings;
+
+my %counts;
+open(my $fh, '<', $ARGV[0]) or die "Cannot open $ARGV[0]: $!";
+while (my $line = <$fh>) {
+    chomp $line;
+    if ($line =~ /^(\S+) .* "(GET|POST)/) {
+        $counts{$1}++;
+    }
+}
+close($fh);
+foreach my $ip (sort { $counts{$b} <=> $counts{$a} } keys %counts) {
+    print "$ip $counts{$ip}\n";
+}
@@ -0,0 +1,12 @@
+use strict;
+use warnings;
+use File::Basename;
+
+foreach my $file (glob("*.txt")) {
+    my ($name, $path, $suffix) = fileparse($file, qr/\.[^.]*/);
+    my $new = lc($name) . $suffix;
+    $new =~ s/\s+/_/g;
+    next if $new eq $file;
+    rename($file, $new) or warn "Could not rename $file: $!";
+    print "$file -> $new\n";
+}
@@ -0,0 +1,18 @@
+#include <string.h>
+#include <stdio.h>
+
+void reverse(char *s) {
+    size_t len = strlen(s);
+    for (size_t i = 0; i < len / 2; i++) {
+        char tmp = s[i];
+        s[i] = s[len - 1 - i];
+        s[len - 1 - i] = tmp;
+    }
+}
+
+int main(void) {
+    char buffer[] = "hello world";
+    reverse(buffer);
+    printf("%s\n", buffer);
+    return 0;
+}
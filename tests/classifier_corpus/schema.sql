@@ -0,0 +1,11 @@
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_users_email ON users (email);
+
+INSERT INTO users (email) VALUES ('admin@example.com');
+UPDATE users SET email = LOWER(email) WHERE email <> LOWER(email);
+DELETE FROM users WHERE created_at < '2020-01-01';
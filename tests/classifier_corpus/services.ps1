@@ -0,0 +1,12 @@
+param(
+    [string]$ComputerName = $env:COMPUTERNAME
+)
+$services = Get-Service -ComputerName $ComputerName | Where-Object { $_.StartType -eq 'Automatic' -and $_.Status -ne 'Running' }
+foreach ($service in $services) {
+    try {
+        Start-Service -InputObject $service -ErrorAction Stop
+        Write-Output "Started $($service.Name)"
+    } catch {
+        Write-Warning "Failed to start $($service.Name): $_"
+    }
+}
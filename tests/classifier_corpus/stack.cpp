@@ -0,0 +1,16 @@
+#include <vector>
+#include <stdexcept>
+
+template <typename T>
+class Stack {
+public:
+    void push(const T& value) { items_.push_back(value); }
+    T pop() {
+        if (items_.empty()) throw std::out_of_range("empty stack");
+        T value = items_.back();
+        items_.pop_back();
+        return value;
+    }
+private:
+    std::vector<T> items_;
+};
@@ -0,0 +1,15 @@
+local function countdown(seconds)
+    local remaining = seconds
+    while remaining > 0 do
+        print("Remaining: " .. remaining)
+        remaining = remaining - 1
+    end
+    if remaining == 0 then
+        print("Done")
+    end
+end
+
+local ok, err = pcall(countdown, 5)
+if not ok then
+    print("error: " .. err)
+end
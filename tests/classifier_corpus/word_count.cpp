@@ -0,0 +1,15 @@
+#include <iostream>
+#include <map>
+#include <string>
+
+int main() {
+    std::map<std::string, int> counts;
+    std::string word;
+    while (std::cin >> word) {
+        ++counts[word];
+    }
+    for (const auto& [key, value] : counts) {
+        std::cout << key << ": " << value << std::endl;
+    }
+    return 0;
+}
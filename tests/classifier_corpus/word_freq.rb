@@ -0,0 +1,12 @@
+counts = Hash.new(0)
+File.foreach(ARGV[0]) do |line|
+  line.downcase.scan(/\w+/) { |word| counts[word] += 1 }
+end
+
+counts.sort_by { |_, count| -count }.first(10).each do |word, count|
+  puts "#{word}: #{count}"
+end
+
+unless counts.empty?
+  puts "Total words: #{counts.values.sum}"
+end
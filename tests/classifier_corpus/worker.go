@@ -0,0 +1,17 @@
+package worker
+
+import "sync"
+
+func Process(items []string, fn func(string) error) []error {
+	var wg sync.WaitGroup
+	errs := make([]error, len(items))
+	for i, item := range items {
+		wg.Add(1)
+		go func(i int, item string) {
+			defer wg.Done()
+			errs[i] = fn(item)
+		}(i, item)
+	}
+	wg.Wait()
+	return errs
+}
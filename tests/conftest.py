@@ -0,0 +1,110 @@
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# main.py builds its data paths from LOCALAPPDATA on import, keep the tests out of the real library
+os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="scripz-tests-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+os.makedirs(main.DATA_DIR, exist_ok=True)
+
+
+@pytest.fixture
+def run():
+    """
+    Runs a coroutine on a fresh event loop, closing the shared HTTP client it created afterwards.
+    """
+    def run_coroutine(coroutine):
+        async def wrapper():
+            try:
+                return await coroutine
+            finally:
+                if main.HTTP_CLIENT is not None:
+                    await main.HTTP_CLIENT.aclose()
+                    main.HTTP_CLIENT = None
+        return asyncio.run(wrapper())
+    return run_coroutine
+
+
+@pytest.fixture
+def serve():
+    """
+    Starts local HTTP servers for a handler class and returns their base URL. They are stopped after the test.
+    """
+    servers = []
+
+    def start(handler):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class FileServer(BaseHTTPRequestHandler):
+    """
+    Serves the files in 'files' ({path: bytes}) with ETags, Range and If-Range like a release CDN.
+
+    'cut_after' drops the connection after that many body bytes to simulate an interrupted download,
+    'ignore_range' answers every request with the whole file. Requests are recorded in 'requests'.
+    """
+    files = {}
+    cut_after = None
+    ignore_range = False
+    requests = []
+
+    @classmethod
+    def with_files(cls, **files):
+        return type("Server", (cls,), {"files": {f"/{name}": data for name, data in files.items()}, "requests": []})
+
+    @classmethod
+    def etag(cls, data):
+        return f'"{main.hashlib.sha256(data).hexdigest()[:16]}"'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers)))
+        data = self.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        etag = self.etag(data)
+        start, end = 0, len(data) - 1
+        status = 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and not self.ignore_range and self.headers.get("If-Range", etag) == etag:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else end
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+        body = data[start:end + 1]
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.end_headers()
+        if self.cut_after is not None:
+            body = body[:self.cut_after]
+            self.close_connection = True
+        self.wfile.write(body)
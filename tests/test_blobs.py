@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+import main
+
+BODY = "Get-Service | Where-Object Status -eq 'Stopped'\n" * 40  # Over BLOB_MIN_SIZE, kept as a blob
+
+
+def script(script_id, script_value):
+    return {"script_id": script_id, "script_type": "Powershell", "script_name": script_id,
+            "script_value": script_value, "script_description": "", "script_tags": []}
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    A saved library with one script stored as a blob, loaded into SCRIPT_OBJECTS.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    monkeypatch.setattr(main, "BLOB_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setattr(main, "BLOB_REFCOUNTS", main.Counter())
+    monkeypatch.setattr(main, "BLOB_HASHES", {})
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        scripts["A"] = [main.ScriptRecord.from_dict(script("big", BODY)),
+                        main.ScriptRecord.from_dict(script("small", "ls"))]
+    main.save_script_objects()
+    yield
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+def reload():
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+    main.load_script_objects()
+    return {item.script_id: item for _, items in main.SCRIPTS.snapshot() for item in items}
+
+
+def saved():
+    with open(main.SCRIPTS_FILE, encoding="utf-8") as f:
+        return {item["script_id"]: item for item in json.load(f)["A"]}
+
+
+def test_missing_blob_keeps_its_reference(library):
+    blob = saved()["big"]["script_blob"]
+    blob_file = main.blob_path(blob)
+    with open(blob_file, encoding="utf-8", newline="") as f:
+        content = f.read()
+    os.remove(blob_file)
+
+    scripts = reload()
+    assert scripts["big"].script_value == ""
+    # Saving other changes must not store the empty body in place of the missing one
+    main.SCRIPTS.update("small", script_name="renamed")
+    assert saved()["big"]["script_blob"] == blob
+    assert "script_value" not in saved()["big"]
+    assert main.BLOB_REFCOUNTS[blob] == 1
+
+    # Once the blob file is back, so is the body
+    os.makedirs(os.path.dirname(blob_file), exist_ok=True)
+    with open(blob_file, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    scripts = reload()
+    assert scripts["big"].script_value == BODY
+    assert scripts["big"].extra is None
+
+
+def test_new_body_replaces_a_missing_blob(library):
+    os.remove(main.blob_path(saved()["big"]["script_blob"]))
+    reload()
+    main.SCRIPTS.update("big", script_value="echo rewritten")
+    assert saved()["big"]["script_value"] == "echo rewritten"
+    assert "script_blob" not in saved()["big"]
+    assert reload()["big"].script_value == "echo rewritten"
+
+    main.SCRIPTS.update("big", script_value=BODY)
+    assert saved()["big"]["script_blob"] == main.hashlib.sha256(BODY.encode("utf-8")).hexdigest()
+    assert reload()["big"].script_value == BODY
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import random
+
+import pytest
+
+import main
+from conftest import FileServer
+
+
+def synthetic_build(size, seed):
+    return random.Random(seed).randbytes(size)
+
+
+def patched(data, seed):
+    """
+    Mimics a new release of 'data': a few bytes changed, a block inserted and a block removed.
+    """
+    rng = random.Random(seed)
+    data = bytearray(data)
+    for offset in rng.sample(range(len(data)), 5):
+        data[offset] ^= 0xFF
+    insert_at = len(data) // 3
+    data[insert_at:insert_at] = rng.randbytes(5000)
+    del data[2 * len(data) // 3:2 * len(data) // 3 + 3000]
+    return bytes(data)
+
+
+@pytest.fixture
+def builds(tmp_path):
+    old = synthetic_build(1_000_000, seed=1)
+    new = patched(old, seed=2)
+    installed = tmp_path / "installed.exe"
+    installed.write_bytes(old)
+    release = tmp_path / "Scripz.exe"
+    release.write_bytes(new)
+    manifest = main.build_chunk_manifest(str(release))
+    release.unlink()
+    return old, new, str(installed), manifest
+
+
+def test_chunks_cover_the_data_within_size_limits():
+    data = synthetic_build(500_000, seed=3)
+    chunks = list(main.split_chunks(data))
+
+    assert chunks[0][0] == 0
+    assert all(offset + length == next_offset for (offset, length), (next_offset, _) in zip(chunks, chunks[1:]))
+    assert sum(length for _, length in chunks) == len(data)
+    assert all(main.CHUNK_MIN_SIZE <= length <= main.CHUNK_MAX_SIZE for _, length in chunks[:-1])
+
+
+def test_chunk_boundaries_resynchronise_after_an_insert():
+    data = synthetic_build(500_000, seed=4)
+    edited = data[:100_000] + b"inserted" * 100 + data[100_000:]
+    old_chunks = {data[offset:offset + length] for offset, length in main.split_chunks(data)}
+    new_chunks = [edited[offset:offset + length] for offset, length in main.split_chunks(edited)]
+
+    assert sum(chunk not in old_chunks for chunk in new_chunks) <= 2
+
+
+def test_manifest_describes_the_build(builds):
+    _, new, _, manifest = builds
+    assert manifest["size"] == len(new)
+    assert manifest["sha256"] == hashlib.sha256(new).hexdigest()
+    for offset, length, digest in manifest["chunks"]:
+        assert hashlib.sha256(new[offset:offset + length]).hexdigest() == digest
+
+
+def test_delta_rebuilds_the_release_from_a_fraction_of_the_bytes(run, serve, tmp_path, builds):
+    _, new, installed, manifest = builds
+    server = FileServer.with_files(**{"Scripz.exe": new})
+    url = serve(server) + "/Scripz.exe"
+    destination = str(tmp_path / "update.exe")
+    progress = []
+
+    downloaded = run(main.apply_chunk_delta(installed, manifest, url, destination,
+                                            lambda done, total: progress.append((done, total))))
+
+    assert open(destination, "rb").read() == new
+    assert downloaded < len(new) * 0.25
+    assert progress[-1] == (downloaded, downloaded)
+    assert all("Range" in headers for _, headers in server.requests)
+
+
+def test_tampered_chunk_is_rejected(run, serve, tmp_path, builds):
+    _, new, installed, manifest = builds
+    tampered = bytearray(new)
+    tampered[len(new) // 3 + 10] ^= 0xFF
+    url = serve(FileServer.with_files(**{"Scripz.exe": bytes(tampered)})) + "/Scripz.exe"
+    destination = str(tmp_path / "update.exe")
+
+    with pytest.raises(ValueError):
+        run(main.apply_chunk_delta(installed, manifest, url, destination))
+
+    assert not os.path.exists(destination)
+    assert not os.path.exists(destination + ".part")
+
+
+def test_server_without_range_support_is_rejected(run, serve, tmp_path, builds):
+    _, new, installed, manifest = builds
+    server = FileServer.with_files(**{"Scripz.exe": new})
+    server.ignore_range = True
+    url = serve(server) + "/Scripz.exe"
+
+    with pytest.raises(ValueError):
+        run(main.apply_chunk_delta(installed, manifest, url, str(tmp_path / "update.exe")))
+
+
+def test_unrelated_build_falls_back_to_full_download(run, serve, tmp_path, builds):
+    _, _, installed, _ = builds
+    other = tmp_path / "Scripz.exe"
+    other.write_bytes(synthetic_build(1_000_000, seed=9))
+    manifest = main.build_chunk_manifest(str(other))
+    server = FileServer.with_files(**{"Scripz.exe": other.read_bytes()})
+    url = serve(server) + "/Scripz.exe"
+
+    with pytest.raises(ValueError):
+        run(main.apply_chunk_delta(installed, manifest, url, str(tmp_path / "update.exe")))
+    assert server.requests == []
+
+
+def test_release_executable_skips_the_manifest():
+    assets = [
+        {"name": "Scripz.exe.chunks.json", "browser_download_url": "manifest"},
+        {"name": "Scripz.exe", "browser_download_url": "exe"},
+    ]
+    assert main.release_executable(assets)["browser_download_url"] == "exe"
+    assert main.release_executable(assets[:1]) is None
+    assert main.release_executable([]) is None
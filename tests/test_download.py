@@ -0,0 +1,121 @@
+import hashlib
+import os
+
+import httpx
+import pytest
+
+import main
+from conftest import FileServer
+
+
+def payload(size, seed=0):
+    return bytes((i * 31 + seed) % 251 for i in range(size))
+
+
+def test_download_streams_and_verifies(run, serve, tmp_path):
+    data = payload(300_000)
+    url = serve(FileServer.with_files(**{"Scripz.exe": data})) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+    progress = []
+
+    run(main.download_file(url, destination, hashlib.sha256(data).hexdigest(),
+                           lambda done, total: progress.append((done, total)), "v1"))
+
+    assert open(destination, "rb").read() == data
+    assert progress[-1] == (len(data), len(data))
+    assert os.listdir(tmp_path) == ["Scripz.exe"]
+
+
+def test_interrupted_download_resumes_with_if_range(run, serve, tmp_path):
+    data = payload(300_000)
+    server = FileServer.with_files(**{"Scripz.exe": data})
+    url = serve(server) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+
+    server.cut_after = 100_000
+    with pytest.raises(httpx.HTTPError):
+        run(main.download_file(url, destination, hashlib.sha256(data).hexdigest(), version="v1"))
+    partial_size = os.path.getsize(destination + ".v1.part")
+    assert 0 < partial_size <= 100_000
+
+    server.cut_after = None
+    run(main.download_file(url, destination, hashlib.sha256(data).hexdigest(), version="v1"))
+
+    headers = server.requests[-1][1]
+    assert headers["Range"] == f"bytes={partial_size}-"
+    assert headers["If-Range"] == FileServer.etag(data)
+    assert open(destination, "rb").read() == data
+    assert os.listdir(tmp_path) == ["Scripz.exe"]
+
+
+def test_partial_of_a_changed_file_starts_over(run, serve, tmp_path):
+    old, new = payload(200_000), payload(200_000, seed=7)
+    server = FileServer.with_files(**{"Scripz.exe": old})
+    url = serve(server) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+
+    server.cut_after = 150_000
+    with pytest.raises(httpx.HTTPError):
+        run(main.download_file(url, destination, version="v1"))
+
+    # Same release tag, but the asset was replaced: If-Range no longer matches and the server sends it all
+    server.files = {"/Scripz.exe": new}
+    server.cut_after = None
+    run(main.download_file(url, destination, version="v1"))
+
+    assert server.requests[-1][1]["If-Range"] == FileServer.etag(old)
+    assert open(destination, "rb").read() == new
+
+
+def test_partial_of_another_version_is_discarded(run, serve, tmp_path):
+    data = payload(100_000)
+    server = FileServer.with_files(**{"Scripz.exe": data})
+    url = serve(server) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+    (tmp_path / "Scripz.exe.v1.part").write_bytes(payload(40_000, seed=3))
+    (tmp_path / "Scripz.exe.v1.part.json").write_text(f'{{"url": "{url}", "validator": "\\"old\\""}}')
+
+    run(main.download_file(url, destination, hashlib.sha256(data).hexdigest(), version="v2"))
+
+    assert "Range" not in server.requests[-1][1]
+    assert open(destination, "rb").read() == data
+    assert os.listdir(tmp_path) == ["Scripz.exe"]
+
+
+def test_partial_without_validator_is_not_resumed(run, serve, tmp_path):
+    data = payload(100_000)
+    server = FileServer.with_files(**{"Scripz.exe": data})
+    url = serve(server) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+    (tmp_path / "Scripz.exe.v1.part").write_bytes(payload(40_000, seed=3))
+
+    run(main.download_file(url, destination, hashlib.sha256(data).hexdigest(), version="v1"))
+
+    assert "Range" not in server.requests[-1][1]
+    assert open(destination, "rb").read() == data
+
+
+def test_server_ignoring_range_restarts_download(run, serve, tmp_path):
+    data = payload(200_000)
+    server = FileServer.with_files(**{"Scripz.exe": data})
+    url = serve(server) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+
+    server.cut_after = 60_000
+    with pytest.raises(httpx.HTTPError):
+        run(main.download_file(url, destination, version="v1"))
+    server.cut_after = None
+    server.ignore_range = True
+    run(main.download_file(url, destination, hashlib.sha256(data).hexdigest(), version="v1"))
+
+    assert open(destination, "rb").read() == data
+
+
+def test_checksum_mismatch_discards_download(run, serve, tmp_path):
+    url = serve(FileServer.with_files(**{"Scripz.exe": payload(50_000)})) + "/Scripz.exe"
+    destination = str(tmp_path / "Scripz.exe")
+
+    with pytest.raises(ValueError):
+        run(main.download_file(url, destination, "0" * 64, version="v1"))
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,122 @@
+import pytest
+
+import main
+
+BODY = """Import-Module ActiveDirectory
+$cutoff = (Get-Date).AddDays(-90)
+$users = Get-ADUser -Filter * -SearchBase 'OU=Staff,DC=example,DC=com' -Properties LastLogonDate
+$stale = $users | Where-Object { $_.Enabled -and $_.LastLogonDate -lt $cutoff }
+foreach ($user in $stale) {
+    Disable-ADAccount -Identity $user.SamAccountName
+    Set-ADUser -Identity $user.SamAccountName -Description "Disabled on $(Get-Date -Format d) for inactivity"
+    Move-ADObject -Identity $user.DistinguishedName -TargetPath 'OU=Disabled,DC=example,DC=com'
+    Write-Host "Disabled $($user.SamAccountName), last logon $($user.LastLogonDate)" -ForegroundColor Yellow
+}
+$stale | Select-Object Name, SamAccountName, LastLogonDate | Export-Csv -Path C:\\Reports\\stale.csv -NoTypeInformation
+Write-Host "$($stale.Count) accounts disabled"
+"""
+
+
+def record(script_id, script_value):
+    return main.ScriptRecord(script_id=script_id, script_type="Powershell", script_name=script_id,
+                             script_value=script_value)
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads 2000 distinct scripts plus a few duplicates into SCRIPT_OBJECTS.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        scripts["A"] = [record(f"s-{i}", f"echo unique script number {i} " + "word " * (i % 13)) for i in range(2000)]
+        scripts["A"].append(record("exact-1", BODY))
+        scripts["B"] = [
+            record("exact-2", BODY.replace("\n", "\r\n") + "\n\n"),  # Same body once line endings are normalised
+            record("near", BODY + " -Force"),
+        ]
+    yield
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    """
+    Records the bodies the index computes MinHash signatures for.
+    """
+    bodies = []
+    minhash_signature = main.minhash_signature
+
+    def counted(text):
+        bodies.append(text)
+        return minhash_signature(text)
+
+    monkeypatch.setattr(main, "minhash_signature", counted)
+    return bodies
+
+
+def exact_ids(index):
+    return sorted(sorted(script_object.script_id for _, script_object in group) for group in index.exact_groups())
+
+
+def near_ids(index):
+    return sorted(sorted(script_object.script_id for _, script_object in group) for _, group in index.near_groups())
+
+
+def test_exact_and_near_duplicates(library):
+    index = main.DuplicateIndex()
+    assert exact_ids(index) == [["exact-1", "exact-2"]]
+    groups = index.near_groups()
+    assert near_ids(index) == [["exact-1", "exact-2", "near"]]
+    assert main.NEAR_DUPLICATE_THRESHOLD <= groups[0][0] < 1.0
+    categories = {script_object.script_id: category for category, script_object in groups[0][1]}
+    assert categories == {"exact-1": "A", "exact-2": "B", "near": "B"}
+
+
+def test_incremental_refresh_only_hashes_changes(library, hashed, monkeypatch):
+    index = main.DuplicateIndex()
+    index.refresh()
+    assert len(hashed) == 2002  # exact-1 and exact-2 share a body
+    hashed.clear()
+
+    def walk():
+        raise AssertionError("An edit shouldn't walk the whole library")
+
+    monkeypatch.setattr(main, "iter_script_objects", walk)
+
+    main.SCRIPTS.update("s-5", script_value=BODY)
+    assert exact_ids(index) == [["exact-1", "exact-2", "s-5"]]
+    assert hashed == []  # The body was already indexed
+
+    main.SCRIPTS.update("near", script_value="something else entirely")
+    assert near_ids(index) == []
+    assert hashed == ["something else entirely"]
+
+    main.SCRIPTS.delete(["exact-1", "exact-2"])
+    assert exact_ids(index) == []
+    main.SCRIPTS.delete(["s-5"])
+    index.refresh()
+    # The body's digest, signature and buckets went with its last script
+    assert BODY not in {entry[2] for entry in index.entries.values()}
+    assert all(index.by_digest.values()) and index.signatures.keys() == index.by_digest.keys()
+    assert all(digests <= index.signatures.keys() for digests in index.buckets.values())
+
+    main.SCRIPTS.move("s-7", "B")
+    main.SCRIPTS.add("B", record("copy", "echo unique script number 7 " + "word " * 7))
+    assert exact_ids(index) == [["copy", "s-7"]]
+    assert {category for category, _ in index.exact_groups()[0]} == {"B"}
+    assert len(hashed) == 1
+
+
+def test_rebuild_when_the_log_cannot_say(library, hashed, monkeypatch):
+    index = main.DuplicateIndex()
+    index.refresh()
+    hashed.clear()
+    main.SCRIPTS.update("s-1", script_value=BODY)
+    main.SCRIPTS.delete(["near"])
+    monkeypatch.setattr(main, "library_changes_since", lambda version: None)
+    assert exact_ids(index) == [["exact-1", "exact-2", "s-1"]]
+    assert "near" not in index.entries
+    assert hashed == []
@@ -0,0 +1,161 @@
+import os
+import threading
+
+import pytest
+
+import main
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "classifier_corpus")
+
+
+def corpus():
+    """
+    The labelled snippets in classifier_corpus, typed by file extension like the importer does.
+    """
+    for name in sorted(os.listdir(CORPUS)):
+        script_type = main.IMPORT_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+        if script_type is not None:
+            with open(os.path.join(CORPUS, name), "r", encoding="utf-8") as f:
+                yield script_type, f.read()
+
+
+@pytest.fixture(params=["numpy", "pure python"])
+def model(request, monkeypatch):
+    """
+    Runs a test with the numpy count matrix and again with the pure Python fallback used without numpy.
+    """
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(main, "np", None)
+    return request.param
+
+
+@pytest.fixture
+def classifier(model):
+    classifier = main.LanguageClassifier()
+    classifier.version = main.LIBRARY_VERSION  # Only the LANGUAGE_HINTS, not whatever library is loaded
+    return classifier
+
+
+def test_corpus_accuracy(classifier):
+    snippets = list(corpus())
+    assert len({script_type for script_type, _ in snippets}) >= 20
+    correct = sum(classifier.classify(text)[0] == script_type for script_type, text in snippets)
+    assert correct / len(snippets) >= 0.9
+
+
+def test_guesses_are_right(classifier):
+    guesses = [(classifier.guess(text), script_type) for script_type, text in corpus()]
+    made = [(guess, script_type) for guess, script_type in guesses if guess is not None]
+    assert len(made) >= 0.8 * len(guesses)
+    assert sum(guess == script_type for guess, script_type in made) / len(made) >= 0.95
+
+
+def test_text_is_kept_from_gemini(classifier):
+    for script_type, text in corpus():
+        assert classifier.looks_like_text(text) == (script_type == "Text")
+
+
+def test_benchmark_report():
+    report = main.benchmark_classifier(CORPUS)
+    assert report.startswith(f"{len(list(corpus()))} snippets from")
+    hints_only = float(report.splitlines()[1].split("accuracy ")[1].split("%")[0])
+    assert hints_only >= 80
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads 300 scripts of the corpus types into SCRIPT_OBJECTS.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    snippets = list(corpus())
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        scripts["A"] = [
+            main.ScriptRecord(script_id=f"s-{i}", script_type=snippets[i % len(snippets)][0], script_name=f"s{i}",
+                              script_value=f"{snippets[i % len(snippets)][1]}\n# {i}")
+            for i in range(300)
+        ]
+    yield
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+def learned(classifier):
+    """
+    The counts a classifier learned, per type and feature, whichever way they are stored.
+    """
+    if main.np is None:
+        return {script_type: {feature: round(count, 6) for feature, count in counts.items()}
+                for script_type, counts in classifier.counts.items()}
+    return {
+        script_type: {
+            feature: round(classifier.count_matrix[row, column], 6)
+            for feature, column in classifier.columns.items() if classifier.count_matrix[row, column] > 1e-9
+        }
+        for script_type, row in classifier.rows.items()
+    }
+
+
+def test_numpy_scores_match_the_fallback(monkeypatch):
+    pytest.importorskip("numpy")
+    snippets = list(corpus())
+
+    def train_and_classify():
+        classifier = main.LanguageClassifier()
+        classifier.version = main.LIBRARY_VERSION
+        for index, (script_type, text) in enumerate(snippets[::2]):
+            classifier.train(index, main.ScriptRecord(script_type=script_type, script_value=text))
+        for index in range(0, len(snippets) // 2, 3):
+            classifier.train(index, None)  # Forgotten scripts release their feature columns
+        return [classifier.classify(text) for _, text in snippets], learned(classifier)
+
+    vectorized, vectorized_counts = train_and_classify()
+    monkeypatch.setattr(main, "np", None)
+    fallback, fallback_counts = train_and_classify()
+    assert [script_type for script_type, _ in vectorized] == [script_type for script_type, _ in fallback]
+    assert [margin for _, margin in vectorized] == pytest.approx([margin for _, margin in fallback])
+    assert vectorized_counts == fallback_counts
+
+
+def test_count_matrix_grows_and_reuses_columns(monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(main, "CLASSIFIER_MIN_COLUMNS", 16)
+    classifier = main.LanguageClassifier()
+    classifier.version = main.LIBRARY_VERSION
+    assert classifier.count_matrix.shape[1] >= len(classifier.columns) > 16
+    text = "frobnicate_widgets quux_handler zorblax_value = 1"
+    classifier.train("new", main.ScriptRecord(script_type="Python", script_value=text))
+    columns = len(classifier.columns) + len(classifier.free_columns)
+    classifier.train("new", None)
+    assert len(classifier.free_columns) >= 3
+    classifier.train("other", main.ScriptRecord(script_type="Ruby", script_value=text.replace("_", "-")))
+    assert len(classifier.columns) + len(classifier.free_columns) == columns
+
+
+def test_concurrent_refreshes_learn_once(library, model):
+    expected = main.LanguageClassifier()
+    expected.refresh()
+    classifier = main.LanguageClassifier()
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def refresh():
+        barrier.wait()
+        try:
+            classifier.refresh()
+            classifier.classify("Get-ADUser -Filter * | Disable-ADAccount")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=refresh) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert classifier.entries.keys() == expected.entries.keys()
+    assert classifier.totals == pytest.approx(expected.totals)
+    assert learned(classifier) == learned(expected)
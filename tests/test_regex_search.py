@@ -0,0 +1,137 @@
+import re
+import threading
+import time
+from functools import partial
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads a small library into SCRIPT_OBJECTS.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        scripts["A"] = [
+            main.ScriptRecord(script_id=f"a-{i}", script_type="Powershell", script_name=f"a{i}",
+                              script_value=f"Get-ADUser user{i}" if i % 2 == 0 else "ls")
+            for i in range(20)
+        ]
+    yield
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+@pytest.fixture
+def counted_pools(monkeypatch):
+    """
+    Counts the worker pools RegexSearch starts.
+    """
+    pools = []
+    get_context = main.multiprocessing.get_context
+
+    class Context:
+        def __init__(self, method):
+            self.context = get_context(method)
+
+        def Pool(self, *args, **kwargs):
+            pool = self.context.Pool(*args, **kwargs)
+            pools.append(pool)
+            return pool
+
+    monkeypatch.setattr(main.multiprocessing, "get_context", Context)
+    yield pools
+    for pool in pools:
+        pool.terminate()
+
+
+def test_warm_up_and_search_start_one_pool_per_worker(library, counted_pools):
+    search = main.RegexSearch(workers=2)
+    barrier = threading.Barrier(3)
+    results = []
+
+    def warm_up():
+        barrier.wait()
+        search.warm_up()
+
+    def query():
+        barrier.wait()
+        results.append(search.search("get-aduser"))
+
+    threads = [threading.Thread(target=warm_up), threading.Thread(target=warm_up), threading.Thread(target=query)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(counted_pools) == 2
+    assert len(results[0]) == 10
+    search.close()
+    assert search.workers == [None, None]
+
+
+def test_search_follows_library_changes(library, counted_pools):
+    search = main.RegexSearch(workers=2)
+    search.warm_up()
+    assert len(search.search(r"^get-aduser user1\d$")) == 5
+    main.SCRIPTS.update("a-10", script_value="nothing")
+    main.SCRIPTS.delete(["a-12"])
+    main.SCRIPTS.add("A", main.ScriptRecord(script_id="a-new", script_type="Powershell", script_name="new",
+                                            script_value="Get-ADUser user19"))
+    results = search.search(r"^get-aduser user1\d$")
+    assert sorted(record.script_id for _, record, _ in results) == ["a-14", "a-16", "a-18", "a-new"]
+    assert len(counted_pools) == 2
+    search.close()
+
+
+def test_slow_pattern_times_out_and_the_workers_recover(library, counted_pools):
+    main.SCRIPTS.add("A", main.ScriptRecord(script_id="slow", script_type="Text", script_name="slow",
+                                            script_value="a" * 40 + "b"))
+    search = main.RegexSearch(workers=2)
+    search.warm_up()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        search.search(r"(a+)+$", timeout=0.5)
+    assert time.monotonic() - start < 2.5
+    assert None in search.workers  # The worker stuck on the pattern was stopped
+    # The stopped worker is started again and sent its whole shard
+    results = search.search("get-aduser")
+    assert len(results) == 10
+    assert len(counted_pools) == 3
+    assert [record.script_id for _, record, _ in search.search(r"a{40}b")] == ["slow"]
+    search.close()
+
+
+def test_errors_are_shown_instead_of_raised(library, counted_pools):
+    search = main.RegexSearch(workers=2)
+    main.SCRIPTS.add("A", main.ScriptRecord(script_id="slow", script_type="Text", script_name="slow",
+                                            script_value="a" * 40 + "b"))
+    shown = []
+
+    class Container:
+        regex_search = type("Search", (), {"search": staticmethod(partial(search.search, timeout=0.5))})
+
+        def show_results(self, results, empty_message, spans=None):
+            shown.append((results, empty_message))
+
+    main.ScriptContainer.show_regex_results(Container(), "(")
+    assert shown.pop() == ([], f"Invalid pattern: {error_of('(')}")
+    assert counted_pools == []  # Rejected before any worker is started
+
+    main.ScriptContainer.show_regex_results(Container(), r"(a+)+$")
+    assert shown.pop() == ([], "Search stopped: The pattern took longer than 0.5s.")
+
+    main.ScriptContainer.show_regex_results(Container(), r"^ls$")
+    results, _ = shown.pop()
+    assert len(results) == 10
+    search.close()
+
+
+def error_of(pattern):
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        return e
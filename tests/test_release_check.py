@@ -0,0 +1,108 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+
+import httpx
+import pytest
+
+import main
+
+
+class GitHubServer(BaseHTTPRequestHandler):
+    """
+    Stands in for the GitHub releases API, answering conditional requests with 304 when the ETag matches.
+    """
+    release = {"tag_name": "v9.9.9", "assets": []}
+    etag = '"release-1"'
+    status = None
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        if self.status:
+            self.send_error(self.status)
+            return
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(self.release).encode()
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def github(serve, monkeypatch, tmp_path):
+    server = type("Server", (GitHubServer,), {"requests": []})
+    monkeypatch.setattr(main, "GITHUB_API", serve(server) + "/repos/Christian-Boettcher/Scripz/releases/latest")
+    monkeypatch.setattr(main, "RELEASE_CACHE_FILE", str(tmp_path / "release_cache.json"))
+    return server
+
+
+def expire_cache():
+    cache = main.read_release_cache()
+    cache["checked_at"] = time.time() - main.RELEASE_CACHE_TTL - 1
+    main.write_release_cache(cache)
+
+
+def test_first_check_is_cached_with_etag(run, github):
+    assert run(main.fetch_latest_release())["tag_name"] == "v9.9.9"
+
+    cache = main.read_release_cache()
+    assert cache["etag"] == GitHubServer.etag
+    assert cache["release"]["tag_name"] == "v9.9.9"
+    assert "If-None-Match" not in github.requests[0]
+
+
+def test_fresh_cache_skips_the_network(run, github):
+    run(main.fetch_latest_release())
+    assert run(main.fetch_latest_release())["tag_name"] == "v9.9.9"
+    assert len(github.requests) == 1
+
+
+def test_expired_cache_sends_if_none_match_and_reuses_304(run, github):
+    run(main.fetch_latest_release())
+    expire_cache()
+
+    assert run(main.fetch_latest_release())["tag_name"] == "v9.9.9"
+    assert github.requests[-1]["If-None-Match"] == GitHubServer.etag
+    assert time.time() - main.read_release_cache()["checked_at"] < main.RELEASE_CACHE_TTL
+    # The 304 refreshed the TTL, so the next check doesn't touch the network
+    run(main.fetch_latest_release())
+    assert len(github.requests) == 2
+
+
+def test_expired_cache_picks_up_a_new_release(run, github):
+    run(main.fetch_latest_release())
+    expire_cache()
+    github.release = {"tag_name": "v10.0.0", "assets": []}
+    github.etag = '"release-2"'
+
+    assert run(main.fetch_latest_release())["tag_name"] == "v10.0.0"
+    assert main.read_release_cache()["etag"] == '"release-2"'
+
+
+def test_server_error_falls_back_to_stale_cache(run, github):
+    run(main.fetch_latest_release())
+    expire_cache()
+    github.status = 500
+
+    assert run(main.fetch_latest_release())["tag_name"] == "v9.9.9"
+
+
+def test_server_error_without_cache_raises(run, github):
+    github.status = 500
+    with pytest.raises(httpx.HTTPError):
+        run(main.fetch_latest_release())
+
+
+def test_missing_repository_returns_none(run, github):
+    github.status = 404
+    assert run(main.fetch_latest_release()) is None
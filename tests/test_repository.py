@@ -0,0 +1,162 @@
+import json
+import random
+import threading
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads a library of 5 categories with 200 scripts each into SCRIPT_OBJECTS.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    data = {
+        f"C{category}": [
+            {"script_id": f"{category}-{i}", "script_type": "Python", "script_name": f"s{category}-{i}",
+             "script_value": "v", "script_description": ""}
+            for i in range(200)
+        ]
+        for category in range(5)
+    }
+    with open(main.SCRIPTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+    main.load_script_objects()
+    yield
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+def run_threads(count, target):
+    errors = []
+
+    def run(seed):
+        try:
+            target(seed)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    assert not any(thread.is_alive() for thread in threads), "deadlock"
+    return errors
+
+
+def test_concurrent_operations_keep_memory_and_disk_consistent(library, monkeypatch):
+    added, deleted = [], []
+    saving = threading.Lock()
+    write_scripts_file = main.write_scripts_file
+
+    def exclusive_write():
+        # Saves must never interleave
+        assert saving.acquire(blocking=False), "two saves at once"
+        try:
+            write_scripts_file()
+        finally:
+            saving.release()
+
+    monkeypatch.setattr(main, "write_scripts_file", exclusive_write)
+
+    def hammer(seed):
+        rng = random.Random(seed)
+        for n in range(40):
+            ids = [item.script_id for _, items in main.SCRIPTS.snapshot() for item in items]
+            operation = rng.random()
+            if operation < 0.2:
+                record = main.ScriptRecord(f"t{seed}-{n}", "Bash", f"x{seed}-{n}", "b", "")
+                main.SCRIPTS.add(f"C{rng.randrange(6)}", record)
+                added.append(record.script_id)
+            elif operation < 0.4:
+                main.SCRIPTS.update(rng.choice(ids), script_value=f"u{seed}-{n}")
+            elif operation < 0.55:
+                main.SCRIPTS.swap(rng.choice(ids), rng.choice(ids))
+            elif operation < 0.7:
+                main.SCRIPTS.move(rng.choice(ids), f"C{rng.randrange(6)}", 0)
+            elif operation < 0.8:
+                victim = rng.choice(ids)
+                if main.SCRIPTS.delete([victim]):
+                    deleted.append(victim)
+            elif operation < 0.85:
+                category = f"C{rng.randrange(6)}"
+                main.SCRIPTS.rename_category(category, category + "_r") or \
+                    main.SCRIPTS.rename_category(category + "_r", category)
+            else:
+                list(main.search_script_objects("x"))
+                list(main.iter_script_objects())
+
+    assert run_threads(16, hammer) == []
+
+    memory = {category: [item.to_dict() for item in items] for category, items in main.SCRIPTS.snapshot()}
+    disk = {category: [item.to_dict() for item in items] for category, items in main.read_scripts_file()[0].items()}
+    assert disk == memory
+    ids = [item["script_id"] for items in memory.values() for item in items]
+    assert len(ids) == len(set(ids)) == 1000 + len(added) - len(deleted)
+
+
+def test_concurrent_updates_to_one_script_are_not_lost(library):
+    def append(seed):
+        for n in range(20):
+            with main.SCRIPTS.write() as data:
+                category, index = main.SCRIPTS.locate("0-0")
+                record = data[category][index]
+                main.SCRIPTS.update("0-0", script_value=record.script_value + "x")
+
+    assert run_threads(8, append) == []
+    assert main.SCRIPT_OBJECTS["C0"][0].script_value == "v" + "x" * 160
+
+
+def test_readers_share_and_writers_exclude():
+    lock = main.ReadWriteLock()
+    state = {"readers": 0, "max_readers": 0, "writers": 0, "violations": 0}
+    guard = threading.Lock()
+
+    def read(seed):
+        for _ in range(200):
+            lock.acquire_read()
+            with guard:
+                state["readers"] += 1
+                state["max_readers"] = max(state["max_readers"], state["readers"])
+                state["violations"] += state["writers"] > 0
+            time.sleep(0.0001)
+            with guard:
+                state["readers"] -= 1
+            lock.release_read()
+
+    def write(seed):
+        for _ in range(100):
+            lock.acquire_write()
+            with guard:
+                state["writers"] += 1
+                state["violations"] += state["writers"] > 1 or state["readers"] > 0
+            time.sleep(0.0001)
+            with guard:
+                state["writers"] -= 1
+            lock.release_write()
+
+    errors = run_threads(8, lambda seed: read(seed) if seed % 2 else write(seed))
+    assert errors == []
+    assert state["violations"] == 0
+    assert state["max_readers"] > 1
+
+
+def test_write_lock_is_reentrant_but_not_upgradable():
+    lock = main.ReadWriteLock()
+    lock.acquire_write()
+    lock.acquire_write()
+    lock.acquire_read()
+    lock.release_read()
+    lock.release_write()
+    lock.release_write()
+
+    lock.acquire_read()
+    with pytest.raises(RuntimeError):
+        lock.acquire_write()
+    lock.release_read()
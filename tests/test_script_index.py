@@ -0,0 +1,152 @@
+import random
+import threading
+import time
+
+import pytest
+
+import main
+
+WORDS = ["get", "set", "ad", "user", "group", "disable", "enable", "backup", "restore", "service", "sql", "report"]
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads 400 scripts with random names into SCRIPT_OBJECTS, with no usage recorded.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    monkeypatch.setattr(main, "SCRIPT_USAGE", {})
+    rng = random.Random(2)
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        for category in ("A", "B"):
+            scripts[category] = [
+                main.ScriptRecord(script_id=f"{category}-{i}", script_type="Powershell",
+                                  script_name=" ".join(rng.sample(WORDS, rng.randint(1, 4))).title(),
+                                  script_value="ls")
+                for i in range(200)
+            ]
+    yield rng
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+def expected(query):
+    """
+    The scripts whose name has a word starting with every word of the query, found by scanning the library.
+    """
+    words = query.casefold().split()
+    return sorted(
+        (category, item.script_id) for category, items in main.SCRIPTS.snapshot() for item in items
+        if all(any(name_word.startswith(word) for name_word in item.script_name.casefold().split())
+               for word in words)
+    )
+
+
+QUERIES = ["get", "get us", "dis ad", "ba", "s", "report sql group", "restore"]
+
+
+def assert_search(index):
+    for query in QUERIES:
+        results = index.search(query, limit=1000)
+        assert sorted((category, script_object.script_id) for category, script_object in results) == \
+            expected(query), query
+    # No empty branches are left behind by removed words
+    stack = [index.root]
+    while stack:
+        node = stack.pop()
+        for key, value in node.items():
+            if key not in (None, 0):
+                assert value[0] > 0
+                stack.append(value)
+
+
+def test_incremental_build(library):
+    rng = library
+    index = main.ScriptIndex()
+    assert_search(index)
+    for round_ in range(5):
+        ids = [item.script_id for _, items in main.SCRIPTS.snapshot() for item in items]
+        for script_id in rng.sample(ids, 20):
+            main.SCRIPTS.update(script_id, script_name=" ".join(rng.sample(WORDS, 2)))
+        main.SCRIPTS.delete(rng.sample(ids, 10))
+        main.SCRIPTS.move(rng.choice(ids[:100]), "B", 0)
+        for i in range(10):
+            main.SCRIPTS.add("A", main.ScriptRecord(script_id=f"new-{round_}-{i}", script_type="Bash",
+                                                    script_name=" ".join(rng.sample(WORDS, 3)), script_value="ls"))
+        assert_search(index)
+    rebuilt = main.ScriptIndex()
+    rebuilt.build()
+    assert rebuilt.root == index.root
+
+
+def test_usage_ranks_first(library):
+    index = main.ScriptIndex()
+    name = main.SCRIPTS.snapshot()[0][1][0].script_name
+    first_word = name.split()[0].casefold()
+    main.SCRIPT_USAGE["A-0"] = [3, time.time()]
+    assert index.search(first_word)[0][1].script_id == "A-0"
+    assert index.search("")[0][1].script_id == "A-0"
+
+
+def test_concurrent_searches_build_once(library, monkeypatch):
+    index = main.ScriptIndex()
+    index.build()
+    ids = [item.script_id for _, items in main.SCRIPTS.snapshot() for item in items]
+    main.SCRIPTS.delete(ids[:30])
+    for i in range(30):
+        main.SCRIPTS.add("B", main.ScriptRecord(script_id=f"new-{i}", script_type="Bash", script_name=f"Get New {i}",
+                                                script_value="ls"))
+    library_changes_since = main.library_changes_since
+    add = main.ScriptIndex.add
+    added = []
+
+    def slow_changes_since(version):
+        time.sleep(0.05)  # Widens the window between the version check and applying the changes
+        return library_changes_since(version)
+
+    def counted_add(self, script_id, entry):
+        added.append(script_id)
+        add(self, script_id, entry)
+
+    monkeypatch.setattr(main, "library_changes_since", slow_changes_since)
+    monkeypatch.setattr(main.ScriptIndex, "add", counted_add)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def search():
+        barrier.wait()
+        try:
+            index.search("get")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert sorted(added) == sorted(f"new-{i}" for i in range(30))
+    assert_search(index)
+
+
+def test_palette_copy_records_usage_off_the_event_loop(library, monkeypatch, run):
+    class Dialog:
+        def open_dialog(self, dialog_type, dialog_message):
+            self.opened = (dialog_type, dialog_message)
+
+    class Page:
+        dialog = Dialog()
+
+    threads = []
+    monkeypatch.setattr(main, "record_script_usage",
+                        lambda script_id: threads.append((script_id, threading.get_ident())))
+    monkeypatch.setattr(main.CommandPalette, "update", lambda self: None)
+    palette = main.CommandPalette(Page())
+    palette.results = palette.index.search("get")
+    run(palette.copy_selected(1))
+    script_object = palette.results[1][1]
+    assert threads == [(script_object.script_id, threads[0][1])]
+    assert threads[0][1] != threading.get_ident()
+    assert Page.dialog.opened == ("user_input", script_object.script_value)
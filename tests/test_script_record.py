@@ -0,0 +1,98 @@
+import gc
+import json
+import random
+import tracemalloc
+
+import main
+
+
+def script(script_id, **fields):
+    return {"script_id": script_id, "script_type": "Bash", "script_name": script_id, "script_value": "echo",
+            "script_description": "", "script_tags": [], **fields}
+
+
+def test_dict_access_matches_the_stored_fields():
+    record = main.ScriptRecord.from_dict(script("a", script_tags=["Deploy", "#ad"]))
+
+    assert record["script_name"] == record.get("script_name") == "a"
+    assert record.script_tags == ("deploy", "ad")
+    assert dict(record) == record.to_dict() == {**script("a"), "script_tags": ("deploy", "ad")}
+    assert record == script("a", script_tags=["deploy", "ad"])
+    assert record.get("missing", 1) == 1 and "missing" not in record
+
+
+def test_script_types_are_interned():
+    first = main.ScriptRecord.from_dict(script("a", script_type="".join(["Power", "shell"])))
+    second = main.ScriptRecord.from_dict(script("b", script_type="".join(["Power", "shell"])))
+    assert first.script_type is second.script_type
+
+
+def test_unknown_fields_are_kept():
+    data = script("a", script_color="red", script_meta={"pinned": True})
+    record = main.ScriptRecord.from_dict(data)
+
+    assert record["script_color"] == "red" and "script_meta" in record
+    assert dict(record) == {**data, "script_tags": ()}
+    assert record.copy() == record and record.copy().extra is not record.extra
+    assert record != script("a")
+    assert main.ScriptRecord.from_dict(script("b")).extra is None
+
+
+def test_unknown_fields_survive_a_save(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    with open(main.SCRIPTS_FILE, "w", encoding="utf-8") as f:
+        json.dump({"A": [script("a", script_color="red"), script("b", script_value="x" * main.BLOB_MIN_SIZE,
+                                                                script_color="blue")]}, f)
+    with main.SCRIPTS.write() as library:
+        library.clear()
+    main.load_script_objects()
+
+    main.SCRIPTS.update("a", script_name="renamed")
+    main.SCRIPTS.update("b", script_name="renamed too")
+
+    with open(main.SCRIPTS_FILE, encoding="utf-8") as f:
+        saved = json.load(f)["A"]
+    assert [(item["script_name"], item["script_color"]) for item in saved] == [("renamed", "red"), ("renamed too", "blue")]
+    assert "script_blob" in saved[1]
+    with main.SCRIPTS.write() as library:
+        library.clear()
+
+
+def test_records_take_less_memory_than_dicts(monkeypatch, tmp_path):
+    """
+    Memory benchmark on a 100k-script library: the per-script cost of the dicts scripts.json used to be kept
+    as against ScriptRecord. Run with -s to see the numbers.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    rng = random.Random(1)
+    scripts = 100_000
+    with open(main.SCRIPTS_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            f"C{category}": [
+                {"script_id": f"{category:02d}{i:030d}", "script_type": rng.choice(main.DEFAULT_TYPES),
+                 "script_name": f"script {category}-{i}", "script_value": f"echo {i}", "script_description": f"d{i}"}
+                for i in range(scripts // 10)
+            ]
+            for category in range(10)
+        }, f)
+
+    def measure(load):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            library = load()
+            gc.collect()
+            return library, tracemalloc.get_traced_memory()[0] / scripts
+        finally:
+            tracemalloc.stop()
+
+    def load_dicts():
+        with open(main.SCRIPTS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+
+    dicts, dict_bytes = measure(load_dicts)
+    records, record_bytes = measure(lambda: main.read_scripts_file()[0])
+    print(f"\ndicts: {dict_bytes:.0f} B/script, records: {record_bytes:.0f} B/script")
+
+    assert sum(map(len, records.values())) == scripts
+    assert record_bytes < dict_bytes * 0.8
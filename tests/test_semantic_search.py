@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+import main
+
+np = pytest.importorskip("numpy")
+
+TOPICS = [
+    ("Disable user account", "Disables an Active Directory user account", "Disable-ADAccount -Identity $user"),
+    ("Restart print spooler", "Restarts the printer service", "Restart-Service -Name Spooler"),
+    ("Clear temp folder", "Deletes temporary files", "Remove-Item $env:TEMP\\* -Recurse"),
+    ("List open ports", "Shows listening network ports", "netstat -ano | findstr LISTENING"),
+]
+
+
+def record(script_id, topic):
+    name, description, value = TOPICS[topic]
+    return main.ScriptRecord(script_id=script_id, script_type="Powershell", script_name=name,
+                             script_value=value, script_description=description)
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads 40 scripts into SCRIPT_OBJECTS and keeps the semantic index files in a temporary directory.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    monkeypatch.setattr(main, "SEMANTIC_INDEX_FILE", str(tmp_path / "semantic_index.json"))
+    monkeypatch.setattr(main, "SEMANTIC_VECTORS_FILE", str(tmp_path / "semantic_vectors.f32"))
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        scripts["A"] = [record(f"s-{i}", i % len(TOPICS)) for i in range(40)]
+    yield
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+def assert_consistent(index):
+    """
+    The document counts have to match the rows, or IDF weights and scores stop making sense.
+    """
+    rows = index.vectors[:len(index.row_ids)]
+    assert (index.document_counts >= 0).all()
+    assert (index.document_counts == np.count_nonzero(rows, axis=0)).all()
+    assert not index.vectors[len(index.row_ids):].any()
+    assert all(not index.vectors[row].any() for row in index.free)
+
+
+def found(index, query):
+    return [script_object.script_id for _, script_object, _ in index.search(query)]
+
+
+def test_incremental_updates(library):
+    index = main.SemanticIndex()
+    assert found(index, "disable account")[0] in {f"s-{i}" for i in range(0, 40, 4)}
+    main.SCRIPTS.update("s-0", script_name="Reboot computer", script_description="Restarts the machine",
+                        script_value="Restart-Computer -Force")
+    main.SCRIPTS.delete(["s-4", "s-8"])
+    main.SCRIPTS.add("A", main.ScriptRecord(script_id="new", script_type="Powershell",
+                                            script_name="Unlock user account",
+                                            script_description="Unlocks a locked out user",
+                                            script_value="Unlock-ADAccount -Identity $user"))
+    results = found(index, "disable account")
+    assert "s-4" not in results and "s-8" not in results
+    assert "new" in results
+    assert found(index, "reboot computer")[0] == "s-0"
+    assert_consistent(index)
+    assert len(index.free) == 1  # "new" took one of the freed rows
+
+    reloaded = main.SemanticIndex()
+    reloaded.refresh()
+    assert_consistent(reloaded)
+    assert reloaded.rows == index.rows
+    assert found(reloaded, "reboot computer")[0] == "s-0"
+
+
+def test_missing_index_file(library):
+    index = main.SemanticIndex()
+    index.refresh()
+    os.remove(main.SEMANTIC_INDEX_FILE)
+    with main.SCRIPTS.write() as scripts:
+        scripts["A"].reverse()  # The rows are taken in a different order than the ones in the file
+    reloaded = main.SemanticIndex()
+    reloaded.refresh()
+    assert_consistent(reloaded)
+    assert found(reloaded, "restart printer")[0] in {f"s-{i}" for i in range(1, 40, 4)}
+
+
+def test_older_index_file(library):
+    index = main.SemanticIndex()
+    index.refresh()
+    with open(main.SEMANTIC_INDEX_FILE, "w", encoding="utf-8") as f:
+        f.write('{"dimensions": 16, "ids": [], "hashes": {}}')
+    reloaded = main.SemanticIndex()
+    reloaded.refresh()
+    assert_consistent(reloaded)
+    assert found(reloaded, "network ports")
+
+
+def test_crash_before_saving_index(library):
+    index = main.SemanticIndex()
+    index.refresh()
+    # Rows written to the vector file whose ids never made it to semantic_index.json
+    index.save_index = lambda: index.vectors.flush()
+    main.SCRIPTS.delete([f"s-{i}" for i in range(10)])
+    main.SCRIPTS.add("A", record("extra-0", 0))
+    main.SCRIPTS.add("A", record("extra-1", 1))
+    for i in range(50):
+        main.SCRIPTS.add("A", record(f"more-{i}", 2))
+    index.refresh()
+
+    reloaded = main.SemanticIndex()
+    reloaded.refresh()
+    assert_consistent(reloaded)
+    assert "more-0" in found(reloaded, "temporary files")
+    assert "extra-1" in found(reloaded, "printer service")
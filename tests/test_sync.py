@@ -0,0 +1,247 @@
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import main
+
+SERVER = """
+import asyncio, json, sys
+sys.path.insert(0, {repo!r})
+import main
+main.SETTINGS.update(SYNC_MODE="server", SYNC_HOST="127.0.0.1", SYNC_PORT="{port}", SYNC_NODE_ID="server")
+main.load_script_objects()
+asyncio.run(main.start_sync())
+print("ready", flush=True)
+for line in sys.stdin:
+    # Library operations sent by the test, run through the repository like the UI runs them
+    method, *args = json.loads(line)
+    getattr(main.SCRIPTS, method)(*args)
+    print("done", flush=True)
+"""
+
+
+def script(script_id, value=None):
+    return {"script_id": script_id, "script_type": "Bash", "script_name": script_id,
+            "script_value": value or f"echo {script_id}", "script_description": ""}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def write_library(path, data):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+class ServerInstance:
+    """
+    A second Scripz instance in sync server mode, running in its own process and data directory.
+    """
+
+    def __init__(self, tmp_path, data):
+        self.scripts_file = str(tmp_path / "Scripz" / "data" / "scripts.json")
+        os.makedirs(os.path.dirname(self.scripts_file))
+        write_library(self.scripts_file, data)
+        port = free_port()
+        self.url = f"http://127.0.0.1:{port}"
+        repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", SERVER.format(repo=repo, port=port)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+            env={**os.environ, "LOCALAPPDATA": str(tmp_path)},
+        )
+        assert self.process.stdout.readline().strip() == "ready"
+
+    def library(self):
+        with open(self.scripts_file, encoding="utf-8") as f:
+            return {category: [(item["script_id"], item["script_value"]) for item in items]
+                    for category, items in json.load(f).items() if items}
+
+    def edit(self, change):
+        """
+        Changes scripts.json behind the server's back, as another tool or instance on that machine would.
+        """
+        with open(self.scripts_file, encoding="utf-8") as f:
+            data = json.load(f)
+        change(data)
+        write_library(self.scripts_file, data)
+        time.sleep(0.05)  # Let the file's mtime move on
+
+    def call(self, method, *args):
+        """
+        Runs a ScriptRepository operation in the server instance.
+        """
+        self.process.stdin.write(json.dumps([method, *args]) + "\n")
+        self.process.stdin.flush()
+        assert self.process.stdout.readline().strip() == "done"
+
+    def stop(self):
+        self.process.stdin.close()
+        self.process.wait(10)
+
+
+def client_library():
+    # Categories aren't synced on their own, one emptied by a move stays behind on the node that made it
+    return {category: [(item.script_id, item.script_value) for item in items]
+            for category, items in main.SCRIPTS.snapshot() if items}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """
+    Turns this process into a sync client instance with its own library.
+    """
+    monkeypatch.setattr(main, "SYNC_NODE_ID", "client")
+    monkeypatch.setattr(main, "SYNC_ENABLED", False)
+    monkeypatch.setattr(main, "SYNC_OPS", [])
+    monkeypatch.setattr(main, "SYNC_PEER_CLOCK", {})
+    monkeypatch.setattr(main, "SETTINGS", {})
+    main.SYNC_CLOCK.clear()
+    main.SYNC_VERSIONS.clear()
+    if os.path.exists(main.SYNC_LOG_FILE):
+        os.remove(main.SYNC_LOG_FILE)
+
+    def load(data):
+        write_library(main.SCRIPTS_FILE, data)
+        with main.SCRIPTS.write() as library:
+            library.clear()
+        main.load_script_objects()
+        main.load_sync_library()
+
+    yield load
+    main.SYNC_CLOCK.clear()
+    main.SYNC_VERSIONS.clear()
+
+
+@pytest.fixture
+def server(tmp_path):
+    instances = []
+
+    def start(data):
+        instances.append(ServerInstance(tmp_path, data))
+        return instances[-1]
+
+    yield start
+    for instance in instances:
+        instance.stop()
+
+
+def test_first_sync_merges_both_libraries(run, client, server):
+    client({"Shared": [script("a")], "Client": [script("c1")]})
+    peer = server({"Server": [script("s1"), script("s2")]})
+
+    run(main.sync_with_server(peer.url))
+
+    assert client_library() == peer.library()
+    assert set(client_library()) == {"Shared", "Client", "Server"}
+
+
+def test_adds_edits_moves_and_deletes_sync_both_ways(run, client, server):
+    client({"A": [script("a1"), script("a2"), script("a3")]})
+    peer = server({})
+    run(main.sync_with_server(peer.url))
+
+    main.SCRIPTS.update("a1", script_value="edited on the client")
+    main.SCRIPTS.add("B", main.ScriptRecord.from_dict(script("b1")))
+    peer.edit(lambda data: data["A"].pop(1))  # a2 deleted on the server
+    run(main.sync_with_server(peer.url))
+
+    assert client_library() == peer.library() == {
+        "A": [("a1", "edited on the client"), ("a3", "echo a3")],
+        "B": [("b1", "echo b1")],
+    }
+
+    peer.call("move", "b1", "C")
+    run(main.sync_with_server(peer.url))
+    assert client_library() == peer.library()
+    assert "B" not in client_library() and client_library()["C"] == [("b1", "echo b1")]
+
+
+def test_reorders_sync_both_ways(run, client, server):
+    client({"A": [script(f"a{i}") for i in range(6)]})
+    peer = server({})
+    run(main.sync_with_server(peer.url))
+
+    main.SCRIPTS.swap("a0", "a4")
+    run(main.sync_with_server(peer.url))
+    assert [script_id for script_id, _ in peer.library()["A"]] == ["a4", "a1", "a2", "a3", "a0", "a5"]
+
+    peer.call("move", "a5", "A", 0)  # a5 dragged to the top on the server
+    run(main.sync_with_server(peer.url))
+    assert [script_id for script_id, _ in client_library()["A"]] == ["a5", "a4", "a1", "a2", "a3", "a0"]
+    assert client_library() == peer.library()
+
+
+def test_concurrent_changes_converge(run, client, server):
+    client({"A": [script("a1"), script("a2"), script("a3")]})
+    peer = server({})
+    run(main.sync_with_server(peer.url))
+
+    main.SCRIPTS.update("a1", script_value="client version")
+    main.SCRIPTS.swap("a2", "a3")
+
+    peer.edit(lambda data: data["A"][0].update(script_value="server version"))
+    peer.call("move", "a3", "A", 0)
+    run(main.sync_with_server(peer.url))
+    run(main.sync_with_server(peer.url))
+
+    assert client_library() == peer.library()
+    assert dict(client_library()["A"])["a1"] in ("client version", "server version")
+
+
+def test_sync_positions_only_move_reordered_scripts(client):
+    client({"A": [script(f"a{i}") for i in range(100)]})
+    before = {f"a{i}": main.sync_position(f"a{i}", "A") for i in range(100)}
+    main.SCRIPTS.swap("a10", "a90")
+
+    reorder_ops = main.SYNC_OPS[100:]
+    assert sorted((op["op"], op["script_id"]) for op in reorder_ops) == [("move", "a10"), ("move", "a90")]
+    after = [main.sync_position(item.script_id, "A") for item in main.SCRIPTS.snapshot()[0][1]]
+    assert after == sorted(after) and len(set(after)) == len(after)
+    assert sum(before[f"a{i}"] != main.sync_position(f"a{i}", "A") for i in range(100)) == 2
+
+
+def test_server_refuses_public_host_without_token(monkeypatch):
+    monkeypatch.setattr(main, "SETTINGS", {})
+    assert main.start_sync_server("0.0.0.0", free_port()) is None
+
+    monkeypatch.setattr(main, "SETTINGS", {"SYNC_TOKEN": "secret"})
+    server = main.start_sync_server("0.0.0.0", free_port())
+    assert server is not None
+    server.shutdown()
+    server.server_close()
+
+
+def post(port, headers, body=b""):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.putrequest("POST", "/sync")
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    status = connection.getresponse().status
+    connection.close()
+    return status
+
+
+def test_server_checks_token_and_request_size(monkeypatch):
+    monkeypatch.setattr(main, "SETTINGS", {"SYNC_TOKEN": "secret"})
+    port = free_port()
+    server = main.start_sync_server("127.0.0.1", port)
+    try:
+        assert post(port, {"Content-Length": "2", "X-Scripz-Token": "wrong"}, b"{}") == 403
+        assert post(port, {"X-Scripz-Token": "secret"}) == 411
+        assert post(port, {"Content-Length": str(main.SYNC_MAX_REQUEST_SIZE + 1), "X-Scripz-Token": "secret"}) == 413
+        assert post(port, {"Content-Length": "5", "X-Scripz-Token": "secret"}, b"nope!") == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+
+import pytest
+
+import main
+
+TAGS = ["ad", "deploy", "cleanup", "legacy", "network", "backup"]
+
+
+@pytest.fixture
+def library(monkeypatch, tmp_path):
+    """
+    Loads 200 scripts with random tags into SCRIPT_OBJECTS.
+    """
+    monkeypatch.setattr(main, "SCRIPTS_FILE", str(tmp_path / "scripts.json"))
+    rng = random.Random(1)
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+        for category in ("A", "B"):
+            scripts[category] = [
+                main.ScriptRecord(script_id=f"{category}-{i}", script_type="Bash", script_name=f"{category}{i:03}",
+                                  script_value="ls", script_tags=rng.sample(TAGS, rng.randint(0, 3)))
+                for i in range(100)
+            ]
+    yield rng
+    with main.SCRIPTS.write() as scripts:
+        scripts.clear()
+
+
+def expected(query):
+    """
+    Evaluates a tag query by scanning the library.
+    """
+    results = []
+    for category, items in main.SCRIPTS.snapshot():
+        for item in items:
+            tags = set(item.script_tags)
+            matches = True
+            for term in query.split():
+                if term.startswith("-"):
+                    matches = matches and term[1:] not in tags
+                else:
+                    matches = matches and any(tag in tags for tag in term.split("|"))
+            if matches:
+                results.append(item.script_id)
+    return sorted(results)
+
+
+QUERIES = ["ad", "ad deploy", "ad|cleanup", "-legacy", "deploy -legacy network|backup", "cleanup|backup -ad", ""]
+
+
+def assert_queries(index):
+    for query in QUERIES:
+        assert sorted(script_object.script_id for _, script_object in index.query(query)) == expected(query), query
+    assert {script_id: position for position, script_id in enumerate(index.script_ids)
+            if script_id is not None} == index.positions
+    assert sorted(index.free) == [position for position, script_id in enumerate(index.script_ids)
+                                  if script_id is None]
+    assert index.all.bit_count() == len(index.positions)
+
+
+def test_incremental_updates_and_bit_reuse(library):
+    rng = library
+    index = main.TagIndex()
+    assert_queries(index)
+    for round_ in range(5):
+        ids = [item.script_id for _, items in main.SCRIPTS.snapshot() for item in items]
+        for script_id in rng.sample(ids, 20):
+            main.SCRIPTS.update(script_id, script_tags=rng.sample(TAGS, rng.randint(0, 3)))
+        main.SCRIPTS.delete(rng.sample(ids, 15))
+        for i in range(10):
+            main.SCRIPTS.add("B", main.ScriptRecord(script_id=f"new-{round_}-{i}", script_type="Bash",
+                                                    script_name=f"new{round_}{i}", script_value="ls",
+                                                    script_tags=rng.sample(TAGS, 2)))
+        assert_queries(index)
+    # Deleted scripts' bits were handed out again instead of growing the bitmaps
+    assert len(index.script_ids) == 200
+    assert dict(index.tags()) == {
+        tag: len(expected(tag)) for tag in TAGS if expected(tag)
+    }
+
+
+def test_concurrent_queries_apply_changes_once(library, monkeypatch):
+    index = main.TagIndex()
+    index.refresh()
+    ids = [item.script_id for _, items in main.SCRIPTS.snapshot() for item in items]
+    main.SCRIPTS.delete(ids[:50])
+    for i in range(50):
+        main.SCRIPTS.add("A", main.ScriptRecord(script_id=f"new-{i}", script_type="Bash", script_name=f"new{i}",
+                                                script_value="ls", script_tags=["deploy"]))
+    library_changes_since = main.library_changes_since
+    add = main.TagIndex.add
+    added = []
+
+    def slow_changes_since(version):
+        time.sleep(0.05)  # Widens the window between the version check and applying the changes
+        return library_changes_since(version)
+
+    def counted_add(self, script_id, *entry):
+        added.append(script_id)
+        add(self, script_id, *entry)
+
+    monkeypatch.setattr(main, "library_changes_since", slow_changes_since)
+    monkeypatch.setattr(main.TagIndex, "add", counted_add)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def query():
+        barrier.wait()
+        try:
+            index.query("deploy")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert sorted(added) == sorted(f"new-{i}" for i in range(50))
+    assert len(index.script_ids) == 200
+    assert_queries(index)